@@ -1,7 +1,10 @@
+import atexit
 import logging
 from logging.config import dictConfig
 import logging.handlers
 import os
+import queue
+import threading
 
 from .logging.console_formatter import ConsoleLogFormatter
 
@@ -39,6 +42,7 @@ logging.getLogger('certbot_dns_cloudflare._internal.dns_cloudflare').setLevel(lo
 LOGFILE = '/var/log/middlewared.log'
 ZETTAREPL_LOGFILE = '/var/log/zettarepl.log'
 FAILOVER_LOGFILE = '/var/log/failover.log'
+LOG_QUEUE_SIZE = 10000  # records waiting to be written before new ones are dropped
 logging.TRACE = 6
 
 
@@ -51,6 +55,105 @@ logging.addLevelName(logging.TRACE, "TRACE")
 logging.Logger.trace = trace
 
 
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records over to the log listener thread that writes them with `handler` so that a slow log device does not
+    block the logging thread (e.g. the event loop). Records are dropped (and counted) if the queue is full.
+    """
+
+    def __init__(self, queue, handler):
+        super().__init__(queue)
+        self.handler = handler
+        # Records the target handler would ignore are filtered out before paying for their formatting
+        self.setLevel(handler.level)
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait((self, record))
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """
+    Writes records enqueued by `queue_handlers` to their target handlers and logs how many records were dropped when
+    the queue overflowed.
+    """
+
+    def __init__(self, queue, queue_handlers):
+        super().__init__(queue)
+        self.queue_handlers = queue_handlers
+        self.reported_dropped = {}
+
+    def handle(self, item):
+        queue_handler, record = item
+        self.report_dropped(queue_handler)
+        queue_handler.handler.handle(record)
+
+    def report_dropped(self, queue_handler):
+        reported = self.reported_dropped.get(queue_handler, 0)
+        if (dropped := queue_handler.dropped) != reported:
+            queue_handler.handler.handle(logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': logging.getLevelName(logging.WARNING),
+                'msg': '%d log records were dropped because the log queue was full',
+                'args': (dropped - reported,),
+            }))
+            self.reported_dropped[queue_handler] = dropped
+
+    def enqueue_sentinel(self):
+        # The queue might be full, wait for the records ahead of the sentinel to be written
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+
+        for queue_handler in self.queue_handlers:
+            self.report_dropped(queue_handler)
+
+
+log_queue_listener = None
+
+
+def setup_log_queue(loggers, queue_size=LOG_QUEUE_SIZE):
+    """
+    Replaces the handlers of `loggers` with `LogQueueHandler`s that are served by a single listener thread.
+    """
+    global log_queue_listener
+    stop_log_queue()
+
+    log_queue = queue.Queue(queue_size)
+    queue_handlers = []
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            if isinstance(handler, LogQueueHandler):
+                handler = handler.handler
+            queue_handlers.append(LogQueueHandler(log_queue, handler))
+            logger.addHandler(queue_handlers[-1])
+
+    log_queue_listener = LogQueueListener(log_queue, queue_handlers)
+    log_queue_listener.start()
+    return log_queue_listener
+
+
+def stop_log_queue():
+    """
+    Writes all the queued records and stops the listener thread.
+    """
+    global log_queue_listener
+    if log_queue_listener is not None:
+        log_queue_listener.stop()
+        log_queue_listener = None
+
+
+atexit.register(stop_log_queue)
+
+
 class Logger(object):
     """Pseudo-Class for Logger - Wrapper for logging module"""
     def __init__(
@@ -140,6 +243,7 @@ class Logger(object):
             logging.root.addHandler(console_handler)
         else:
             dictConfig(self.DEFAULT_LOGGING)
+            setup_log_queue([logging.getLogger(name) for name in self.DEFAULT_LOGGING['loggers']])
 
             # Make sure various log files are not readable by everybody.
             # umask could be another approach but chmod was chosen so
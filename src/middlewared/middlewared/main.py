@@ -5,7 +5,7 @@ from .common.event_source.manager import EventSourceManager
 from .event import Events
 from .job import Job, JobsQueue
 from .pipe import Pipes, Pipe
-from .restful import authenticate, copy_multipart_to_pipe, RESTfulAPI
+from .restful import authenticate, copy_multipart_to_pipe, copy_pipe_to_response, RESTfulAPI
 from .settings import conf
 from .schema import clean_and_validate_arg, Error as SchemaError
 import middlewared.service
@@ -18,6 +18,7 @@ from .utils.debug import get_frame_details, get_threads_stacks
 from .utils.lock import SoftHardSemaphore, SoftHardSemaphoreLimit
 from .utils.nginx import get_remote_addr_port
 from .utils.origin import UnixSocketOrigin, TCPIPOrigin
+from .utils.periodic import PeriodicTaskScheduler
 from .utils.plugins import LoadPluginsMixin
 from .utils.profile import profile_wrap
 from .utils.service.call import ServiceCallMixin
@@ -404,6 +405,21 @@ class Application:
         pass
 
 
+class JobFileResponse(web.FileResponse):
+    """
+    `web.FileResponse` that calls `on_sent(response)` coroutine once the file has been sent.
+    """
+
+    def __init__(self, path, on_sent, **kwargs):
+        super().__init__(path, **kwargs)
+        self.on_sent = on_sent
+
+    async def prepare(self, request):
+        rv = await super().prepare(request)
+        await self.on_sent(self)
+        return rv
+
+
 class FileApplication(object):
 
     def __init__(self, middleware, loop):
@@ -472,29 +488,53 @@ class FileApplication(object):
             resp.set_status(410)
             return resp
 
-        resp = web.StreamResponse(status=200, reason='OK', headers={
+        headers = {
             'Content-Type': 'application/octet-stream',
             'Content-Disposition': f'attachment; filename="{filename}"',
+        }
+        if job.pipes.output.buffered:
+            return await self._download_buffered(request, job_id, job, headers)
+
+        resp = web.StreamResponse(status=200, reason='OK', headers={
+            **headers,
             'Transfer-Encoding': 'chunked',
         })
         await resp.prepare(request)
 
-        def do_copy():
-            while True:
-                read = job.pipes.output.r.read(1048576)
-                if read == b'':
-                    break
-                asyncio.run_coroutine_threadsafe(resp.write(read), loop=self.loop).result()
-
         try:
             await self._cleanup_cancel(job_id)
-            await self.middleware.run_in_thread(do_copy)
+            await copy_pipe_to_response(self.loop, job.pipes.output, resp)
         finally:
             await job.pipes.close()
 
         await resp.drain()
         return resp
 
+    async def _download_buffered(self, request, job_id, job, headers):
+        """
+        Buffered job output is a regular file so it is sent using `sendfile` and HTTP Range requests are honored.
+        The file is kept until it is downloaded up to its end (or until the job cleanup timeout) so that
+        interrupted downloads can be resumed.
+        """
+        path = job.pipes.output.w.name
+
+        async def on_sent(resp):
+            if request.method != 'GET':
+                return
+
+            if resp.status == 206:
+                # `416 Range Not Satisfiable` would have been sent if the range was invalid
+                http_range = request.http_range
+                if http_range.stop is not None and http_range.stop < os.stat(path).st_size:
+                    return
+            elif resp.status != 200:
+                return
+
+            await self._cleanup_cancel(job_id)
+            await job.pipes.close()
+
+        return JobFileResponse(path, on_sent, headers=headers)
+
     async def upload(self, request):
         reader = await request.multipart()
 
@@ -533,7 +573,7 @@ class FileApplication(object):
         try:
             job = await self.middleware.call(data['method'], *(data.get('params') or []),
                                              pipes=Pipes(input=self.middleware.pipe()))
-            await self.middleware.run_in_thread(copy_multipart_to_pipe, self.loop, filepart, job.pipes.input)
+            await copy_multipart_to_pipe(self.loop, filepart, job.pipes.input)
         except CallError as e:
             if e.errno == CallError.ENOMETHOD:
                 status_code = 422
@@ -892,6 +932,7 @@ class Middleware(LoadPluginsMixin, ServiceCallMixin):
         self.__wsclients = {}
         self.events = Events()
         self.event_source_manager = EventSourceManager(self)
+        self.periodic_tasks = PeriodicTaskScheduler(self)
         self.__event_subs = defaultdict(list)
         self.__hooks = defaultdict(list)
         self.__blocked_hooks = defaultdict(lambda: 0)
@@ -1001,42 +1042,18 @@ class Middleware(LoadPluginsMixin, ServiceCallMixin):
             for task_name in dir(service_obj):
                 method = getattr(service_obj, task_name)
                 if callable(method) and hasattr(method, "_periodic"):
-                    if method._periodic.run_on_start:
-                        delay = 0
-                    else:
-                        delay = method._periodic.interval
-
                     method_name = f'{service_name}.{task_name}'
                     self.logger.debug(
                         f"Setting up periodic task {method_name} to run every {method._periodic.interval} seconds"
                     )
 
-                    self.loop.call_later(
-                        delay,
-                        functools.partial(
-                            self.__call_periodic_task,
-                            method, service_name, service_obj, method_name, method._periodic.interval
-                        )
+                    self.periodic_tasks.add(
+                        method_name,
+                        method._periodic.interval,
+                        method._periodic.run_on_start,
+                        functools.partial(self._call, method_name, service_obj, method, []),
                     )
 
-    def __call_periodic_task(self, method, service_name, service_obj, method_name, interval):
-        self.create_task(self.__periodic_task_wrapper(method, service_name, service_obj, method_name, interval))
-
-    async def __periodic_task_wrapper(self, method, service_name, service_obj, method_name, interval):
-        self.logger.trace("Calling periodic task %s", method_name)
-        try:
-            await self._call(method_name, service_obj, method, [])
-        except Exception:
-            self.logger.warning("Exception while calling periodic task", exc_info=True)
-
-        self.loop.call_later(
-            interval,
-            functools.partial(
-                self.__call_periodic_task,
-                method, service_name, service_obj, method_name, interval
-            )
-        )
-
     console_error_counter = 0
 
     def _console_write(self, text, fill_blank=True, append=False):
@@ -1789,6 +1806,9 @@ class Middleware(LoadPluginsMixin, ServiceCallMixin):
             if e.args[0] != "Event loop is closed":
                 raise
 
+        # Neither of the following runs `atexit` handlers so make sure all the queued log records are written
+        logger.stop_log_queue()
+
         # As we don't do clean shutdown (which will terminate multiprocessing children gracefully),
         # let's just kill our entire process group
         os.killpg(os.getpgid(os.getpid()), signal.SIGKILL)
@@ -1,6 +1,11 @@
+import fcntl
 import os
 import tempfile
 
+F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+# Larger than default (64 KiB) pipe capacity lets the writer (and the reader) do fewer, larger transfers
+PIPE_SIZE = 1048576
+
 
 class Pipes:
     """
@@ -47,12 +52,18 @@ class Pipe:
     """
     def __init__(self, middleware, buffered=False):
         self.middleware = middleware
+        self.buffered = buffered
 
         if buffered:
             self.w = tempfile.NamedTemporaryFile(buffering=0)
             self.r = open(self.w.name, "rb")
         else:
             r, w = os.pipe()
+            try:
+                fcntl.fcntl(w, F_SETPIPE_SZ, PIPE_SIZE)
+            except OSError:
+                # The size might exceed `/proc/sys/fs/pipe-max-size`, default capacity is just fine then
+                pass
             self.r = os.fdopen(r, "rb")
             self.w = os.fdopen(w, "wb")
 
@@ -179,8 +179,16 @@ class UserService(CRUDService):
             else:
                 memberships[uid] = [i['group']['id']]
 
+        if extra.get('read_authorized_keys', True):
+            authorized_keys = await self.middleware.run_in_thread(
+                self._read_authorized_keys_batch, [row['home'] for row in rows]
+            )
+        else:
+            authorized_keys = None
+
         return {
             'memberships': memberships,
+            'authorized_keys': authorized_keys,
             'user_2fa_mapping': ({
                 entry['user']['id']: bool(entry['secret']) for entry in await self.middleware.call(
                     'datastore.query', 'account.twofactor_user_auth', [['user_id', '!=', None]]
@@ -198,6 +206,11 @@ class UserService(CRUDService):
 
         return rv
 
+    @private
+    def _read_authorized_keys_batch(self, homedirs):
+        # Many users (e.g. all the builtin ones) share the same home directory
+        return {homedir: self._read_authorized_keys(homedir) for homedir in set(homedirs)}
+
     @private
     async def user_extend(self, user, ctx):
 
@@ -207,7 +220,10 @@ class UserService(CRUDService):
 
         user['groups'] = ctx['memberships'].get(user['id'], [])
         # Get authorized keys
-        user['sshpubkey'] = await self.middleware.run_in_thread(self._read_authorized_keys, user['home'])
+        if ctx['authorized_keys'] is not None:
+            user['sshpubkey'] = ctx['authorized_keys'].get(user['home'])
+        else:
+            user['sshpubkey'] = None
 
         user['immutable'] = user['builtin'] or (user['username'] == 'admin' and user['home'] == '/home/admin')
         user['twofactor_auth_configured'] = bool(ctx['user_2fa_mapping'].get(user['id']))
@@ -260,6 +276,11 @@ class UserService(CRUDService):
         datastore_options.pop('get', None)
         datastore_options.pop('limit', None)
         datastore_options.pop('offset', None)
+        # Reading authorized keys from every home directory is expensive, skip it unless they were requested
+        datastore_options['extra'] = dict(
+            options.get('extra', {}),
+            read_authorized_keys=not options.get('select') or 'sshpubkey' in options['select'],
+        )
 
         extra = options.get('extra', {})
         dssearch = extra.pop('search_dscache', False)
@@ -12,6 +12,7 @@ from middlewared.utils.path import FSLocation
 from middlewared.utils.plugins import load_modules, load_classes
 from middlewared.utils.python import get_middlewared_dir
 from middlewared.utils.service.task_state import TaskStateMixin
+from middlewared.utils.size import format_size
 from middlewared.validators import Range, Time
 from middlewared.validators import validate_schema
 
@@ -26,6 +27,7 @@ from Cryptodome.Cipher import AES
 from Cryptodome.Util import Counter
 from datetime import datetime
 import enum
+import humanfriendly
 import json
 import logging
 import os
@@ -35,9 +37,8 @@ import subprocess
 import tempfile
 import textwrap
 
-RE_TRANSF1 = re.compile(r"Transferred:\s*(?P<progress_1>.+), (?P<progress>[0-9]+)%$")
-RE_TRANSF2 = re.compile(r"Transferred:\s*(?P<progress_1>.+, )(?P<progress>[0-9]+)%, (?P<progress_2>.+)$")
-RE_CHECKS = re.compile(r"Checks:\s*(?P<checks>[0-9 /]+)(, (?P<progress>[0-9]+)%)?$")
+# Only every Nth progress report is written to the job logs in order not to clog them with a report every second
+RCLONE_STATS_LOG_INTERVAL = 300
 
 REMOTES = {}
 
@@ -178,7 +179,9 @@ async def rclone(middleware, job, cloud_sync, dry_run):
             "rclone",
             "--config", config.config_path,
             "-v",
+            "--use-json-log",
             "--stats", "1s",
+            "--stats-log-level", "NOTICE",
         ]
 
         if cloud_sync["attributes"].get("fast_list"):
@@ -339,125 +342,102 @@ async def run_script_check(job, proc, name):
         await job.logs_fd_write(f"[{name}] ".encode("utf-8") + read)
 
 
-# Prevents clogging job logs with progress reports every second
-class RcloneVerboseLogCutter:
-    PREFIXES = (
-        re.compile(r"([0-9]{4}/[0-9]{2}/[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2} |<6>)INFO {2}:\s*$"),
-        re.compile(r"Transferred:\s+"),
-        re.compile(r"Errors:\s+"),
-        re.compile(r"Checks:\s+"),
-        re.compile(r"Elapsed time:\s+"),
-        re.compile(r"Transferring:"),
-        re.compile(r" * .+"),
-    )
-
-    def __init__(self, interval):
-        self.interval = interval
-
-        self.buffer = []
-        self.counter = 0
+def rclone_parse_log_line(line):
+    """
+    Parses a line of `rclone --use-json-log` output.
 
-    def notify(self, line):
-        if self.buffer:
-            # We are currently reading progress message
-
-            self.buffer.append(line)
+    Returns the message formatted the way rclone formats its plain text log and the `stats` object if the line is a
+    progress report (`None` otherwise).
+    """
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        entry = None
 
-            if line.rstrip("\n"):
-                # We are still reading message
+    if not isinstance(entry, dict) or "msg" not in entry:
+        # Output that does not come from rclone logger (e.g. Go runtime panic)
+        return line, None
 
-                matches = any(prefix.match(line) for prefix in self.PREFIXES)
+    text = entry["msg"]
+    if entry.get("object"):
+        text = f"{entry['object']}: {text}"
 
-                if matches:
-                    # Good, consuming this line to buffer and yet not writing it to logs
-                    return None
-                else:
-                    # This was unexpected form of progress message (or not a progress message at all)
-
-                    new_buffer = []
-                    if self.PREFIXES[0].match(line):
-                        # This line can be start of new progress message, ejecting it from buffer
-                        self.buffer = self.buffer[:-1]
-                        # And adding to new buffer
-                        new_buffer = [line]
-
-                    # Writing buffer to logs
-                    try:
-                        return self.flush()
-                    finally:
-                        self.buffer = new_buffer
-            else:
-                # This message ends with newline
-                try:
-                    if self.counter % self.interval == 0:
-                        # Every {counter} times we still write this buffer to logs
-                        return "".join(self.buffer)
-                    else:
-                        return None
-                finally:
-                    # Resetting state, ready to consume next line
-                    self.buffer = []
-                    self.counter += 1
+    try:
+        timestamp = datetime.fromisoformat(entry["time"]).strftime("%Y/%m/%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        timestamp = entry.get("time", "")
+
+    return f"{timestamp} {entry.get('level', '').upper():<6}: {text.rstrip()}\n", entry.get("stats")
+
+
+def rclone_stats_progress(stats):
+    """
+    Maps rclone `stats` object to job progress percent, description and extra.
+    """
+    percents = []
+    description = []
+    for key, total_key, name in [
+        ("bytes", "totalBytes", None),
+        ("transfers", "totalTransfers", "transfers"),
+        ("checks", "totalChecks", "checks"),
+    ]:
+        done = stats.get(key) or 0
+        total = stats.get(total_key) or 0
+        if not total:
+            continue
+
+        percents.append(int(done / total * 100))
+        if name is None:
+            description.append(f"{format_size(done)} / {format_size(total)}")
+            if stats.get("speed"):
+                description.append(f"{format_size(stats['speed'])}/s")
+            if stats.get("eta") is not None:
+                description.append(f"ETA {humanfriendly.format_timespan(stats['eta'])}")
         else:
-            # We are not reading progress message
+            description.append(f"{name}: {done} / {total}")
 
-            if self.PREFIXES[0].match(line):
-                # This is the first line of progress message
-                self.buffer.append(line)
-                return None
-            else:
-                return line
+    extra = {
+        "bytes": stats.get("bytes"),
+        "total_bytes": stats.get("totalBytes"),
+        "speed": stats.get("speed"),
+        "eta": stats.get("eta"),
+        "transfers": stats.get("transfers"),
+        "total_transfers": stats.get("totalTransfers"),
+        "checks": stats.get("checks"),
+        "total_checks": stats.get("totalChecks"),
+        "errors": stats.get("errors"),
+        "elapsed_time": stats.get("elapsedTime"),
+    }
 
-    def flush(self):
-        try:
-            return "".join(self.buffer)
-        finally:
-            self.buffer = []
+    return min(percents) if percents else None, ", ".join(description), extra
 
 
 async def rclone_check_progress(job, proc):
-    cutter = RcloneVerboseLogCutter(300)
     dropbox__restricted_content = False
-    try:
-        progress1 = None
-        transferred1 = None
-        progress2 = None
-        transferred2 = None
-        progress3 = None
-        checks = None
-        while True:
-            read = (await proc.stdout.readline()).decode("utf-8", "ignore")
-            if read == "":
-                break
-
-            job.internal_data.setdefault("messages", [])
-            job.internal_data["messages"] = job.internal_data["messages"][-4:] + [read]
-
-            if "failed to open source object: path/restricted_content/" in read:
-                job.internal_data["dropbox__restricted_content"] = True
-                dropbox__restricted_content = True
-
-            result = cutter.notify(read)
-            if result:
-                await job.logs_fd_write(result.encode("utf-8", "ignore"))
-
-            if reg := RE_TRANSF1.search(read):
-                progress1 = int(reg.group("progress"))
-                transferred1 = reg.group("progress_1")
-            if reg := RE_TRANSF2.search(read):
-                progress2 = int(reg.group("progress"))
-                transferred2 = reg.group("progress_1") + reg.group("progress_2")
-            if reg := RE_CHECKS.search(read):
-                progress3 = int(reg.group("progress"))
-                checks = f'checks: {reg.group("checks")}'
-
-            progresses = list(filter(lambda v: v is not None, [progress1, progress2, progress3]))
-            if progresses:
-                job.set_progress(min(progresses), ', '.join(filter(None, [transferred1, transferred2, checks])))
-    finally:
-        result = cutter.flush()
-        if result:
-            await job.logs_fd_write(result.encode("utf-8", "ignore"))
+    stats_count = 0
+    while True:
+        read = (await proc.stdout.readline()).decode("utf-8", "ignore")
+        if read == "":
+            break
+
+        message, stats = rclone_parse_log_line(read)
+
+        if stats is not None:
+            if stats_count % RCLONE_STATS_LOG_INTERVAL == 0:
+                await job.logs_fd_write(message.encode("utf-8", "ignore"))
+            stats_count += 1
+
+            job.set_progress(*rclone_stats_progress(stats))
+            continue
+
+        job.internal_data.setdefault("messages", [])
+        job.internal_data["messages"] = job.internal_data["messages"][-4:] + [message]
+
+        if "failed to open source object: path/restricted_content/" in message:
+            job.internal_data["dropbox__restricted_content"] = True
+            dropbox__restricted_content = True
+
+        await job.logs_fd_write(message.encode("utf-8", "ignore"))
 
     if dropbox__restricted_content:
         message = (
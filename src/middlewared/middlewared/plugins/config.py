@@ -38,12 +38,14 @@ class ConfigService(Service):
 
     @private
     def save_db_only(self, options, job):
+        self.middleware.call_sync('datastore.checkpoint')
         with open(FREENAS_DATABASE, 'rb') as f:
             shutil.copyfileobj(f, job.pipes.output.w)
 
     @private
     def save_tar_file(self, options, job):
         with tempfile.NamedTemporaryFile(delete=True) as ntf:
+            self.middleware.call_sync('datastore.checkpoint')
             with tarfile.open(ntf.name, 'w') as tar:
                 files = {'freenas-v1.db': FREENAS_DATABASE}
                 if options['secretseed']:
@@ -251,7 +253,9 @@ class ConfigService(Service):
         cjob.wait_sync()
 
         job.set_progress(15, 'Replacing database file')
-        shutil.copy('/data/factory-v1.db', FREENAS_DATABASE)
+        factory_database = f'{FREENAS_DATABASE}.factory'
+        shutil.copy('/data/factory-v1.db', factory_database)
+        self.middleware.call_sync('datastore.replace', factory_database)
 
         job.set_progress(25, 'Running database upload hooks')
         self.middleware.call_hook_sync('config.on_upload', FREENAS_DATABASE)
@@ -314,4 +318,5 @@ class ConfigService(Service):
         if not os.path.exists(dirname):
             os.makedirs(dirname)
 
+        self.middleware.call_sync('datastore.checkpoint')
         shutil.copy(FREENAS_DATABASE, newfile)
@@ -1,8 +1,11 @@
+import copy
 import datetime
 import dateutil
-import dateutil.parser
+import dateutil.tz
+import hashlib
 import logging
 import re
+import threading
 
 from contextlib import suppress
 from cryptography.hazmat.backends import default_backend
@@ -17,61 +20,106 @@ from .utils import RE_CERTIFICATE
 logger = logging.getLogger(__name__)
 
 
-def parse_cert_date_string(date_value: str) -> str:
-    t1 = dateutil.parser.parse(date_value)
-    t2 = t1.astimezone(dateutil.tz.tzlocal())
-    return t2.ctime()
+CERTIFICATE_CACHE_SIZE = 1024
+certificate_cache = {}
+certificate_cache_lock = threading.Lock()
+
+
+def parse_cert_date(date_value: datetime.datetime) -> str:
+    # `cryptography` returns naive datetime objects in UTC
+    return date_value.replace(tzinfo=datetime.timezone.utc).astimezone(dateutil.tz.tzlocal()).ctime()
 
 
 def load_certificate(certificate: str, get_issuer: bool = False) -> dict:
+    # Certificates are parsed only once, only the attributes depending on current time (and timezone) are computed
+    # each time
+    cert_info = parse_certificate(certificate)
+    if cert_info is None:
+        return {}
+
+    cert_info = copy.deepcopy(cert_info)
+    not_valid_before = cert_info.pop('not_valid_before')
+    not_valid_after = cert_info.pop('not_valid_after')
+    if not get_issuer:
+        cert_info.pop('issuer_dn')
+
     try:
-        # digest_algorithm, lifetime, country, state, city, organization, organizational_unit,
-        # email, common, san, serial, chain, fingerprint
-        cert = crypto.load_certificate(crypto.FILETYPE_PEM, certificate)
-        from_date = parse_cert_date_string(cert.get_notBefore())
-        until_date = parse_cert_date_string(cert.get_notAfter())
-        expired = datetime.datetime.now() > datetime.datetime.strptime(
-            parse_cert_date_string(cert.get_notAfter()), '%a %b %d %H:%M:%S %Y'
-        )
-    except (crypto.Error, OverflowError):
+        cert_info.update({
+            'from': parse_cert_date(not_valid_before),
+            'until': parse_cert_date(not_valid_after),
+        })
+    except OverflowError:
         # Overflow error is raised when the certificate has a lifetime which will never expire
         # and we don't support such certificates
         return {}
-    else:
-        cert_info = get_x509_subject(cert)
-        if get_issuer:
-            cert_info['issuer_dn'] = parse_name_components(cert.get_issuer()) if cert.get_issuer() else None
-
-        valid_algos = ('SHA1', 'SHA224', 'SHA256', 'SHA384', 'SHA512', 'ED25519')
-        signature_algorithm = cert.get_signature_algorithm().decode()
-        # Certs signed with RSA keys will have something like
-        # sha256WithRSAEncryption
-        # Certs signed with EC keys will have something like
-        # ecdsa-with-SHA256
-        m = re.match('^(.+)[Ww]ith', signature_algorithm)
-        if m:
-            cert_info['digest_algorithm'] = m.group(1).upper()
-
-        if cert_info.get('digest_algorithm') not in valid_algos:
-            cert_info['digest_algorithm'] = (signature_algorithm or '').split('-')[-1].strip()
-
-        if cert_info['digest_algorithm'] not in valid_algos:
-            # Let's log this please
-            logger.debug(f'Failed to parse signature algorithm {signature_algorithm} for {certificate}')
 
-        cert_info.update({
-            'lifetime': (
-                dateutil.parser.parse(cert.get_notAfter()) - dateutil.parser.parse(cert.get_notBefore())
-            ).days,
-            'from': from_date,
-            'until': until_date,
-            'serial': cert.get_serial_number(),
-            'chain': len(RE_CERTIFICATE.findall(certificate)) > 1,
-            'fingerprint': cert.digest('sha1').decode(),
-            'expired': expired,
-        })
+    cert_info['expired'] = datetime.datetime.utcnow() > not_valid_after
+    return cert_info
+
+
+def parse_certificate(certificate: str) -> Optional[dict]:
+    """
+    Returns the attributes of `certificate` which do not change over time or `None` if it cannot be parsed.
+    Results are cached by the hash of the certificate so that querying certificates does not parse them over
+    and over again.
+    """
+    key = hashlib.sha256(certificate.encode()).digest()
+    with certificate_cache_lock:
+        if key in certificate_cache:
+            return certificate_cache[key]
+
+    cert_info = parse_certificate_impl(certificate)
+
+    with certificate_cache_lock:
+        certificate_cache[key] = cert_info
+        while len(certificate_cache) > CERTIFICATE_CACHE_SIZE:
+            # Evict the least recently added certificate
+            certificate_cache.pop(next(iter(certificate_cache)))
+
+    return cert_info
 
-        return cert_info
+
+def parse_certificate_impl(certificate: str) -> Optional[dict]:
+    try:
+        # digest_algorithm, lifetime, country, state, city, organization, organizational_unit,
+        # email, common, san, serial, chain, fingerprint
+        cert = crypto.load_certificate(crypto.FILETYPE_PEM, certificate)
+        crypto_cert = cert.to_cryptography()
+        not_valid_before = crypto_cert.not_valid_before
+        not_valid_after = crypto_cert.not_valid_after
+    except (crypto.Error, ValueError):
+        return None
+
+    cert_info = get_x509_subject(cert)
+    cert_info['issuer_dn'] = parse_name_components(cert.get_issuer()) if cert.get_issuer() else None
+
+    valid_algos = ('SHA1', 'SHA224', 'SHA256', 'SHA384', 'SHA512', 'ED25519')
+    signature_algorithm = cert.get_signature_algorithm().decode()
+    # Certs signed with RSA keys will have something like
+    # sha256WithRSAEncryption
+    # Certs signed with EC keys will have something like
+    # ecdsa-with-SHA256
+    m = re.match('^(.+)[Ww]ith', signature_algorithm)
+    if m:
+        cert_info['digest_algorithm'] = m.group(1).upper()
+
+    if cert_info.get('digest_algorithm') not in valid_algos:
+        cert_info['digest_algorithm'] = (signature_algorithm or '').split('-')[-1].strip()
+
+    if cert_info['digest_algorithm'] not in valid_algos:
+        # Let's log this please
+        logger.debug(f'Failed to parse signature algorithm {signature_algorithm} for {certificate}')
+
+    cert_info.update({
+        'lifetime': (not_valid_after - not_valid_before).days,
+        'not_valid_before': not_valid_before,
+        'not_valid_after': not_valid_after,
+        'serial': cert.get_serial_number(),
+        'chain': len(RE_CERTIFICATE.findall(certificate)) > 1,
+        'fingerprint': cert.digest('sha1').decode(),
+    })
+
+    return cert_info
 
 
 def get_x509_subject(obj: Union[crypto.X509, crypto.X509Req]) -> dict:
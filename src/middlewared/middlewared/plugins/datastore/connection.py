@@ -1,23 +1,43 @@
 from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import functools
+import itertools
+import os
 import re
 import shutil
+import threading
 import time
 
 from sqlalchemy import create_engine
 
-from middlewared.service import private, Service
+from middlewared.service import CallError, private, Service, threaded
 
 from middlewared.plugins.config import FREENAS_DATABASE
 
+READ_POOL_SIZE = 4
+# Each attempt waits for the readers for up to the SQLite busy timeout
+CHECKPOINT_ATTEMPTS = 3
+# Seconds to wait for the queries that are being run to finish before the database file can be replaced
+READ_POOL_QUIESCE_TIMEOUT = 60
+
+# All writes (and everything else that is not explicitly marked otherwise) are serialized through a single writer
+# thread, reads are served by a small pool of read-only connections. The database is in WAL mode so readers are never
+# blocked by an open write transaction.
 thread_pool = ThreadPoolExecutor(1)
+read_thread_pool = ThreadPoolExecutor(READ_POOL_SIZE, thread_name_prefix='datastore_read')
+read_generations = itertools.count(1)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_regexp(expr):
+    return re.compile(expr, re.I)
 
 
 def regexp(expr, item):
     if item is None:
         return False
 
-    reg = re.compile(expr, re.I)
-    return reg.search(item) is not None
+    return compile_regexp(expr).search(item) is not None
 
 
 class DatastoreService(Service):
@@ -28,6 +48,9 @@ class DatastoreService(Service):
 
     engine = None
     connection = None
+    read_engine = None
+    read_generation = 0
+    read_local = threading.local()
 
     @private
     def handle_constraint_violation(self, row, journal):
@@ -68,6 +91,7 @@ class DatastoreService(Service):
         self.connection = self.engine.connect()
         self.connection.connection.create_function("REGEXP", 2, regexp)
 
+        self.connection.connection.execute("PRAGMA journal_mode=WAL")
         self.connection.connection.execute("PRAGMA foreign_keys=ON")
 
         if (constraint_violations := self.connection.execute("PRAGMA foreign_key_check").fetchall()):
@@ -79,10 +103,135 @@ class DatastoreService(Service):
                     self.handle_constraint_violation(row, f)
 
         self.connection.connection.execute("VACUUM")
+        self._checkpoint()
+
+        # Reader threads will notice the generation change and reopen their connections on the next query
+        self.read_generation = next(read_generations)
+        if self.read_engine is not None:
+            self.read_engine.dispose()
+
+        if FREENAS_DATABASE == ':memory:':
+            # In-memory database can't be shared between connections
+            self.read_engine = None
+        else:
+            self.read_engine = create_engine(f'sqlite:///file:{FREENAS_DATABASE}?mode=ro&uri=true')
+
+        self.middleware.call_sync('core.config_cache_invalidate')
+
+    @private
+    def checkpoint(self):
+        """
+        Move all committed transactions into the main database file so that it can be copied as is (configuration
+        backup, HA database replication). Must be called before copying the database file.
+        """
+        if self.read_engine is None:
+            return
+
+        for i in range(CHECKPOINT_ATTEMPTS):
+            busy = self.connection.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+            if not busy:
+                return
+
+            self.logger.debug("Database checkpoint attempt %d was blocked by readers", i + 1)
+
+        raise CallError("Unable to checkpoint the database: it is being read")
+
+    def _checkpoint(self):
+        # Opportunistically move committed transactions into the main database file to keep the WAL small. This does
+        # not wait for (and does not block) the readers, so it may leave some transactions in the WAL.
+        if not self.connection.connection.in_transaction:
+            self.connection.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    @private
+    def replace(self, path):
+        """
+        Replace the database file with `path` (the file is moved) and reopen the database.
+
+        The database file can't be replaced while it is open: the WAL and the shared memory index of the previous
+        database would be applied to the new one. All the connections are closed and the WAL files are removed first.
+        """
+        with self._read_connections_closed():
+            if self.read_engine is not None:
+                self.read_engine.dispose()
+                self.read_engine = None
+
+            if self.connection.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]:
+                raise CallError("Unable to checkpoint the database: it is being used")
+
+            self.connection.close()
+            self.connection = None
+            self.engine.dispose()
+            self.engine = None
+
+            for suffix in ('-wal', '-shm'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(f'{FREENAS_DATABASE}{suffix}')
+
+            os.rename(path, FREENAS_DATABASE)
+
+            self.setup()
+
+    @contextlib.contextmanager
+    def _read_connections_closed(self):
+        # Make every reader thread close its connection and then wait (instead of serving queries) until we are done
+        if self.read_engine is None:
+            yield
+            return
+
+        barrier = threading.Barrier(READ_POOL_SIZE + 1)
+        resume = threading.Event()
+
+        def close():
+            self._close_read_connection()
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+
+            resume.wait()
+
+        for i in range(READ_POOL_SIZE):
+            read_thread_pool.submit(close)
+
+        try:
+            try:
+                barrier.wait(READ_POOL_QUIESCE_TIMEOUT)
+            except threading.BrokenBarrierError:
+                raise CallError("Timed out waiting for the database queries to finish")
+
+            yield
+        finally:
+            resume.set()
+
+    def _close_read_connection(self):
+        local = self.read_local
+        if getattr(local, 'connection', None) is not None:
+            local.connection.close()
+            local.connection = None
+            local.generation = None
+
+    def _read_connection(self):
+        if self.read_engine is None:
+            return self.connection
+
+        local = self.read_local
+        if getattr(local, 'generation', None) != self.read_generation:
+            if getattr(local, 'connection', None) is not None:
+                local.connection.close()
+
+            local.connection = self.read_engine.connect()
+            local.connection.connection.create_function("REGEXP", 2, regexp)
+            local.generation = self.read_generation
+
+        return local.connection
 
     @private
     def execute(self, *args):
-        return self.connection.execute(*args)
+        result = self.connection.execute(*args)
+        self._checkpoint()
+        # We don't know which tables were affected by the raw SQL query
+        self.middleware.call_sync('core.config_cache_invalidate')
+        return result
 
     @private
     def execute_write(self, stmt, options=None):
@@ -90,9 +239,47 @@ class DatastoreService(Service):
         options.setdefault('ha_sync', True)
         options.setdefault('return_last_insert_rowid', False)
 
+        sql, binds = self._compile(stmt)
+
+        result = self.connection.execute(sql, binds)
+
+        self.middleware.call_hook_inline("datastore.post_execute_write", sql, binds, options)
+
+        if options['return_last_insert_rowid']:
+            # `last_insert_rowid()` is per-connection so it must be queried using the writer connection
+            result = self.connection.execute("SELECT last_insert_rowid()").fetchall()[0][0]
+
+        self._checkpoint()
+
+        return result
+
+    @private
+    def execute_write_many(self, stmts, options=None):
+        """
+        Executes all `stmts` within a single transaction. If any of them fails (or an UPDATE/DELETE statement does not
+        match exactly one row), the whole transaction is rolled back.
+        """
+        options = options or {}
+        options.setdefault('ha_sync', True)
+
+        executed = []
+        with self.connection.begin():
+            for stmt in stmts:
+                sql, binds = self._compile(stmt)
+                result = self.connection.execute(sql, binds)
+                if (stmt.is_update or stmt.is_delete) and result.rowcount != 1:
+                    raise RuntimeError(f'{result.rowcount} rows were affected, expecting one')
+
+                executed.append((sql, binds))
+
+        for sql, binds in executed:
+            self.middleware.call_hook_inline("datastore.post_execute_write", sql, binds, options)
+
+        self._checkpoint()
+
+    def _compile(self, stmt):
         compiled = stmt.compile(self.engine, compile_kwargs={"render_postcompile": True})
 
-        sql = compiled.string
         binds = []
         for param in compiled.positiontup:
             bind = compiled.binds[param]
@@ -103,18 +290,12 @@ class DatastoreService(Service):
             else:
                 binds.append(value)
 
-        result = self.connection.execute(sql, binds)
-
-        self.middleware.call_hook_inline("datastore.post_execute_write", sql, binds, options)
-
-        if options['return_last_insert_rowid']:
-            return self.fetchall("SELECT last_insert_rowid()")[0][0]
-
-        return result
+        return compiled.string, binds
 
     @private
+    @threaded(read_thread_pool)
     def fetchall(self, query, params=None):
-        cursor = self.connection.execute(query, params or [])
+        cursor = self._read_connection().execute(query, params or [])
         try:
             return cursor.fetchall()
         finally:
@@ -51,6 +51,20 @@ class DatastoreService(Service):
                 fields=fields[0],
             )
 
+    async def send_bulk_update_events(self, datastore, ids):
+        """
+        Same as calling `send_update_events` for each of the `ids` but only queries the plugin once.
+        """
+        for options in self.events[datastore]:
+            query_options = {}
+            if options.get("extra"):
+                query_options["extra"] = options["extra"]
+
+            for row in await self.middleware.call(
+                f"{options['plugin']}.query", [[options["id"], "in", list(ids)]], query_options,
+            ):
+                await self._send_event(options, "CHANGED", id=row[options["id"]], fields=row)
+
     async def send_delete_events(self, datastore, id):
         for options in self.events[datastore]:
             await self._send_event(options, "REMOVED", id=id)
@@ -1,40 +1,95 @@
 import operator
 
+from sqlalchemy import bindparam
+
 from .schema import SchemaMixin
 
 
-def in_(col, value):
+def in_(col, value, bind):
     has_nulls = None in value
     value = [v for v in value if v is not None]
-    expr = col.in_(value)
+    expr = col.in_(bind(value, expanding=True))
     if has_nulls:
         expr = expr | (col == None)  # noqa
     return expr
 
 
-def nin(col, value):
+def nin(col, value, bind):
     has_nulls = None in value
     value = [v for v in value if v is not None]
-    expr = ~col.in_(value)
+    expr = ~col.in_(bind(value, expanding=True))
     if has_nulls:
         expr = expr & (col != None)  # noqa
     return expr
 
 
+def binary(op):
+    return lambda col, value, bind: op(col, bind(value))
+
+
+class FilterBinds:
+    """
+    Replaces filter values with bound parameters so that the resulting statement only depends on the filters shape
+    (and can therefore be cached and reused). Values are collected into `params`.
+    """
+
+    def __init__(self):
+        self.params = {}
+
+    def __call__(self, value, expanding=False):
+        if value is None:
+            # `col == None` must be rendered as `col IS NULL`, so this value is a part of the filters shape
+            return value
+
+        name = f'param_{len(self.params)}'
+        self.params[name] = value
+        return bindparam(name, expanding=expanding)
+
+
+def literal_bind(value, expanding=False):
+    return value
+
+
+def filters_shape(filters, bind):
+    """
+    Returns a hashable representation of `filters` that does not include filter values (except for the ones that
+    affect the generated SQL, see `FilterBinds`). Values are passed to `bind` in the same order
+    `FilterMixin._filters_to_queryset` does that.
+    """
+    shape = []
+    for f in filters:
+        if not isinstance(f, (list, tuple)):
+            raise ValueError('Filter must be a list or tuple: {0}'.format(f))
+        if len(f) == 3:
+            name, op, value = f
+            if op in ('in', 'nin'):
+                bind([v for v in value if v is not None], expanding=True)
+                shape.append((name, op, None in value))
+            else:
+                bind(value)
+                shape.append((name, op, value is None))
+        elif len(f) == 2:
+            op, value = f
+            shape.append((op, filters_shape(value, bind)))
+        else:
+            raise ValueError('Invalid filter {0}'.format(f))
+    return tuple(shape)
+
+
 class FilterMixin(SchemaMixin):
-    def _filters_to_queryset(self, filters, table, prefix, aliases):
+    def _filters_to_queryset(self, filters, table, prefix, aliases, bind=literal_bind):
         opmap = {
-            '=': operator.eq,
-            '!=': operator.ne,
-            '>': operator.gt,
-            '>=': operator.ge,
-            '<': operator.lt,
-            '<=': operator.le,
-            '~': lambda col, value: col.op('regexp')(value),
+            '=': binary(operator.eq),
+            '!=': binary(operator.ne),
+            '>': binary(operator.gt),
+            '>=': binary(operator.ge),
+            '<': binary(operator.lt),
+            '<=': binary(operator.le),
+            '~': lambda col, value, bind: col.op('regexp')(bind(value)),
             'in': in_,
             'nin': nin,
-            '^': lambda col, value: col.startswith(value),
-            '$': lambda col, value: col.endswith(value),
+            '^': lambda col, value, bind: col.startswith(bind(value)),
+            '$': lambda col, value, bind: col.endswith(bind(value)),
         }
 
         rv = []
@@ -53,13 +108,13 @@ class FilterMixin(SchemaMixin):
                 if op not in opmap:
                     raise ValueError('Invalid operation: {0}'.format(op))
 
-                q = opmap[op](col, value)
+                q = opmap[op](col, value, bind)
                 rv.append(q)
             elif len(f) == 2:
                 op, value = f
                 if op == 'OR':
                     or_value = None
-                    for value in self._filters_to_queryset(value, table, prefix, aliases):
+                    for value in self._filters_to_queryset(value, table, prefix, aliases, bind):
                         if or_value is None:
                             or_value = value
                         else:
@@ -1,5 +1,4 @@
 from collections import defaultdict
-import re
 
 from sqlalchemy import and_, func, select
 from sqlalchemy.sql import Alias
@@ -12,13 +11,11 @@ from middlewared.service import Service
 from middlewared.service_exception import MatchNotFound
 from middlewared.validators import QueryFilters
 
-from .filter import FilterMixin
+from .filter import FilterBinds, FilterMixin, filters_shape
 from .schema import SchemaMixin
 
 
-def regexp(expr, item):
-    reg = re.compile(expr, re.I)
-    return reg.search(item) is not None
+STATEMENT_CACHE_SIZE = 1024
 
 
 class DatastoreService(Service, FilterMixin, SchemaMixin):
@@ -26,6 +23,8 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
     class Config:
         private = True
 
+    statements = {}
+
     @accepts(
         Str('name'),
         List('query-filters', items=[List('query-filter')], validators=[QueryFilters()], register=True),
@@ -83,6 +82,63 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
         # which might happen with "prefix"
         options = options.copy()
 
+        qs, aliases, params = self._get_statement(table, filters, options)
+
+        if options['count']:
+            return (await self.middleware.call("datastore.fetchall", qs, params))[0][0]
+
+        result = await self.middleware.call("datastore.fetchall", qs, params)
+
+        relationships = [{} for row in result]
+        if options['relationships']:
+            # This will only fetch many-to-many relationships for primary table, not for joins, but that's enough
+            relationships = await self._fetch_many_to_many(table, result)
+
+        result = await self._queryset_serialize(
+            result,
+            table, aliases, relationships, options['extend'], options['extend_context'], options['prefix'],
+            options['select'], options['extra'],
+        )
+
+        if options['get']:
+            try:
+                return result[0]
+            except IndexError:
+                raise MatchNotFound() from None
+
+        return result
+
+    @accepts(Str('name'), Ref('query-options'))
+    async def config(self, name, options):
+        """
+        Get configuration settings object for a given `name`.
+
+        This is a shortcut for `query(name, {"get": true})`.
+        """
+        options['get'] = True
+        return await self.query(name, [], options)
+
+    def _get_statement(self, table, filters, options):
+        """
+        Statements only depend on the table, filters shape and query options (filter values are passed as bound
+        parameters) so they are built (and then compiled by SQLAlchemy) once and reused for subsequent queries.
+        """
+        binds = FilterBinds()
+        key = (
+            table, filters_shape(filters, binds), options['relationships'], options['count'], options['prefix'],
+            tuple(options['order_by']), options['offset'], options['limit'],
+        )
+        try:
+            qs, aliases = self.statements[key]
+        except KeyError:
+            qs, aliases = self._build_statement(table, filters, options)
+            if len(self.statements) >= STATEMENT_CACHE_SIZE:
+                self.statements.pop(next(iter(self.statements)))
+            self.statements[key] = qs, aliases
+
+        return qs, aliases, binds.params
+
+    def _build_statement(self, table, filters, options):
         aliases = {}
         if options['count']:
             qs = select([func.count(self._get_pk(table))])
@@ -100,10 +156,10 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
         prefix = options['prefix']
 
         if filters:
-            qs = qs.where(and_(*self._filters_to_queryset(filters, table, prefix, aliases)))
+            qs = qs.where(and_(*self._filters_to_queryset(filters, table, prefix, aliases, FilterBinds())))
 
         if options['count']:
-            return (await self.middleware.call("datastore.fetchall", qs))[0][0]
+            return qs, aliases
 
         order_by = options['order_by']
         if order_by:
@@ -155,36 +211,7 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
         if options['limit']:
             qs = qs.limit(options['limit'])
 
-        result = await self.middleware.call("datastore.fetchall", qs)
-
-        relationships = [{} for row in result]
-        if options['relationships']:
-            # This will only fetch many-to-many relationships for primary table, not for joins, but that's enough
-            relationships = await self._fetch_many_to_many(table, result)
-
-        result = await self._queryset_serialize(
-            result,
-            table, aliases, relationships, options['extend'], options['extend_context'], options['prefix'],
-            options['select'], options['extra'],
-        )
-
-        if options['get']:
-            try:
-                return result[0]
-            except IndexError:
-                raise MatchNotFound() from None
-
-        return result
-
-    @accepts(Str('name'), Ref('query-options'))
-    async def config(self, name, options):
-        """
-        Get configuration settings object for a given `name`.
-
-        This is a shortcut for `query(name, {"get": true})`.
-        """
-        options['get'] = True
-        return await self.query(name, [], options)
+        return qs, aliases
 
     def _get_queryset_joins(self, table):
         result = {}
@@ -1,7 +1,7 @@
 from sqlalchemy import and_, types
 from sqlalchemy.sql import sqltypes
 
-from middlewared.schema import accepts, Any, Bool, Dict, Str
+from middlewared.schema import accepts, Any, Bool, Dict, List, Str
 from middlewared.service import Service
 
 from .filter import FilterMixin
@@ -49,13 +49,7 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
         """
         table = self._get_table(name)
         insert, relationships = self._extract_relationships(table, options['prefix'], data)
-
-        for column in table.c:
-            if column.default is not None:
-                insert.setdefault(column.name, column.default.arg)
-            if not column.nullable:
-                if isinstance(column.type, (types.String, types.Text)):
-                    insert.setdefault(column.name, '')
+        self._insert_defaults(table, insert)
 
         pk_column = self._get_pk(table)
         return_last_insert_rowid = type(pk_column.type) == sqltypes.Integer
@@ -74,6 +68,8 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
 
         await self._handle_relationships(pk, relationships)
 
+        await self.middleware.call('core.config_cache_invalidate', name)
+
         if options['send_events']:
             await self.middleware.call('datastore.send_insert_events', name, insert)
 
@@ -129,8 +125,70 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
 
         await self._handle_relationships(id, relationships)
 
+        await self.middleware.call('core.config_cache_invalidate', name)
+
         return id
 
+    @accepts(
+        Str('name'),
+        Dict(
+            'operations',
+            List('insert', items=[Dict('data', additional_attrs=True)]),
+            List('update', items=[List('id_and_data', items=[Any('item')])]),
+            List('delete', items=[Any('id')]),
+        ),
+        Dict(
+            'options',
+            Bool('ha_sync', default=True),
+            Str('prefix', default=''),
+        ),
+    )
+    async def bulk_write(self, name, operations, options):
+        """
+        Delete (ids), update (`[id, data]` pairs) and insert multiple entries in `name` (in that order) within a
+        single database transaction. Either all the operations succeed or none of them is applied.
+
+        Relationships are not supported and no events are sent, it is the callers responsibility to emit them
+        after the operations are complete.
+        """
+        table = self._get_table(name)
+        stmts = []
+
+        for id in operations['delete']:
+            stmts.append(table.delete().where(self._get_pk(table) == id))
+
+        for id, data in operations['update']:
+            update = self._extract_columns(table, options['prefix'], data)
+            if update:
+                stmts.append(table.update().values(**update).where(self._get_pk(table) == id))
+
+        for data in operations['insert']:
+            insert = self._extract_columns(table, options['prefix'], data)
+            self._insert_defaults(table, insert)
+            stmts.append(table.insert().values(**insert))
+
+        if not stmts:
+            return
+
+        await self.middleware.call('datastore.execute_write_many', stmts, {'ha_sync': options['ha_sync']})
+
+        await self.middleware.call('core.config_cache_invalidate', name)
+
+    def _extract_columns(self, table, prefix, data):
+        columns, relationships = self._extract_relationships(table, prefix, data)
+        if relationships:
+            raise ValueError('Relationships are not supported')
+
+        return columns
+
+    def _insert_defaults(self, table, insert):
+        for column in table.c:
+            if column.default is not None:
+                insert.setdefault(column.name, column.default.arg)
+            if not column.nullable:
+                if isinstance(column.type, (types.String, types.Text)):
+                    insert.setdefault(column.name, '')
+
     def _extract_relationships(self, table, prefix, data):
         relationships = self._get_relationships(table)
 
@@ -197,6 +255,8 @@ class DatastoreService(Service, FilterMixin, SchemaMixin):
             },
         )
 
+        await self.middleware.call('core.config_cache_invalidate', name)
+
         if not isinstance(id_or_filters, list) and options['send_events']:
             await self.middleware.call('datastore.send_delete_events', name, id_or_filters)
 
@@ -5,6 +5,35 @@ import pyudev
 from middlewared.service import CallError, private, Service
 
 
+def label_to_dev(label):
+    dev = os.path.realpath(os.path.join('/dev', label)).split('/')[-1]
+    if dev == label and os.path.exists(os.path.join('/sys/block', label)):
+        # This is to cater for a case where `label` is a complete disk
+        # instead of something like disk/by-partuuid/some-uuid-here
+        return dev
+    else:
+        return dev if dev != label.split('/')[-1] else None
+
+
+def label_to_disk(label):
+    part_disk = label_to_dev(label)
+    if part_disk == label:
+        return label
+    else:
+        return get_disk_from_partition(part_disk) if part_disk else None
+
+
+def get_disk_from_partition(part_name):
+    if not os.path.exists(os.path.join('/dev', part_name)):
+        return None
+    with open(os.path.join('/sys/class/block', part_name, 'partition'), 'r') as f:
+        part_num = f.read().strip()
+    if part_name.startswith(('nvme', 'pmem')):
+        # nvme/pmem partitions would be like nvmen1p1 where disk is nvmen1
+        part_num = f'p{part_num}'
+    return part_name.rsplit(part_num, 1)[0].strip()
+
+
 class DiskService(Service):
 
     @private
@@ -105,32 +134,15 @@ class DiskService(Service):
 
     @private
     def label_to_dev(self, label, *args):
-        dev = os.path.realpath(os.path.join('/dev', label)).split('/')[-1]
-        if dev == label and os.path.exists(os.path.join('/sys/block', label)):
-            # This is to cater for a case where `label` is a complete disk
-            # instead of something like disk/by-partuuid/some-uuid-here
-            return dev
-        else:
-            return dev if dev != label.split('/')[-1] else None
+        return label_to_dev(label)
 
     @private
     def label_to_disk(self, label, *args):
-        part_disk = self.label_to_dev(label)
-        if part_disk == label:
-            return label
-        else:
-            return self.get_disk_from_partition(part_disk) if part_disk else None
+        return label_to_disk(label)
 
     @private
     def get_disk_from_partition(self, part_name):
-        if not os.path.exists(os.path.join('/dev', part_name)):
-            return None
-        with open(os.path.join('/sys/class/block', part_name, 'partition'), 'r') as f:
-            part_num = f.read().strip()
-        if part_name.startswith(('nvme', 'pmem')):
-            # nvme/pmem partitions would be like nvmen1p1 where disk is nvmen1
-            part_num = f'p{part_num}'
-        return part_name.rsplit(part_num, 1)[0].strip()
+        return get_disk_from_partition(part_name)
 
     @private
     def get_partition_for_disk(self, disk, partition):
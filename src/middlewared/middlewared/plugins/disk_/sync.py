@@ -2,6 +2,7 @@ import re
 import errno
 from datetime import datetime, timedelta
 
+from middlewared.plugins.enclosure import map_disks_to_slots
 from middlewared.schema import accepts, Bool, Dict, Str
 from middlewared.service import job, private, Service, ServiceChangeMixin
 from middlewared.service_exception import CallError
@@ -137,14 +138,15 @@ class DiskService(Service, ServiceChangeMixin):
         db_disks = self.middleware.call_sync('datastore.query', 'storage.disk', [], {'order_by': ['disk_expiretime']})
 
         uuids = self.middleware.call_sync('disk.get_valid_zfs_partition_type_uuids')
-        options = {'send_events': False, 'ha_sync': False}
         seen_disks = {}
-        changed = set()
+        # All the database changes are collected here and written in a single transaction at the end
+        updates = {}
+        inserts = []
         deleted = set()
         dif_formatted_disks = []
         increment = round((40 - 20) / number_of_disks, 3)  # 20% of the total percentage
         progress_percent = 40
-        encs = self.middleware.call_sync('enclosure.query')
+        enclosure_slots = map_disks_to_slots(self.middleware.call_sync('enclosure.query'))
         for idx, disk in enumerate(db_disks, start=1):
             progress_percent += increment
             job.set_progress(progress_percent, f'Syncing disk {idx}/{number_of_disks}')
@@ -157,10 +159,7 @@ class DiskService(Service, ServiceChangeMixin):
                 # 2. or can't translate device to identifier
                 if not disk['disk_expiretime']:
                     disk['disk_expiretime'] = datetime.utcnow() + timedelta(days=self.DISK_EXPIRECACHE_DAYS)
-                    self.middleware.call_sync(
-                        'datastore.update', 'storage.disk', disk['disk_identifier'], disk, options
-                    )
-                    changed.add(disk['disk_identifier'])
+                    updates[disk['disk_identifier']] = disk
                 elif disk['disk_expiretime'] < datetime.utcnow():
                     # Disk expire time has surpassed, go ahead and remove it
                     if disk['disk_kmip_uid']:
@@ -168,7 +167,6 @@ class DiskService(Service, ServiceChangeMixin):
                             'kmip.reset_sed_disk_password', disk['disk_identifier'], disk['disk_kmip_uuid'],
                             background=True
                         )
-                    self.middleware.call_sync('datastore.delete', 'storage.disk', disk['disk_identifier'], options)
                     deleted.add(disk['disk_identifier'])
                 continue
             else:
@@ -185,30 +183,20 @@ class DiskService(Service, ServiceChangeMixin):
                 # If for some reason disk is not identified as a system disk mark it to expire.
                 disk['disk_expiretime'] = datetime.utcnow() + timedelta(days=self.DISK_EXPIRECACHE_DAYS)
 
-            if self._disk_changed(disk, original_disk):
-                self.middleware.call_sync('datastore.update', 'storage.disk', disk['disk_identifier'], disk, options)
-                changed.add(disk['disk_identifier'])
+            self._map_enclosure_slot_to_db(disk, enclosure_slots)
 
-            try:
-                self.middleware.call_sync('enclosure.sync_disk', disk['disk_identifier'], encs)
-            except Exception:
-                self.logger.error(
-                    'Unhandled exception in enclosure.sync_disk for %r', disk['disk_identifier'], exc_info=True
-                )
+            if self._disk_changed(disk, original_disk):
+                updates[disk['disk_identifier']] = disk
 
             seen_disks[name] = disk
 
-        qs = None
+        db_disks = {disk['disk_identifier']: disk for disk in db_disks if disk['disk_identifier'] not in deleted}
         progress_percent = 70
         for name in filter(lambda x: x not in seen_disks, sys_disks):
             progress_percent += increment
             disk_identifier = self.dev_to_ident(name, sys_disks, uuids)
-            if qs is None:
-                qs = self.middleware.call_sync('datastore.query', 'storage.disk')
-
-            if disk := [i for i in qs if i['disk_identifier'] == disk_identifier]:
+            if disk := db_disks.get(disk_identifier):
                 new = False
-                disk = disk[0]
                 job.set_progress(progress_percent, f'Updating disk {name!r}')
             else:
                 new = True
@@ -218,26 +206,26 @@ class DiskService(Service, ServiceChangeMixin):
             original_disk = disk.copy()
             disk['disk_name'] = name
             self._map_device_disk_to_db(disk, sys_disks[name])
+            self._map_enclosure_slot_to_db(disk, enclosure_slots)
 
             if sys_disks[name]['dif']:
                 dif_formatted_disks.append(name)
 
             if not new:
                 if self._disk_changed(disk, original_disk):
-                    self.middleware.call_sync(
-                        'datastore.update', 'storage.disk', disk['disk_identifier'], disk, options
-                    )
-                    changed.add(disk['disk_identifier'])
+                    updates[disk['disk_identifier']] = disk
             else:
-                self.middleware.call_sync('datastore.insert', 'storage.disk', disk, options)
-                changed.add(disk['disk_identifier'])
+                inserts.append(disk)
+                db_disks[disk_identifier] = disk
 
-            try:
-                self.middleware.call_sync('enclosure.sync_disk', disk['disk_identifier'], encs)
-            except Exception:
-                self.logger.error(
-                    'Unhandled exception in enclosure.sync_disk for %r', disk['disk_identifier'], exc_info=True
-                )
+        changed = set(updates) | {disk['disk_identifier'] for disk in inserts}
+        if changed or deleted:
+            job.set_progress(90, 'Writing disk changes to database')
+            self.middleware.call_sync('datastore.bulk_write', 'storage.disk', {
+                'insert': inserts,
+                'update': [[identifier, disk] for identifier, disk in updates.items()],
+                'delete': list(deleted),
+            }, {'ha_sync': False})
 
         if dif_formatted_disks:
             self.middleware.call_sync('alert.oneshot_create', 'DifFormatted', dif_formatted_disks)
@@ -248,13 +236,11 @@ class DiskService(Service, ServiceChangeMixin):
             job.set_progress(92, 'Restarting necessary services')
             self.middleware.call_sync('disk.restart_services_after_sync')
 
-            # we query the db again since we've made changes to it
             job.set_progress(94, 'Emitting disk events')
-            disks = {i['disk_identifier']: i for i in self.middleware.call_sync('datastore.query', 'storage.disk')}
-            for change in changed:
-                self.middleware.send_event('disk.query', 'CHANGED', id=change, fields=disks[change])
+            if changed:
+                self.middleware.call_sync('datastore.send_bulk_update_events', 'storage.disk', list(changed))
             for delete in deleted:
-                self.middleware.send_event('disk.query', 'REMOVED', id=delete)
+                self.middleware.call_sync('datastore.send_delete_events', 'storage.disk', delete)
 
         if opts['zfs_guid']:
             job.set_progress(95, 'Synchronizing ZFS GUIDs')
@@ -282,6 +268,12 @@ class DiskService(Service, ServiceChangeMixin):
         # storage_disk.disk_size is a string
         return dict(disk, disk_size=None if disk.get('disk_size') is None else str(disk['disk_size'])) != original_disk
 
+    def _map_enclosure_slot_to_db(self, db_disk, enclosure_slots):
+        if enclosure := enclosure_slots.get(db_disk['disk_name']):
+            db_disk['disk_enclosure_slot'] = enclosure['number'] * 1000 + enclosure['slot']
+        else:
+            db_disk['disk_enclosure_slot'] = None
+
     def _map_device_disk_to_db(self, db_disk, disk):
         only_update_if_true = ('size',)
         update_keys = ('serial', 'lunid', 'rotationrate', 'type', 'size', 'subsystem', 'number', 'model', 'bus')
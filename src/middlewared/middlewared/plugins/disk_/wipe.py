@@ -1,64 +1,219 @@
+import asyncio
+import contextlib
+import errno
+import fcntl
+import logging
+import mmap
 import os
+import struct
+import threading
+import time
+from collections import defaultdict
 
-from middlewared.schema import accepts, Bool, Ref, Str, returns
-from middlewared.service import job, private, Service
+from middlewared.schema import accepts, Bool, List, Ref, Str, returns
+from middlewared.service import CallError, job, private, Service
+from middlewared.utils.asyncio_ import asyncio_map
 
+logger = logging.getLogger(__name__)
 
-CHUNK = 1048576  # 1MB binary
+BLKDISCARD = 0x1277  # discard a range of sectors
+BLKZEROOUT = 0x127f  # zero a range of sectors (offloaded to the device when it supports WRITE ZEROES)
+QUICK_SIZE = 33554432  # 32MB binary wiped at the beginning and at the end of the disk in `QUICK` mode
+ZEROOUT_CHUNK = 1073741824  # 1GB binary zeroed per ioctl call so that progress can be reported and wipe aborted
+WRITE_CHUNK = 16777216  # 16MB binary written per `pwrite` call when falling back to writing the data ourselves
+PROGRESS_INTERVAL = 1  # seconds between progress updates
+WIPE_CONCURRENCY = 16
+# Disks can be wiped by both `disk.wipe` and `disk.wipe_disks` jobs, make sure a disk is wiped by one job at a time
+WIPE_LOCKS = defaultdict(asyncio.Lock)
+
+
+class WipeAborted(Exception):
+    pass
+
+
+class WipeProgress:
+    """
+    Aggregates progress of all the disks wiped by a job and reports it no more often than every `interval` seconds.
+    """
+
+    def __init__(self, job, total, interval=None):
+        self.job = job
+        self.total = total
+        self.interval = PROGRESS_INTERVAL if interval is None else interval
+        self.done = 0
+        self.last_update_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.abort_event = threading.Event()
+
+    def add(self, length):
+        if self.abort_event.is_set():
+            raise WipeAborted()
+
+        with self.lock:
+            self.done += length
+            now = time.monotonic()
+            if self.job is None or now - self.last_update_at < self.interval:
+                return
+
+            self.last_update_at = now
+            percent = self.done / self.total * 100 if self.total else 100
+
+        self.job.set_progress(percent)
+
+
+def _blkzeroout(fd, offset, length, progress):
+    """
+    Returns `False` if the device does not support `BLKZEROOUT` (in which case nothing was written).
+    """
+    start = offset
+    end = offset + length
+    while offset < end:
+        chunk = min(ZEROOUT_CHUNK, end - offset)
+        try:
+            fcntl.ioctl(fd, BLKZEROOUT, struct.pack('QQ', offset, chunk))
+        except OSError as e:
+            if e.errno in (errno.ENOTTY, errno.EOPNOTSUPP, errno.EINVAL) and offset == start:
+                return False
+            raise
+
+        offset += chunk
+        if progress:
+            progress.add(chunk)
+
+    return True
+
+
+def _blkdiscard(fd, size):
+    try:
+        fcntl.ioctl(fd, BLKDISCARD, struct.pack('QQ', 0, size))
+    except OSError:
+        # Not all the devices support discard, zeroing afterwards does the actual job
+        pass
+
+
+def _write(fd, offset, length, pattern, progress):
+    # `mmap` provides a page-aligned buffer that is suitable for `O_DIRECT` writes
+    with mmap.mmap(-1, WRITE_CHUNK) as buf:
+        buf.write(pattern * (WRITE_CHUNK // len(pattern)))
+        view = memoryview(buf)
+        try:
+            end = offset + length
+            while offset < end:
+                written = os.pwrite(fd, view[:min(WRITE_CHUNK, end - offset)], offset)
+                offset += written
+                if progress:
+                    progress.add(written)
+        finally:
+            view.release()
+
+
+def wipe_device(path, mode, progress=None):
+    """
+    Wipes block device at `path` according to `mode` (`QUICK`, `FULL` or `FULL_RANDOM`).
+    Zeroing is done with `BLKZEROOUT` ioctl where supported. Otherwise, and for random data, it is done with
+    large `O_DIRECT` writes to avoid polluting page cache. Returns number of bytes that were wiped.
+    """
+    flags = os.O_WRONLY | os.O_EXCL
+    try:
+        fd = os.open(path, flags | os.O_DIRECT)
+        direct = True
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+
+        # Filesystem (e.g. tmpfs) does not support direct I/O
+        fd = os.open(path, flags)
+        direct = False
+
+    try:
+        size = os.lseek(fd, 0, os.SEEK_END)
+        if size == 0:
+            # no size means nothing else will work
+            logger.error('Unable to determine size of %r', path)
+            return 0
+        elif size < QUICK_SIZE and mode == 'QUICK':
+            # we wipe the first and last 33554432 bytes (32MB) of the
+            # device when it's the "QUICK" mode so if the device is smaller
+            # than that, ignore it.
+            return 0
+
+        if mode == 'QUICK':
+            ranges = [(0, QUICK_SIZE), (size - QUICK_SIZE, QUICK_SIZE)]
+            progress = None
+        else:
+            ranges = [(0, size)]
+
+        if mode == 'FULL_RANDOM':
+            pattern = os.urandom(1048576)
+        else:
+            pattern = b'\0'
+            if mode == 'FULL':
+                _blkdiscard(fd, size)
+
+        for offset, length in ranges:
+            if mode == 'FULL_RANDOM' or not _blkzeroout(fd, offset, length, progress):
+                _write(fd, offset, length, pattern, progress)
+
+        if not direct:
+            os.fsync(fd)
+
+        return sum(length for offset, length in ranges)
+    finally:
+        os.close(fd)
 
 
 class DiskService(Service):
 
     @private
     def _wipe(self, data):
-        disk_path = f'/dev/{data["dev"]}'
-        with open(os.open(disk_path, os.O_WRONLY | os.O_EXCL), 'wb') as f:
-            size = os.lseek(f.fileno(), 0, os.SEEK_END)
-            if size == 0:
-                # no size means nothing else will work
-                self.logger.error('Unable to determine size of "%s"', data['dev'])
-                return
-            elif size < 33554432 and data['mode'] == 'QUICK':
-                # we wipe the first and last 33554432 bytes (32MB) of the
-                # device when it's the "QUICK" mode so if the device is smaller
-                # than that, ignore it.
-                return
+        if not wipe_device(f'/dev/{data["dev"]}', data['mode'], data.get('progress')):
+            return
 
-            # seek back to the beginning of the disk
-            os.lseek(f.fileno(), 0, os.SEEK_SET)
-
-            # no reason to write more than 1MB at a time
-            # or kernel will break them into smaller chunks
-            if data['mode'] in ('QUICK', 'FULL'):
-                to_write = bytearray(CHUNK).zfill(0)
-            else:
-                to_write = bytearray(os.urandom(CHUNK))
-
-            if data['mode'] == 'QUICK':
-                _32 = 32
-                for i in range(_32):
-                    # wipe first 32MB
-                    os.write(f.fileno(), to_write)
-
-                # seek to 32MB before end of drive
-                os.lseek(f.fileno(), (size - (CHUNK * _32)), os.SEEK_SET)
-                for i in range(_32):
-                    # wipe last 32MB
-                    os.write(f.fileno(), to_write)
-            else:
-                iterations = (size // CHUNK)
-                length = len(str(iterations))
-                for i in range(iterations):
-                    os.write(f.fileno(), to_write)
-                    data['job'].set_progress(float(f'{i / iterations:.{length}f}') * 100)
-
-        with open(disk_path, 'wb'):
+        with open(f'/dev/{data["dev"]}', 'wb'):
             # we overwrote partiton label information by the time
             # we get here so we need to close device and re-open
             # it in write mode to trigger a udev to rescan the
             # device for new information
             pass
 
+    @private
+    async def wipe_impl(self, job, disks, mode):
+        total = 0
+        if mode != 'QUICK':
+            for disk in disks:
+                total += await self.middleware.run_in_thread(self._device_size, disk)
+
+        progress = WipeProgress(job, total)
+        errors = {}
+
+        async def wipe(disk):
+            try:
+                await self.middleware.run_in_thread(self._wipe, {'dev': disk, 'mode': mode, 'progress': progress})
+            except WipeAborted:
+                pass
+            except Exception as e:
+                errors[disk] = e
+
+        try:
+            await asyncio_map(wipe, disks, limit=WIPE_CONCURRENCY)
+        except asyncio.CancelledError:
+            # Job was aborted, make wipe threads stop after their current chunk
+            progress.abort_event.set()
+            raise
+
+        if errors:
+            if len(disks) == 1:
+                raise errors[disks[0]]
+
+            raise CallError('Failed to wipe ' + ', '.join(f'{disk!r}: {error}' for disk, error in errors.items()))
+
+        job.set_progress(100)
+
+    @private
+    def _device_size(self, disk):
+        with open(f'/dev/{disk}', 'rb') as f:
+            return os.lseek(f.fileno(), 0, os.SEEK_END)
+
     @accepts(
         Str('dev'),
         Str('mode', enum=['QUICK', 'FULL', 'FULL_RANDOM'], required=True),
@@ -79,7 +234,39 @@ class DiskService(Service):
           - FULL: write whole disk with zero's
           - FULL_RANDOM: write whole disk with random bytes
         """
-        await self.middleware.call('disk.swaps_remove_disks', [dev], options)
-        await self.middleware.run_in_thread(self._wipe, {'job': job, 'dev': dev, 'mode': mode})
-        if sync:
-            await self.middleware.call('disk.sync', dev)
+        async with self._wipe_locks([dev]):
+            await self.middleware.call('disk.swaps_remove_disks', [dev], options)
+            await self.wipe_impl(job, [dev], mode)
+            if sync:
+                await self.middleware.call('disk.sync', dev)
+
+    @private
+    @accepts(
+        List('disks', items=[Str('dev')]),
+        Str('mode', enum=['QUICK', 'FULL', 'FULL_RANDOM'], required=True),
+        Bool('synccache', default=True),
+        Ref('swap_removal_options'),
+    )
+    @job(
+        description=lambda disks, mode, *args: f'{mode.replace("_", " ").title()} wipe of disks {", ".join(disks)}',
+        abortable=True,
+    )
+    async def wipe_disks(self, job, disks, mode, sync, options):
+        """
+        Wipes multiple `disks` concurrently within a single job. See `disk.wipe` for description of modes.
+        """
+        async with self._wipe_locks(disks):
+            await self.middleware.call('disk.swaps_remove_disks', disks, options)
+            await self.wipe_impl(job, disks, mode)
+            if sync:
+                for disk in disks:
+                    await self.middleware.call('disk.sync', disk)
+
+    @contextlib.asynccontextmanager
+    async def _wipe_locks(self, disks):
+        async with contextlib.AsyncExitStack() as stack:
+            # Always acquire the locks in the same order so that jobs wiping overlapping sets of disks do not deadlock
+            for disk in sorted(set(disks)):
+                await stack.enter_async_context(WIPE_LOCKS[disk])
+
+            yield
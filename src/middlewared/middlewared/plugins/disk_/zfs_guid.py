@@ -4,6 +4,24 @@ from middlewared.service import private, Service
 from middlewared.service_exception import MatchNotFound
 
 
+def disks_by_zfs_guid(disks):
+    """
+    Maps ZFS guids to disks choosing, for every guid, the disk that is currently present in the system or (if there
+    is none) the one that was removed last (see `disk.disk_by_zfs_guid`).
+    """
+    result = {}
+    for disk in disks:
+        current = result.get(disk['zfs_guid'])
+        if current is None or (
+            current['expiretime'] is not None and (
+                disk['expiretime'] is None or disk['expiretime'] > current['expiretime']
+            )
+        ):
+            result[disk['zfs_guid']] = disk
+
+    return result
+
+
 class DiskService(Service):
     @private
     async def disk_by_zfs_guid(self, guid):
@@ -21,25 +39,11 @@ class DiskService(Service):
         Since type is inconsistent for this value, it cannot be used
         for ordering disks using builtin sorted() method in filter_list.
         """
-        disk = None
-
-        disks_with_zfs_guid = await self.middleware.call(
+        return disks_by_zfs_guid(await self.middleware.call(
             "disk.query",
             [["zfs_guid", "=", guid]],
             {"extra": {"include_expired": True}},
-        )
-
-        for entry in disks_with_zfs_guid:
-            if entry['expiretime'] is None:
-                disk = entry
-                break
-
-            if disk is None:
-                disk = entry
-            elif entry['expiretime'] > disk['expiretime']:
-                disk = entry
-
-        return disk
+        )).get(guid)
 
     @private
     async def sync_all_zfs_guid(self):
@@ -113,11 +117,12 @@ class DiskService(Service):
 
 
 async def zfs_events_hook(middleware, data):
-    if data["class"] == "sysevent.fs.zfs.config_sync":
-        try:
-            await middleware.call("disk.sync_zfs_guid", data["pool"])
-        except MatchNotFound:
-            pass
+    for event in data:
+        if event["class"] == "sysevent.fs.zfs.config_sync":
+            try:
+                await middleware.call("disk.sync_zfs_guid", event["pool"])
+            except MatchNotFound:
+                pass
 
 
 async def hook(middleware, pool):
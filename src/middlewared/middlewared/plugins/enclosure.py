@@ -52,6 +52,28 @@ MINI_REGEX = re.compile(r"(TRUE|FREE)NAS-MINI")
 R20_VARIANT = ["TRUENAS-R20", "TRUENAS-R20A", "TRUENAS-R20B"]
 
 
+def map_disks_to_slots(enclosure_info):
+    """
+    Returns a mapping of disk names to `{"number": enclosure number, "slot": slot}` for all the disks present in the
+    `enclosure_info` (result of `enclosure.query`). Same as `EnclosureService._get_slot_for_disk` but for all the disks
+    at once.
+    """
+    result = {}
+    for enclosure in enclosure_info:
+        for element in enclosure["elements"]:
+            if element["name"] != "Array Device Slot":
+                continue
+
+            for slot in element["elements"]:
+                if (disk := slot["data"].get("Device")) and disk not in result:
+                    result[disk] = {"number": enclosure["number"], "slot": slot["slot"]}
+
+            # `_get_slot` only looks at the first "Array Device Slot" element of an enclosure
+            break
+
+    return result
+
+
 class EnclosureLabelModel(sa.Model):
     __tablename__ = 'truenas_enclosurelabel'
 
@@ -1210,12 +1232,10 @@ async def devd_zfs_hook(middleware, data):
 
 
 async def zfs_events_hook(middleware, data):
-    event_id = data['class']
-
-    if event_id in [
+    if any(event['class'] in [
         'sysevent.fs.zfs.config_sync',
         'sysevent.fs.zfs.vdev_remove',
-    ]:
+    ] for event in data):
         await middleware.call('enclosure.sync_zpool')
 
 
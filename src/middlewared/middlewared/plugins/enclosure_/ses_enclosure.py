@@ -1,4 +1,5 @@
-from subprocess import run, PIPE
+import threading
+from subprocess import Popen, PIPE
 
 from pyudev import Context
 
@@ -7,6 +8,14 @@ from middlewared.service import private, Service
 
 class EnclosureService(Service):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Configuration diagnostic page only changes when an enclosure is (re)attached or its firmware is updated,
+        # both of which generate udev events for the `enclosure` subsystem
+        self.ses_configuration_cache = {}
+        self.ses_configuration_cache_generation = 0
+        self.ses_configuration_cache_lock = threading.Lock()
+
     @private
     def list_ses_enclosures(self):
         ctx = Context()
@@ -14,23 +23,68 @@ class EnclosureService(Service):
 
     @private
     def get_ses_enclosures(self):
-        output = {}
+        names = self.list_ses_enclosures()
         opts = {'encoding': 'utf-8', 'errors': 'ignore', 'stdout': PIPE, 'stderr': PIPE}
-        for i, name in enumerate(self.list_ses_enclosures()):
-            p = run(["sg_ses", "--page=cf", name], **opts)
-            if p.returncode != 0:
-                self.logger.warning("Error querying enclosure configuration page %r: %s", name, p.stderr)
+
+        # Status pages are fetched for all the enclosures concurrently
+        status = {name: Popen(["sg_ses", "-i", "--page=es", name], **opts) for name in names}
+        try:
+            configuration = self.get_ses_configurations(names)
+        finally:
+            status = {name: (*p.communicate(), p.returncode) for name, p in status.items()}
+
+        output = {}
+        for i, name in enumerate(names):
+            if (cf := configuration.get(name)) is None:
                 continue
-            else:
-                cf = p.stdout
 
-            p = run(["sg_ses", "-i", "--page=es", name], **opts)
-            if p.returncode != 0:
-                self.logger.debug("Error querying enclosure status page %r: %s", name, p.stderr)
+            es, stderr, returncode = status[name]
+            if returncode != 0:
+                self.logger.debug("Error querying enclosure status page %r: %s", name, stderr)
                 continue
-            else:
-                es = p.stdout
 
             output[i] = (name.removeprefix('/dev/'), (cf, es))
 
         return output
+
+    @private
+    def get_ses_configurations(self, names):
+        with self.ses_configuration_cache_lock:
+            # Forget enclosures that are gone
+            for name in self.ses_configuration_cache.keys() - set(names):
+                self.ses_configuration_cache.pop(name)
+
+            result = {name: cf for name in names if (cf := self.ses_configuration_cache.get(name)) is not None}
+            missing = [name for name in names if name not in result]
+            generation = self.ses_configuration_cache_generation
+
+        if missing:
+            opts = {'encoding': 'utf-8', 'errors': 'ignore', 'stdout': PIPE, 'stderr': PIPE}
+            processes = {name: Popen(["sg_ses", "--page=cf", name], **opts) for name in missing}
+            for name, p in processes.items():
+                cf, stderr = p.communicate()
+                if p.returncode != 0:
+                    self.logger.warning("Error querying enclosure configuration page %r: %s", name, stderr)
+                    continue
+
+                result[name] = cf
+                with self.ses_configuration_cache_lock:
+                    # Do not cache the page if an enclosure event arrived while we were reading it
+                    if generation == self.ses_configuration_cache_generation:
+                        self.ses_configuration_cache[name] = cf
+
+        return result
+
+    @private
+    def ses_configuration_cache_clear(self):
+        with self.ses_configuration_cache_lock:
+            self.ses_configuration_cache.clear()
+            self.ses_configuration_cache_generation += 1
+
+
+async def udev_enclosure_hook(middleware, data):
+    await middleware.call('enclosure.ses_configuration_cache_clear')
+
+
+def setup(middleware):
+    middleware.register_hook('udev.enclosure', udev_enclosure_hook)
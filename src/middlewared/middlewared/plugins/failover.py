@@ -697,12 +697,18 @@ class FailoverService(ConfigService):
                 # means update file was provided to us so send it to the standby
                 job.set_progress(None, 'Sending files to Standby Controller')
                 token = self.middleware.call_sync('failover.call_remote', 'auth.generate_token')
+
+                def send_file_progress(progress):
+                    if progress.get('description'):
+                        job.set_progress(None, f'Sending files to Standby Controller: {progress["description"]}')
+
                 for f in os.listdir(local_path):
                     self.middleware.call_sync(
                         'failover.send_file',
                         token,
                         os.path.join(local_path, f),
-                        os.path.join(remote_path, f)
+                        os.path.join(remote_path, f),
+                        send_file_progress,
                     )
 
             local_version = self.middleware.call_sync('system.version')
@@ -1,4 +1,3 @@
-import os
 import time
 
 from middlewared.service import CallError, Service
@@ -72,6 +71,7 @@ class FailoverDatastoreService(Service):
 
     def send(self):
         token = self.middleware.call_sync('failover.call_remote', 'auth.generate_token')
+        self.middleware.call_sync('datastore.checkpoint')
         self.middleware.call_sync('failover.send_file', token, FREENAS_DATABASE, FREENAS_DATABASE_REPLICATED)
         self.middleware.call_sync('failover.call_remote', 'failover.datastore.receive')
 
@@ -79,8 +79,7 @@ class FailoverDatastoreService(Service):
         self.middleware.call_sync('alert.oneshot_delete', 'FailoverSyncFailed', None)
 
     def receive(self):
-        os.rename(FREENAS_DATABASE_REPLICATED, FREENAS_DATABASE)
-        self.middleware.call_sync('datastore.setup')
+        self.middleware.call_sync('datastore.replace', FREENAS_DATABASE_REPLICATED)
 
 
 def hook_datastore_execute_write(middleware, sql, params, options):
@@ -10,7 +10,7 @@ from functools import partial
 
 from middlewared.client import Client, ClientException, CallTimeout, CALL_TIMEOUT
 from middlewared.schema import accepts, Any, Bool, Dict, Int, List, Str, Float, returns
-from middlewared.service import CallError, Service, job, private
+from middlewared.service import CallError, Service, private
 from middlewared.utils.threading import set_thread_name, start_daemon_thread
 from middlewared.validators import Range
 
@@ -25,6 +25,7 @@ class RemoteClient(object):
         self.connected = threading.Event()
         self.middleware = None
         self.remote_ip = None
+        self.remote_port = 6000
         self._subscribe_lock = threading.Lock()
         self._subscriptions = defaultdict(list)
         self._on_connect_callbacks = []
@@ -50,7 +51,7 @@ class RemoteClient(object):
 
     def connect_and_wait(self):
         try:
-            with Client(f'ws://{self.remote_ip}:6000/websocket', reserved_ports=True) as c:
+            with Client(f'ws://{self.remote_ip}:{self.remote_port}/websocket', reserved_ports=True) as c:
                 self.client = c
                 self.connected.set()
                 # Subscribe to all events on connection
@@ -149,43 +150,43 @@ class RemoteClient(object):
             except Exception:
                 logger.warning('Failed to run callback for %s', name, exc_info=True)
 
-    def send_file(self, token, local_path, remote_path):
+    def send_file(self, token, local_path, remote_path, progress_callback=None):
+        """
+        Upload `local_path` to `remote_path` on the other node. `progress_callback` is called with progress of the
+        remote upload job every time it changes.
+        """
         # No reason to honor proxy settings in this
         # method since we're sending across the
         # heartbeat interface which is point-to-point
         proxies = {'http': '', 'https': ''}
 
-        r = requests.post(
-            f'http://{self.remote_ip}:6000/_upload/',
-            proxies=proxies,
-            files=[
-                ('data', json.dumps({
-                    'method': 'filesystem.put',
-                    'params': [remote_path],
-                })),
-                ('file', open(local_path, 'rb')),
-            ],
-            headers={
-                'Authorization': f'Token {token}',
-            },
-        )
+        with open(local_path, 'rb') as f:
+            r = requests.post(
+                f'http://{self.remote_ip}:{self.remote_port}/_upload/',
+                proxies=proxies,
+                files=[
+                    ('data', json.dumps({
+                        'method': 'filesystem.put',
+                        'params': [remote_path],
+                    })),
+                    ('file', f),
+                ],
+                headers={
+                    'Authorization': f'Token {token}',
+                },
+            )
         job_id = r.json()['job_id']
-        # TODO: use event subscription in the client instead of polling
-        while True:
-            rjob = self.client.call('core.get_jobs', [('id', '=', job_id)])
-            if rjob:
-                rjob = rjob[0]
-                if rjob['state'] == 'FAILED':
-                    raise CallError(
-                        f'Failed to send {local_path} to Standby Controller: {job["error"]}.'
-                    )
-                elif rjob['state'] == 'ABORTED':
-                    raise CallError(
-                        f'Failed to send {local_path} to Standby Controller, job aborted by user.'
-                    )
-                elif rjob['state'] == 'SUCCESS':
-                    break
-            time.sleep(0.5)
+
+        def callback(rjob):
+            if progress_callback is not None and rjob['state'] == 'RUNNING':
+                progress_callback(rjob['progress'])
+
+        # `core.job_wait` finishes together with the upload job, its state changes are pushed to us by the
+        # `core.get_jobs` event subscription so there is no need to poll the other node
+        try:
+            self.call('core.job_wait', job_id, job=True, callback=callback, connect_timeout=CALL_TIMEOUT)
+        except CallError as e:
+            raise CallError(f'Failed to send {local_path} to Standby Controller: {e.errmsg}.')
 
     def get_remote_os_version(self):
 
@@ -275,8 +276,8 @@ class FailoverService(Service):
             return self.CLIENT.get_remote_os_version()
 
     @private
-    def send_file(self, token, src, dst):
-        self.CLIENT.send_file(token, src, dst)
+    def send_file(self, token, src, dst, progress_callback=None):
+        self.CLIENT.send_file(token, src, dst, progress_callback)
 
     @private
     async def ensure_remote_client(self):
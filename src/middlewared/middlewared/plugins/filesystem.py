@@ -2,6 +2,7 @@ import binascii
 import errno
 import functools
 import grp
+import heapq
 import os
 import pathlib
 import pwd
@@ -11,19 +12,23 @@ import time
 
 import pyinotify
 
-from itertools import product
+from itertools import islice, product
+from operator import attrgetter
 from middlewared.event import EventSource
 from middlewared.plugins.pwenc import PWENC_FILE_SECRET
 from middlewared.plugins.cluster_linux.utils import CTDBConfig, FuseConfig
 from middlewared.plugins.filesystem_ import chflags, dosmode, stat_x
 from middlewared.schema import accepts, Bool, Dict, Float, Int, List, Ref, returns, Path, Str
 from middlewared.service import private, CallError, filterable_returns, filterable, Service, job
-from middlewared.utils import filter_list
+from middlewared.utils import filter_getattrs, filter_list
 from middlewared.utils.osc import getmntinfo
 from middlewared.utils.path import FSLocation, path_location, strip_location_prefix, is_child_realpath
 from middlewared.plugins.filesystem_.acl_base import ACLType
 from middlewared.plugins.zfs_.utils import ZFSCTL
 
+# Minimal number of directory entry names kept in memory by a paginated `filesystem.listdir`
+LISTDIR_BATCH_SIZE = 1000
+
 
 class FilesystemService(Service):
 
@@ -246,6 +251,11 @@ class FilesystemService(Service):
           acl(bool): extended ACL is present on file
           is_mountpoint(bool): path is a mountpoint
           is_ctldir(bool): path is within special .zfs directory
+
+        Entries are returned in name order. Unless `order_by` or `count` is requested, only the entries
+        needed for `offset` + `limit` matching entries are retrieved. To continue listing a large directory,
+        pass the name of the last received entry in `query-options.extra.cursor`, and listing will resume
+        with the first entry whose name sorts after it (even if that entry was removed in the meantime).
         """
 
         path = self.resolve_cluster_path(path)
@@ -274,52 +284,117 @@ class FilesystemService(Service):
             else:
                 continue
 
-        rv = []
         if stat_opts["dir_only"] and stat_opts["file_only"]:
-            return rv
+            return []
+
+        filters = filters or []
+        options = options or {}
+        cursor = options.get('extra', {}).get('cursor')
+        offset = options.get('offset', 0)
+        if options.get('get'):
+            limit = 1
+        else:
+            limit = options.get('limit') or None
 
-        only_top_level = path.absolute() == pathlib.Path('/mnt')
-        for entry in path.iterdir():
-            st = self.statx_entry_impl(entry, stat_opts)
-            if st is None:
-                continue
+        # `acl` and `is_mountpoint` are expensive to retrieve and are only computed for entries that are
+        # returned unless they are needed to filter or order the entries.
+        order_by = options.get('order_by', [])
+        eager = bool(order_by) or bool(filter_getattrs(filters) & {'acl', 'is_mountpoint'})
+        full = bool(order_by) or bool(options.get('count'))
+        batch_size = max(offset + limit, LISTDIR_BATCH_SIZE) if limit and not full else None
+        entries = (
+            entry for entry in self.listdir_iter(path, stat_opts, cursor, eager, batch_size)
+            if not filters or filter_list([entry], filters)
+        )
 
-            if only_top_level and not entry.is_mount():
-                # sometimes (on failures) the top-level directory
-                # where the zpool is mounted does not get removed
-                # after the zpool is exported. WebUI calls this
-                # specifying `/mnt` as the path. This is used when
-                # configuring shares in the "Path" drop-down. To
-                # prevent shares from being configured to point to
-                # a path that doesn't exist on a zpool, we'll
-                # filter these here.
-                continue
-            if 'ix-applications' in entry.parts:
-                continue
+        if full:
+            return filter_list(list(entries), options=options)
+
+        rv = list(islice(entries, offset, offset + limit if limit else None))
+        if not eager:
+            for entry in rv:
+                self.listdir_entry_extend(path, entry)
+
+        return filter_list(rv, options={k: v for k, v in options.items() if k not in ('offset', 'limit')})
 
-            etype = st['etype']
-            stat = st['st']
-            realpath = entry.resolve().as_posix() if etype == 'SYMLINK' else entry.absolute().as_posix()
-
-            data = {
-                'name': entry.name,
-                'path': entry.as_posix().replace(
-                    f'{FuseConfig.FUSE_PATH_BASE.value}/', FuseConfig.FUSE_PATH_SUBST.value
-                ),
-                'realpath': realpath,
-                'type': etype,
-                'size': stat.stx_size,
-                'mode': stat.stx_mode,
-                'acl': False if self.acl_is_trivial(realpath) else True,
-                'uid': stat.stx_uid,
-                'gid': stat.stx_gid,
-                'is_mountpoint': entry.is_mount(),
-                'is_ctldir': st['is_ctldir'],
-            }
-
-            rv.append(data)
-
-        return filter_list(rv, filters=filters or [], options=options or {})
+    @private
+    def listdir_iter(self, path, stat_opts, cursor=None, extend=True, batch_size=None):
+        """
+        Yields directory entries of `path` in name order. If `cursor` is specified, iteration starts with the
+        first entry whose name sorts after it. If `batch_size` is specified, the directory is read in passes
+        that only keep the next `batch_size` (doubled on every pass) names in memory instead of the whole
+        listing. Unless `extend` is set, `acl` and `is_mountpoint` are left out and should be filled in by
+        `listdir_entry_extend`.
+        """
+        def wanted(dirent):
+            # Skip entries of wrong type based on the directory entry type without stat'ing them
+            if stat_opts['dir_only'] and not dirent.is_dir(follow_symlinks=False):
+                return False
+            elif stat_opts['file_only'] and not dirent.is_file(follow_symlinks=False):
+                return False
+
+            return cursor is None or dirent.name > cursor
+
+        only_top_level = path.absolute() == pathlib.Path('/mnt')
+        while True:
+            with os.scandir(path) as it:
+                if batch_size is None:
+                    dirents = sorted(filter(wanted, it), key=attrgetter('name'))
+                else:
+                    dirents = heapq.nsmallest(batch_size, filter(wanted, it), key=attrgetter('name'))
+
+            for dirent in dirents:
+                entry = path / dirent.name
+                st = self.statx_entry_impl(entry, stat_opts)
+                if st is None:
+                    continue
+
+                if only_top_level and not entry.is_mount():
+                    # sometimes (on failures) the top-level directory
+                    # where the zpool is mounted does not get removed
+                    # after the zpool is exported. WebUI calls this
+                    # specifying `/mnt` as the path. This is used when
+                    # configuring shares in the "Path" drop-down. To
+                    # prevent shares from being configured to point to
+                    # a path that doesn't exist on a zpool, we'll
+                    # filter these here.
+                    continue
+                if 'ix-applications' in entry.parts:
+                    continue
+
+                etype = st['etype']
+                stat = st['st']
+                realpath = entry.resolve().as_posix() if etype == 'SYMLINK' else entry.absolute().as_posix()
+
+                data = {
+                    'name': entry.name,
+                    'path': entry.as_posix().replace(
+                        f'{FuseConfig.FUSE_PATH_BASE.value}/', FuseConfig.FUSE_PATH_SUBST.value
+                    ),
+                    'realpath': realpath,
+                    'type': etype,
+                    'size': stat.stx_size,
+                    'mode': stat.stx_mode,
+                    'uid': stat.stx_uid,
+                    'gid': stat.stx_gid,
+                    'is_ctldir': st['is_ctldir'],
+                }
+                if extend:
+                    self.listdir_entry_extend(path, data)
+
+                yield data
+
+            if batch_size is None or len(dirents) < batch_size:
+                return
+
+            cursor = dirents[-1].name
+            batch_size *= 2
+
+    @private
+    def listdir_entry_extend(self, path, entry):
+        entry['acl'] = False if self.acl_is_trivial(entry['realpath']) else True
+        entry['is_mountpoint'] = (path / entry['name']).is_mount()
+        return entry
 
     @accepts(Str('path'))
     @returns(Dict(
@@ -1,7 +1,15 @@
+from glustercli.cli import bricks, quota, volume
 from glustercli.cli.utils import GlusterCmdException
 
 from middlewared.service import CallError, Service
 
+# Methods that change the volumes status returned by `gluster.volume.query`
+VOLUME_CHANGING_METHODS = {
+    volume.create, volume.start, volume.stop, volume.restart, volume.delete, volume.optset, volume.optreset,
+    quota.enable, quota.disable,
+    bricks.add, bricks.remove_start, bricks.remove_commit, bricks.remove_force, bricks.replace_commit,
+}
+
 
 class GlusterMethodService(Service):
 
@@ -32,6 +40,10 @@ class GlusterMethodService(Service):
             raise CallError(err.strip())
         except Exception:
             raise
+        finally:
+            if func in VOLUME_CHANGING_METHODS:
+                # Failed method might have changed the volume too
+                self.middleware.call_sync('gluster.volume.query_cache_clear')
 
         if isinstance(result, bytes):
             return result.decode().strip()
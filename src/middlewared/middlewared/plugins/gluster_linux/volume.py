@@ -1,3 +1,7 @@
+import asyncio
+import copy
+import time
+
 from glustercli.cli import volume, quota
 
 from middlewared.utils import filter_list
@@ -10,6 +14,8 @@ from .utils import GlusterConfig, set_gluster_workdir_dataset, get_gluster_workd
 GLUSTER_JOB_LOCK = GlusterConfig.CLI_LOCK.value
 CTDB_VOL_NAME = CTDBConfig.CTDB_VOL_NAME.value
 FUSE_BASE = FuseConfig.FUSE_PATH_BASE.value
+# Volumes are also changed by the other peers which do not always notify us
+QUERY_CACHE_TTL = 10
 
 
 class GlusterVolumeService(CRUDService):
@@ -44,16 +50,42 @@ class GlusterVolumeService(CRUDService):
         additional_attrs=True,
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Volumes status is cached until a volume is changed (by us or by an event received from the other peers)
+        self.query_cache = None
+        self.query_cache_generation = 0
+        self.query_cache_lock = asyncio.Lock()
+
     @filterable
     async def query(self, filters, filter_options):
         vols = []
         if await self.middleware.call('service.started', 'glusterd'):
+            vols = copy.deepcopy(await self._query_volumes())
+
+        return filter_list(vols, filters, filter_options)
+
+    async def _query_volumes(self):
+        async with self.query_cache_lock:
+            if self.query_cache is not None and self.query_cache[0] > time.monotonic() - QUERY_CACHE_TTL:
+                return self.query_cache[1]
+
+            generation = self.query_cache_generation
             method = volume.status_detail
             options = {'kwargs': {'group_subvols': True}}
             vols = await self.middleware.call('gluster.method.run', method, options['kwargs'])
             vols = list(map(lambda i: dict(i, id=i['name']), vols))
 
-        return filter_list(vols, filters, filter_options)
+            # Do not cache the volumes if they were changed while we were retrieving them
+            if generation == self.query_cache_generation:
+                self.query_cache = (time.monotonic(), vols)
+
+            return vols
+
+    @private
+    async def query_cache_clear(self):
+        self.query_cache = None
+        self.query_cache_generation += 1
 
     @private
     async def exists_and_started(self, vol):
@@ -1,13 +1,19 @@
+import os
+import threading
 from random import uniform
 from subprocess import run
-from time import sleep
+from time import monotonic, sleep
 
 from middlewared.service import Service, filterable, filterable_returns, private
 from middlewared.utils import filter_list
 from middlewared.schema import List, Dict
 
+SDR_CACHE_DIRECTORY = '/var/cache/freeipmi/sdr-cache'
+SENSORS_MAX_AGE = 10  # seconds a sensors sample can be served from memory unless the caller asks otherwise
+
 
 def get_sensors_data():
+    os.makedirs(SDR_CACHE_DIRECTORY, exist_ok=True)
     cmd = [
         'ipmi-sensors',
         '--comma-separated',
@@ -15,6 +21,11 @@ def get_sensors_data():
         '--non-abbreviated-units',
         '--output-sensor-state',
         '--output-sensor-thresholds',
+        # Walking the BMC's sensor data repository takes seconds on many BMCs so it is cached on disk and only
+        # re-read when the BMC reports that it has changed
+        f'--sdr-cache-directory={SDR_CACHE_DIRECTORY}',
+        '--sdr-cache-recreate',
+        '--quiet-cache',
     ]
     rv = []
     cp = run(cmd, capture_output=True)
@@ -24,21 +35,64 @@ def get_sensors_data():
     return rv
 
 
+class SensorsPoller:
+    """
+    Shares `ipmi-sensors` output between all the callers: a sample that is not older than requested is served from
+    memory and concurrent callers that need a fresh sample wait for the single `ipmi-sensors` invocation in progress.
+    """
+
+    def __init__(self, poll=get_sensors_data):
+        self.poll = poll
+        self.cond = threading.Condition()
+        self.polling = False
+        self.sample = None
+        self.sample_at = None
+
+    def get(self, max_age):
+        requested_at = monotonic()
+        with self.cond:
+            while self.polling:
+                self.cond.wait()
+
+            if self.sample is not None and self.sample_at >= requested_at - max_age:
+                return self.sample
+
+            self.polling = True
+
+        sample = None
+        try:
+            started_at = monotonic()
+            sample = self.poll()
+            return sample
+        finally:
+            with self.cond:
+                self.polling = False
+                if sample is not None:
+                    self.sample = sample
+                    self.sample_at = started_at
+
+                self.cond.notify_all()
+
+
 class IpmiSensorsService(Service):
 
     class Config:
         namespace = 'ipmi.sensors'
         cli_namespace = 'service.ipmi.sensors'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poller = SensorsPoller()
+
     @private
-    def query_impl(self):
+    def query_impl(self, max_age=SENSORS_MAX_AGE):
         rv = []
         if not self.middleware.call_sync('ipmi.is_loaded'):
-            return rv
+            return rv, None
 
         mseries = self.middleware.call_sync('failover.hardware') == 'ECHOWARP'
         reread = None
-        for line in filter(lambda x: x, get_sensors_data()):
+        for line in filter(lambda x: x, self.poller.get(max_age)):
             if (values := line.split(',')) and len(values) == 13:
                 sensor = {
                     'id': values[0],
@@ -70,13 +124,19 @@ class IpmiSensorsService(Service):
     @filterable
     @filterable_returns(List('sensors', items=[Dict('sensor', additional_attrs=True)]))
     def query(self, filters, options):
-        sensors, reread = self.query_impl()
+        """
+        Query IPMI sensors.
+
+        Sensors are read at most every `options.extra.max_age` seconds (10 by default), more frequent queries
+        return the last read values.
+        """
+        sensors, reread = self.query_impl(options['extra'].get('max_age', SENSORS_MAX_AGE))
         if reread is not None:
             max_retries = 3
             while max_retries != 0:
                 self.logger.info('%s re-reading', reread)
                 sleep(round(uniform(0.4, 1.2), 2))
-                sensors, reread = self.query_impl()
+                sensors, reread = self.query_impl(0)
                 if reread is None:
                     # re-read the sensors list and PSU status came back
                     # healthy so exit early
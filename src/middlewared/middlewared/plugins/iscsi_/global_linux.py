@@ -1,16 +1,121 @@
-import glob
 import os
+import threading
+import time
 
 from middlewared.schema import Bool, Dict, Int, Str
 from middlewared.service import filterable, filterable_returns, private, Service
 from middlewared.utils import filter_list, run
 
 
+SCST_ISCSI_TARGETS = '/sys/kernel/scst_tgt/targets/iscsi'
+SESSIONS_MAX_AGE = 5  # seconds
+SESSION_ATTRIBUTES = {
+    'HeaderDigest': ('header_digest', None),
+    'DataDigest': ('data_digest', None),
+    'MaxBurstLength': ('max_burst_length', int),
+    'MaxRecvDataSegmentLength': ('max_receive_data_segment_length', int),
+    'MaxXmitDataSegmentLength': ('max_xmit_data_segment_length', int),
+    'FirstBurstLength': ('first_burst_length', int),
+    'ImmediateData': ('immediate_data', lambda i: i == 'Yes'),
+}
+
+
+def read_sysfs_attribute(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        # Session (or connection) was closed while we were reading it
+        return None
+
+
+def read_session(target, session):
+    initiator_addr = None
+    attributes = {}
+    with os.scandir(session.path) as entries:
+        for entry in entries:
+            if entry.name in SESSION_ATTRIBUTES:
+                attributes[entry.name] = entry.path
+            elif initiator_addr is None and entry.is_dir(follow_symlinks=False):
+                # Connection directories are named after initiator address and contain `ip` attribute
+                initiator_addr = read_sysfs_attribute(os.path.join(entry.path, 'ip'))
+
+    if initiator_addr is None:
+        return None
+
+    # Initiator alias is another name sent by initiator but we are unable to retrieve it in scst
+    session_dict = {
+        'initiator': session.name.rsplit('#', 1)[0],
+        'initiator_addr': initiator_addr,
+        'initiator_alias': None,
+        'target': target,
+        'target_alias': target.rsplit(':', 1)[-1],
+        'header_digest': None,
+        'data_digest': None,
+        'max_data_segment_length': None,
+        'max_receive_data_segment_length': None,
+        'max_xmit_data_segment_length': None,
+        'max_burst_length': None,
+        'first_burst_length': None,
+        'immediate_data': False,
+        'iser': False,
+        'offload': False,  # It is a chelsio NIC driver to offload iscsi, we are not using it so far
+    }
+    for name, path in attributes.items():
+        key, op = SESSION_ATTRIBUTES[name]
+        data = read_sysfs_attribute(path)
+        if data is not None and data != 'None':
+            session_dict[key] = op(data) if op else data
+
+    # We get recv/emit data segment length, keeping consistent with freebsd, we can
+    # take the maximum of two and show it for max_data_segment_length
+    if session_dict['max_xmit_data_segment_length'] and session_dict['max_receive_data_segment_length']:
+        session_dict['max_data_segment_length'] = max(
+            session_dict['max_receive_data_segment_length'], session_dict['max_xmit_data_segment_length']
+        )
+
+    return session_dict
+
+
+def read_sessions(base_path, basename):
+    sessions = []
+    try:
+        targets = list(os.scandir(base_path))
+    except FileNotFoundError:
+        # SCST is not running
+        return sessions
+
+    for target in targets:
+        if not target.name.startswith(basename) or not target.is_dir(follow_symlinks=False):
+            continue
+
+        try:
+            target_sessions = list(os.scandir(os.path.join(target.path, 'sessions')))
+        except FileNotFoundError:
+            continue
+
+        for session in target_sessions:
+            try:
+                session_dict = read_session(target.name, session)
+            except FileNotFoundError:
+                continue
+
+            if session_dict is not None:
+                sessions.append(session_dict)
+
+    return sessions
+
+
 class ISCSIGlobalService(Service):
 
     class Config:
         namespace = 'iscsi.global'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sessions_cache = None
+        self.sessions_cache_lock = threading.Lock()
+
     @filterable
     @filterable_returns(Dict(
         'session',
@@ -33,64 +138,28 @@ class ISCSIGlobalService(Service):
         """
         Get a list of currently running iSCSI sessions. This includes initiator and target names
         and the unique connection IDs.
+
+        Sessions are read at most every `options.extra.max_age` seconds (5 by default), more frequent queries
+        return the previous result.
         """
-        sessions = []
-        global_info = self.middleware.call_sync('iscsi.global.config')
-        base_path = '/sys/kernel/scst_tgt/targets/iscsi'
-        for target_dir in glob.glob(f'{base_path}/{global_info["basename"]}*'):
-            target = target_dir.rsplit('/', 1)[-1]
-            for session in os.listdir(os.path.join(target_dir, 'sessions')):
-                session_dir = os.path.join(target_dir, 'sessions', session)
-                ip_file = glob.glob(f'{session_dir}/*/ip')
-                if not ip_file:
-                    continue
-
-                # Initiator alias is another name sent by initiator but we are unable to retrieve it in scst
-                session_dict = {
-                    'initiator': session.rsplit('#', 1)[0],
-                    'initiator_alias': None,
-                    'target': target,
-                    'target_alias': target.rsplit(':', 1)[-1],
-                    'header_digest': None,
-                    'data_digest': None,
-                    'max_data_segment_length': None,
-                    'max_receive_data_segment_length': None,
-                    'max_xmit_data_segment_length': None,
-                    'max_burst_length': None,
-                    'first_burst_length': None,
-                    'immediate_data': False,
-                    'iser': False,
-                    'offload': False,  # It is a chelsio NIC driver to offload iscsi, we are not using it so far
-                }
-                with open(ip_file[0], 'r') as f:
-                    session_dict['initiator_addr'] = f.read().strip()
-                for k, f, op in (
-                    ('header_digest', 'HeaderDigest', None),
-                    ('data_digest', 'DataDigest', None),
-                    ('max_burst_length', 'MaxBurstLength', lambda i: int(i)),
-                    ('max_receive_data_segment_length', 'MaxRecvDataSegmentLength', lambda i: int(i)),
-                    ('max_xmit_data_segment_length', 'MaxXmitDataSegmentLength', lambda i: int(i)),
-                    ('first_burst_length', 'FirstBurstLength', lambda i: int(i)),
-                    ('immediate_data', 'ImmediateData', lambda i: True if i == 'Yes' else False),
-                ):
-                    f_path = os.path.join(session_dir, f)
-                    if os.path.exists(f_path):
-                        with open(f_path, 'r') as fd:
-                            data = fd.read().strip()
-                            if data != 'None':
-                                if op:
-                                    data = op(data)
-                                session_dict[k] = data
-
-                # We get recv/emit data segment length, keeping consistent with freebsd, we can
-                # take the maximum of two and show it for max_data_segment_length
-                if session_dict['max_xmit_data_segment_length'] and session_dict['max_receive_data_segment_length']:
-                    session_dict['max_data_segment_length'] = max(
-                        session_dict['max_receive_data_segment_length'], session_dict['max_xmit_data_segment_length']
-                    )
+        basename = self.middleware.call_sync('iscsi.global.config')['basename']
+        max_age = options['extra'].get('max_age', SESSIONS_MAX_AGE)
+        with self.sessions_cache_lock:
+            if (
+                self.sessions_cache is None or
+                self.sessions_cache[0] != basename or
+                self.sessions_cache[1] < time.monotonic() - max_age
+            ):
+                self.sessions_cache = (basename, time.monotonic(), read_sessions(SCST_ISCSI_TARGETS, basename))
 
-                sessions.append(session_dict)
-        return filter_list(sessions, filters, options)
+            sessions = self.sessions_cache[2]
+
+        return filter_list([session.copy() for session in sessions], filters, options)
+
+    @private
+    def sessions_cache_clear(self):
+        with self.sessions_cache_lock:
+            self.sessions_cache = None
 
     @private
     def resync_lun_size_for_zvol(self, id):
@@ -382,7 +382,7 @@ class iSCSITargetService(CRUDService):
 
         return [
             s['target'] for s in await self.middleware.call(
-                'iscsi.global.sessions', [['target', 'in', check_targets]]
+                'iscsi.global.sessions', [['target', 'in', check_targets]], {'extra': {'max_age': 0}}
             )
         ]
 
@@ -211,7 +211,7 @@ class PoolDatasetService(CRUDService):
         # Optimization for cases in which they can be filtered at zfs.dataset.query
         zfsfilters = []
         filters = filters or []
-        if len(filters) == 1 and len(filters[0]) == 3 and list(filters[0][:2]) == ['id', '=']:
+        if len(filters) == 1 and len(filters[0]) == 3 and list(filters[0][:2]) in (['id', '='], ['id', 'in']):
             zfsfilters.append(copy.deepcopy(filters[0]))
 
         internal_datasets_filters = self.middleware.call_sync('pool.dataset.internal_datasets_filters')
@@ -3,7 +3,7 @@ import os
 from middlewared.plugins.zfs_.utils import zvol_path_to_name
 from middlewared.service import Service, private
 from middlewared.schema import accepts, List, returns
-from middlewared.utils.osc.linux.mount import getmntinfo
+from middlewared.utils.osc.linux.mount import getmntent, getmntinfo
 
 
 class PoolDatasetService(Service):
@@ -205,13 +205,13 @@ class PoolDatasetService(Service):
         mnt_info = getmntinfo()
         info = self.build_details(mnt_info)
         for dataset in datasets:
-            self.collapse_datasets(dataset, info, mnt_info)
+            self.collapse_datasets(dataset, info)
 
         return datasets
 
     @private
-    def normalize_dataset(self, dataset, info, mnt_info):
-        atime, case, readonly = self.get_mntinfo(dataset, mnt_info)
+    def normalize_dataset(self, dataset, info):
+        atime, case, readonly = self.get_mntinfo(dataset)
         dataset['locked'] = dataset['locked']
         dataset['atime'] = atime
         dataset['casesensitive'] = case
@@ -228,10 +228,10 @@ class PoolDatasetService(Service):
         dataset['rsync_tasks_count'] = self.get_rsync_tasks_count(dataset, info['rsync'])
 
     @private
-    def collapse_datasets(self, dataset, info, mnt_info):
-        self.normalize_dataset(dataset, info, mnt_info)
+    def collapse_datasets(self, dataset, info):
+        self.normalize_dataset(dataset, info)
         for child in dataset.get('children', []):
-            self.collapse_datasets(child, info, mnt_info)
+            self.collapse_datasets(child, info)
 
     @private
     def get_mount_info(self, path, mntinfo):
@@ -248,10 +248,10 @@ class PoolDatasetService(Service):
         return mount_info
 
     @private
-    def get_mntinfo(self, ds, mntinfo):
+    def get_mntinfo(self, ds):
         atime = case = True
         readonly = False
-        for devid, info in filter(lambda x: x[1]['mountpoint'] == ds['mountpoint'], mntinfo.items()):
+        if ds['mountpoint'] and (info := getmntent(mountpoint=ds['mountpoint'])):
             atime = not ('NOATIME' in info['mount_opts'])
             readonly = 'RO' in info['mount_opts']
             case = any((i for i in ('CASESENSITIVE', 'CASEMIXED') if i in info['super_opts']))
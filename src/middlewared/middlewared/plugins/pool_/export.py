@@ -4,7 +4,6 @@ import shutil
 
 from middlewared.schema import accepts, Bool, Dict, Int, returns
 from middlewared.service import CallError, item_method, job, private, Service, ValidationError
-from middlewared.utils.asyncio_ import asyncio_map
 
 
 class PoolService(Service):
@@ -156,16 +155,14 @@ class PoolService(Service):
             job.set_progress(60, 'Destroying pool')
             await self.middleware.call('zfs.pool.delete', pool['name'])
 
-            async def unlabel(disk):
+            job.set_progress(80, 'Cleaning disks')
+            if disks:
                 wipe_job = await self.middleware.call(
-                    'disk.wipe', disk, 'QUICK', False, {'configure_swap': False}
+                    'disk.wipe_disks', disks, 'QUICK', False, {'configure_swap': False}
                 )
                 await wipe_job.wait()
                 if wipe_job.error:
-                    self.logger.warning('Failed to wipe disk %r: {%r}', disk, wipe_job.error)
-
-            job.set_progress(80, 'Cleaning disks')
-            await asyncio_map(unlabel, disks, limit=16)
+                    self.logger.warning('Failed to wipe disks: %r', wipe_job.error)
 
             if await self.middleware.call('failover.licensed'):
                 try:
@@ -11,6 +11,7 @@ from middlewared.service import accepts, CallError, CRUDService, job, private, r
 from middlewared.service_exception import InstanceNotFound
 from middlewared.validators import Range
 
+from .topology import TopologyContext
 from .utils import ZFS_CHECKSUM_CHOICES, ZFS_ENCRYPTION_ALGORITHM_CHOICES, ZPOOL_CACHE_FILE
 
 
@@ -132,6 +133,15 @@ class PoolService(CRUDService):
         Common method for `pool.pool_extend` and `boot.get_state` returning a uniform
         data structure for its consumers.
         """
+        zpool = await self.middleware.call('zfs.pool.query', [('name', '=', pool_name)])
+        return await self.middleware.call('pool.normalize_zpool_info', pool_name, zpool[0] if zpool else None)
+
+    @private
+    def normalize_zpool_info(self, pool_name, info, topology_context=None):
+        """
+        Does the work of `pool.pool_normalize_info` for already queried `zfs.pool.query` entry `info` (which is `None`
+        when the pool is not imported).
+        """
         rv = {
             'name': pool_name,
             'path': '/' if pool_name in BOOT_POOL_NAME_VALID else f'/mnt/{pool_name}',
@@ -160,12 +170,13 @@ class PoolService(CRUDService):
             'is_decrypted': True,
         }
 
-        if info := await self.middleware.call('zfs.pool.query', [('name', '=', pool_name)]):
-            info = info[0]
+        if info:
             rv.update({
                 'status': info['status'],
                 'scan': info['scan'],
-                'topology': await self.middleware.call('pool.transform_topology', info['groups']),
+                'topology': self.middleware.call_sync(
+                    'pool.transform_topology', info['groups'], None, topology_context,
+                ),
                 'healthy': info['healthy'],
                 'warning': info['warning'],
                 'status_detail': info['status_detail'],
@@ -185,8 +196,20 @@ class PoolService(CRUDService):
 
     @private
     def pool_extend_context(self, rows, extra):
+        zpools = {}
+        if rows:
+            # A single libzfs pass for all the pools instead of a `zfs.pool.query` call per pool
+            zpools = {
+                zpool['name']: zpool
+                for zpool in self.middleware.call_sync(
+                    'zfs.pool.query', [['name', 'in', [row['name'] for row in rows]]],
+                )
+            }
+
         return {
             "extra": extra,
+            "zpools": zpools,
+            "topology": TopologyContext(self.middleware),
         }
 
     @private
@@ -200,7 +223,7 @@ class PoolService(CRUDService):
             pool['is_upgraded'] = self.middleware.call_sync('pool.is_upgraded_by_name', pool['name'])
 
         # WebUI expects the same data as in `boot.get_state`
-        pool |= self.middleware.call_sync('pool.pool_normalize_info', pool['name'])
+        pool |= self.normalize_zpool_info(pool['name'], context['zpools'].get(pool['name']), context['topology'])
         return pool
 
     async def __convert_topology_to_vdevs(self, topology):
@@ -1,8 +1,37 @@
 from collections import deque
 
+from middlewared.plugins.disk_.disk_info import label_to_dev, label_to_disk
+from middlewared.plugins.disk_.zfs_guid import disks_by_zfs_guid
 from middlewared.service import private, Service
 
 
+class TopologyContext:
+    """
+    Resolves vdevs to disks for `pool.transform_topology`. A single context can be shared between multiple
+    topologies (i.e. for all pools returned by a single `pool.query` call) so that each label is only resolved once
+    and the disks database is only queried once.
+    """
+
+    def __init__(self, middleware):
+        self.middleware = middleware
+        self.labels = {}
+        self.disks_by_zfs_guid = None
+
+    def label(self, label):
+        if label not in self.labels:
+            self.labels[label] = label_to_dev(label), label_to_disk(label)
+
+        return self.labels[label]
+
+    def disk_by_zfs_guid(self, guid):
+        if self.disks_by_zfs_guid is None:
+            self.disks_by_zfs_guid = disks_by_zfs_guid(self.middleware.call_sync(
+                'disk.query', [['zfs_guid', '!=', None]], {'extra': {'include_expired': True}},
+            ))
+
+        return self.disks_by_zfs_guid.get(guid)
+
+
 class PoolService(Service):
 
     class Config:
@@ -24,20 +53,21 @@ class PoolService(Service):
         return await self.middleware.call('pool.transform_topology', x, {'device_disk': False, 'unavail_disk': False})
 
     @private
-    def transform_topology(self, x, options=None):
+    def transform_topology(self, x, options=None, context=None):
         """
         Transform topology output from libzfs to add `device` and make `type` uppercase.
+
+        `context` is a `TopologyContext` that can be shared between multiple calls.
         """
         options = options or {}
+        context = context or TopologyContext(self.middleware)
         if isinstance(x, dict):
             if options.get('device_disk', True):
                 path = x.get('path')
                 if path is not None:
                     device = disk = None
                     if path.startswith('/dev/'):
-                        args = [path[5:]]
-                        device = self.middleware.call_sync('disk.label_to_dev', *args)
-                        disk = self.middleware.call_sync('disk.label_to_disk', *args)
+                        device, disk = context.label(path[5:])
                     x['device'] = device
                     x['disk'] = disk
 
@@ -46,15 +76,15 @@ class PoolService(Service):
                 if guid is not None:
                     unavail_disk = None
                     if x.get('status') != 'ONLINE':
-                        unavail_disk = self.middleware.call_sync('disk.disk_by_zfs_guid', guid)
+                        unavail_disk = context.disk_by_zfs_guid(guid)
                     x['unavail_disk'] = unavail_disk
 
             for key in x:
                 if key == 'type' and isinstance(x[key], str):
                     x[key] = x[key].upper()
                 else:
-                    x[key] = self.transform_topology(x[key], dict(options, geom_scan=False))
+                    x[key] = self.transform_topology(x[key], dict(options, geom_scan=False), context)
         elif isinstance(x, list):
             for i, entry in enumerate(x):
-                x[i] = self.transform_topology(x[i], dict(options, geom_scan=False))
+                x[i] = self.transform_topology(x[i], dict(options, geom_scan=False), context)
         return x
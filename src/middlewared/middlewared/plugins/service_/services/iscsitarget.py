@@ -12,12 +12,19 @@ class ISCSITargetService(SimpleService):
     systemd_unit = "scst"
 
     async def after_start(self):
+        await self.middleware.call("iscsi.global.sessions_cache_clear")
         await self.middleware.call("iscsi.host.injection.start")
 
     async def before_stop(self):
         await self.middleware.call("iscsi.host.injection.stop")
 
+    async def after_stop(self):
+        await self.middleware.call("iscsi.global.sessions_cache_clear")
+
     async def reload(self):
         return (await run(
             ["scstadmin", "-noprompt", "-force", "-config", "/etc/scst.conf"], check=False
         )).returncode == 0
+
+    async def after_reload(self):
+        await self.middleware.call("iscsi.global.sessions_cache_clear")
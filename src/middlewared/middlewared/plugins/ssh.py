@@ -52,6 +52,7 @@ class SSHService(SystemServiceService):
         service = "ssh"
         datastore_prefix = "ssh_"
         cli_namespace = 'service.ssh'
+        config_cache = True
 
     ENTRY = Dict(
         'ssh_entry',
@@ -1,8 +1,8 @@
-import io
 import os
 import requests
 import shutil
 import tarfile
+import tempfile
 
 from middlewared.schema import accepts, returns
 from middlewared.service import CallError, job, private, Service
@@ -11,7 +11,7 @@ from ixdiagnose.config import conf
 from ixdiagnose.event import event_callbacks
 from ixdiagnose.run import generate_debug
 
-from .utils import DEBUG_MAX_SIZE, get_debug_execution_dir
+from .utils import get_debug_execution_dir
 
 
 class SystemService(Service):
@@ -82,33 +82,28 @@ class SystemService(Service):
                 # archive directly across the heartbeat
                 # interface which is point-to-point
                 proxies = {'http': '', 'https': ''}
-                standby_debug = io.BytesIO()
-                with requests.get(url, stream=True, proxies=proxies) as r:
-                    for i in r.iter_content(chunk_size=1048576):
-                        if standby_debug.tell() > DEBUG_MAX_SIZE * 1048576:
-                            raise CallError(f'Standby debug file is bigger than {DEBUG_MAX_SIZE}MiB.')
-                        standby_debug.write(i)
-
-        debug_job.wait_sync()
-        if debug_job.error:
-            raise CallError(debug_job.error)
-
-        job.set_progress(90, 'Preparing debug file for streaming')
-
-        if standby_debug:
-            # Debug file cannot be big on HA because we put both debugs in memory
-            # so they can be downloaded at once.
-            try:
-                if os.stat(debug_job.result).st_size > DEBUG_MAX_SIZE * 1048576:
-                    raise CallError(f'Debug file is bigger than {DEBUG_MAX_SIZE}MiB.')
-            except FileNotFoundError:
-                raise CallError('Debug file was not found, try again.')
+                # Standby debug is spooled to the system dataset instead of being kept in memory
+                system_dataset_path = self.middleware.call_sync('systemdataset.config')['path']
+                standby_debug = tempfile.TemporaryFile(dir=system_dataset_path or '/var/tmp')
+                try:
+                    with requests.get(url, stream=True, proxies=proxies) as r:
+                        r.raise_for_status()
+                        for i in r.iter_content(chunk_size=1048576):
+                            standby_debug.write(i)
+                except Exception:
+                    standby_debug.close()
+                    raise
+
+        try:
+            debug_job.wait_sync()
+            if debug_job.error:
+                raise CallError(debug_job.error)
 
-            network = self.middleware.call_sync('network.configuration.config')
-            node = self.middleware.call_sync('failover.node')
+            job.set_progress(90, 'Preparing debug file for streaming')
 
-            tario = io.BytesIO()
-            with tarfile.open(fileobj=tario, mode='w') as tar:
+            if standby_debug:
+                network = self.middleware.call_sync('network.configuration.config')
+                node = self.middleware.call_sync('failover.node')
 
                 if node == 'A':
                     my_hostname = network['hostname']
@@ -117,16 +112,22 @@ class SystemService(Service):
                     my_hostname = network['hostname_b']
                     remote_hostname = network['hostname']
 
-                tar.add(debug_job.result, f'{my_hostname}.txz')
-
-                tarinfo = tarfile.TarInfo(f'{remote_hostname}.txz')
-                tarinfo.size = standby_debug.tell()
-                standby_debug.seek(0)
-                tar.addfile(tarinfo, fileobj=standby_debug)
+                # Both debugs are streamed to the output as the tar file is being built
+                with tarfile.open(fileobj=job.pipes.output.w, mode='w|') as tar:
+                    try:
+                        tar.add(debug_job.result, f'{my_hostname}.txz')
+                    except FileNotFoundError:
+                        raise CallError('Debug file was not found, try again.')
+
+                    tarinfo = tarfile.TarInfo(f'{remote_hostname}.txz')
+                    tarinfo.size = standby_debug.tell()
+                    standby_debug.seek(0)
+                    tar.addfile(tarinfo, fileobj=standby_debug)
+            else:
+                with open(debug_job.result, 'rb') as f:
+                    shutil.copyfileobj(f, job.pipes.output.w)
+        finally:
+            if standby_debug:
+                standby_debug.close()
 
-            tario.seek(0)
-            shutil.copyfileobj(tario, job.pipes.output.w)
-        else:
-            with open(debug_job.result, 'rb') as f:
-                shutil.copyfileobj(f, job.pipes.output.w)
         job.pipes.output.w.close()
@@ -1,19 +1,64 @@
 # -*- coding=utf-8 -*-
 import errno
+import hashlib
 import itertools
+import json
 import os
-import subprocess
 import time
 
 import requests
 import requests.exceptions
 
 from middlewared.service import CallError, private, Service
-from middlewared.utils import osc
 from middlewared.utils.size import format_size
 
 from .utils import scale_update_server
 
+CHUNK_SIZE = 8 * 1024 * 1024
+PROGRESS_INTERVAL = 1  # seconds between progress updates
+# Connection reset or timed out in the middle of the download
+RECOVERABLE_ERRORS = (
+    requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+)
+
+
+def read_download_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_download_state(path, state):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f)
+
+    os.rename(f"{path}.tmp", path)
+
+
+def unlink_download(dst, state_path):
+    for path in (dst, state_path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def hash_file(path, hasher, job, description):
+    size = os.path.getsize(path)
+    read = 0
+    last_progress_at = time.monotonic()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            read += len(chunk)
+            if time.monotonic() - last_progress_at >= PROGRESS_INTERVAL:
+                last_progress_at = time.monotonic()
+                job.set_progress(0, f"{description}: {format_size(read)} of {format_size(size)}")
+
+    return read
+
 
 class UpdateService(Service):
     @private
@@ -23,21 +68,37 @@ class UpdateService(Service):
         train_check = self.middleware.call_sync("update.check_train", train)
         if train_check["status"] == "AVAILABLE":
             dst = os.path.join(location, "update.sqsh")
+            # Download state is kept alongside the update file. It tells which update the (possibly partially
+            # downloaded) file belongs to and whether it has already been verified so that it does not have to be
+            # read again
+            state_path = f"{dst}.state"
+            state = read_download_state(state_path)
+            hasher = hashlib.sha256()
             if os.path.exists(dst):
-                job.set_progress(0, "Verifying existing update")
-                if osc.IS_FREEBSD:
-                    checksum = subprocess.run(
-                        ["sha256", dst], stdout=subprocess.PIPE, encoding="utf-8"
-                    ).stdout.split()[-1]
-                else:
-                    checksum = subprocess.run(
-                        ["sha256sum", dst], stdout=subprocess.PIPE, encoding="utf-8"
-                    ).stdout.split()[0]
+                st = os.stat(dst)
+                if (
+                    state.get("verified") and state.get("checksum") == train_check["checksum"] and
+                    state.get("size") == st.st_size and state.get("mtime_ns") == st.st_mtime_ns
+                ):
+                    return True
+
+                # hashlib does not allow exporting the hash state so the part of the file that is already there has
+                # to be hashed, but it is only read once: if it is a partial download of the same update, it is
+                # resumed with this hash state
+                size = hash_file(dst, hasher, job, "Verifying existing update")
+                checksum = hasher.hexdigest()
                 if checksum == train_check["checksum"]:
+                    self._set_download_verified(dst, state_path, checksum)
                     return True
 
-                self.middleware.logger.warning("Invalid update file checksum %r, re-downloading", checksum)
-                os.unlink(dst)
+                if state.get("checksum") == train_check["checksum"] and size < train_check["filesize"]:
+                    self.middleware.logger.info("Resuming update download from %d bytes", size)
+                else:
+                    self.middleware.logger.warning("Invalid update file checksum %r, re-downloading", checksum)
+                    unlink_download(dst, state_path)
+                    hasher = hashlib.sha256()
+
+            write_download_state(state_path, {"checksum": train_check["checksum"], "verified": False})
 
             st = os.statvfs(location)
             avail = st.f_bavail * st.f_frsize
@@ -53,6 +114,7 @@ class UpdateService(Service):
             for i in itertools.count(1):
                 with open(dst, "ab") as f:
                     download_start = time.monotonic()
+                    last_progress_at = None
                     progress = None
                     try:
                         start = os.path.getsize(dst)
@@ -63,20 +125,34 @@ class UpdateService(Service):
                             headers={"Range": f"bytes={start}-"}
                         ) as r:
                             r.raise_for_status()
+                            if start and r.status_code != requests.codes.partial_content:
+                                # Server does not support ranges, the whole file is being sent
+                                f.seek(0)
+                                f.truncate()
+                                hasher = hashlib.sha256()
+                                start = 0
+
                             total = start + int(r.headers["Content-Length"])
-                            for chunk in r.iter_content(chunk_size=8 * 1024 * 1024):
+                            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
                                 progress = f.tell()
 
-                                job.set_progress(
-                                    progress / total * progress_proportion,
-                                    f'Downloading update: {format_size(total)} at '
-                                    f'{format_size(progress / (time.monotonic() - download_start))}/s'
-                                )
+                                now = time.monotonic()
+                                if last_progress_at is None or now - last_progress_at >= PROGRESS_INTERVAL:
+                                    last_progress_at = now
+                                    job.set_progress(
+                                        progress / total * progress_proportion,
+                                        f'Downloading update: {format_size(total)} at '
+                                        f'{format_size((progress - start) / max(now - download_start, 0.001))}/s'
+                                    )
 
                                 f.write(chunk)
+                                hasher.update(chunk)
                             break
                     except Exception as e:
-                        if i < 5 and progress and any(ee in str(e) for ee in ("ECONNRESET", "ETIMEDOUT")):
+                        if i < 5 and progress and (
+                            isinstance(e, RECOVERABLE_ERRORS) or
+                            any(ee in str(e) for ee in ("ECONNRESET", "ETIMEDOUT"))
+                        ):
                             self.middleware.logger.warning("Recoverable update download error: %r", e)
                             time.sleep(2)
                             continue
@@ -85,9 +161,21 @@ class UpdateService(Service):
 
             size = os.path.getsize(dst)
             if size != total:
-                os.unlink(dst)
+                unlink_download(dst, state_path)
                 raise CallError(f'Downloaded update file mismatch ({size} != {total})')
 
+            checksum = hasher.hexdigest()
+            if checksum != train_check["checksum"]:
+                unlink_download(dst, state_path)
+                raise CallError(f'Downloaded update file checksum mismatch ({checksum} != {train_check["checksum"]})')
+
+            self._set_download_verified(dst, state_path, checksum)
             return True
 
         return False
+
+    def _set_download_verified(self, dst, state_path, checksum):
+        st = os.stat(dst)
+        write_download_state(state_path, {
+            "checksum": checksum, "verified": True, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+        })
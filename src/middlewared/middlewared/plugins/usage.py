@@ -8,9 +8,11 @@ from collections import defaultdict
 from datetime import datetime
 
 from middlewared.service import Service
+from middlewared.utils import filter_list
 from middlewared.utils.osc import getmntinfo
 
 USAGE_URL = 'https://usage.truenas.com/submit'
+GATHER_CONCURRENCY = 4  # gatherers run at once
 
 
 class UsageService(Service):
@@ -95,6 +97,8 @@ class UsageService(Service):
             'total_zvols': 0,
             'services': [],
             'mntinfo': getmntinfo(),
+            # Results of the queries shared by the gatherers
+            'queries': {},
         }
         for i in self.middleware.call_sync('datastore.query', 'services.services', [], {'prefix': 'srv_'}):
             context['services'].append({'name': i['service'], 'enabled': i['enable']})
@@ -120,38 +124,58 @@ class UsageService(Service):
 
         return context
 
-    def gather(self, restrict_usage=None):
-        context = self.get_gather_context()
+    async def gather(self, restrict_usage=None):
+        context = await self.middleware.run_in_thread(self.get_gather_context)
         restrict_usage = restrict_usage or []
+        semaphore = asyncio.Semaphore(GATHER_CONCURRENCY)
+
+        async def gather_stats(func):
+            async with semaphore:
+                try:
+                    return await self.middleware.call(f'usage.{func}', context)
+                except Exception as e:
+                    self.logger.error('Failed to gather stats from %r: %s', func, e, exc_info=True)
+                    return {}
 
         usage_stats = {}
-        for func in filter(
-            lambda f: (
-                f.startswith('gather_') and callable(getattr(self, f)) and (not restrict_usage or f in restrict_usage)
-            ),
-            dir(self)
-        ):
-            try:
-                stats = self.middleware.call_sync(f'usage.{func}', context)
-            except Exception as e:
-                self.logger.error('Failed to gather stats from %r: %s', func, e, exc_info=True)
-            else:
-                usage_stats.update(stats)
+        for stats in await asyncio.gather(*[
+            gather_stats(func)
+            for func in filter(
+                lambda f: (
+                    f.startswith('gather_') and callable(getattr(self, f)) and
+                    (not restrict_usage or f in restrict_usage)
+                ),
+                dir(self)
+            )
+        ]):
+            usage_stats.update(stats)
 
         return usage_stats
 
+    async def _query_once(self, context, method, *args):
+        """
+        Calls `method` once for all the gatherers that need its result.
+        """
+        key = (method, json.dumps(args, sort_keys=True))
+        if key not in context['queries']:
+            context['queries'][key] = self.middleware.create_task(self.middleware.call(method, *args))
+
+        return await context['queries'][key]
+
     def gather_total_capacity(self, context):
         return {'total_capacity': context['total_capacity']}
 
-    def gather_backup_data(self, context):
+    async def gather_backup_data(self, context):
         backed = {'cloudsync': 0, 'rsynctask': 0, 'zfs_replication': 0, 'total_size': 0}
         filters = [['enabled', '=', True], ['direction', '=', 'PUSH'], ['locked', '=', False]]
         tasks_found = {'cloudsync': set(), 'rsynctask': set()}
         for namespace in ('cloudsync', 'rsynctask'):
             opposite_namespace = 'rsynctask' if namespace == 'cloudsync' else 'cloudsync'
-            for task in self.middleware.call_sync(f'{namespace}.query', filters):
+            for task in filter_list(await self._query_once(context, f'{namespace}.query'), filters):
                 try:
-                    task_ds = self.middleware.call_sync('zfs.dataset.path_to_dataset', task['path'], context['mntinfo'])
+                    task_ds = await self.middleware.call(
+                        'zfs.dataset.path_to_dataset', task['path'], context['mntinfo']
+                    )
                 except Exception:
                     self.logger.error('Failed mapping path %r to dataset', task['path'], exc_info=True)
                 else:
@@ -170,7 +194,7 @@ class UsageService(Service):
 
         repls_found = set()
         filters = [['enabled', '=', True], ['transport', '!=', 'LOCAL'], ['direction', '=', 'PUSH']]
-        for task in self.middleware.call_sync('replication.query', filters):
+        for task in await self.middleware.call('replication.query', filters):
             for source in filter(lambda s: s in context['datasets'] and s not in repls_found, task['source_datasets']):
                 size = context['datasets'][source]['properties']['used']['parsed']
                 backed['zfs_replication'] += size
@@ -222,7 +246,7 @@ class UsageService(Service):
         return {
             'cloud_services': list({
                 t['credentials']['provider']
-                for t in await self.middleware.call('cloudsync.query', [['enabled', '=', True]])
+                for t in filter_list(await self._query_once(context, 'cloudsync.query'), [['enabled', '=', True]])
             })
         }
 
@@ -384,6 +408,7 @@ class UsageService(Service):
 
     async def gather_sharing(self, context):
         sharing_list = []
+        iscsi_targets = iscsi_extents = None
         for service in {'iscsi', 'nfs', 'smb', 'webdav'}:
             service_upper = service.upper()
             namespace = f'sharing.{service}' if service != 'iscsi' else 'iscsi.targetextent'
@@ -407,8 +432,12 @@ class UsageService(Service):
                 elif service == 'webdav':
                     sharing_list.append({'type': service_upper, 'readonly': s['ro'], 'changeperms': s['perm']})
                 elif service == 'iscsi':
-                    tar = await self.middleware.call('iscsi.target.query', [('id', '=', s['target'])], {'get': True})
-                    ext = await self.middleware.call('iscsi.extent.query', [('id', '=', s['extent'])], {'get': True})
+                    if iscsi_targets is None:
+                        iscsi_targets = {t['id']: t for t in await self.middleware.call('iscsi.target.query')}
+                        iscsi_extents = {e['id']: e for e in await self.middleware.call('iscsi.extent.query')}
+
+                    tar = iscsi_targets[s['target']]
+                    ext = iscsi_extents[s['extent']]
                     sharing_list.append({
                         'type': service_upper,
                         'mode': tar['mode'],
@@ -43,9 +43,10 @@ class LibvirtConnectionMixin:
             # We see isAlive call failed for a user in NAS-109072, it would be better
             # if we handle this to ensure that system recognises libvirt  connection
             # is no longer active and a new one should be initiated.
-            return (
+            # `getLibVersion` makes a round trip to libvirtd without enumerating all the domains.
+            return bool(
                 self.LIBVIRT_CONNECTION and self.LIBVIRT_CONNECTION.isAlive() and
-                isinstance(self.LIBVIRT_CONNECTION.listAllDomains(), list)
+                self.LIBVIRT_CONNECTION.getLibVersion()
             )
         return False
 
@@ -53,6 +54,16 @@ class LibvirtConnectionMixin:
         with contextlib.suppress(libvirt.libvirtError):
             return {domain.name(): domain.state() for domain in self.LIBVIRT_CONNECTION.listAllDomains()}
 
+    def _domains_states(self):
+        """
+        Returns `{domain name: (state, active)}` for all the libvirt domains, retrieved in a single call.
+        """
+        return {
+            # Both domain name and ID come with the stats, retrieving them does not make any more calls
+            domain.name(): (stats['state.state'], domain.ID() != -1)
+            for domain, stats in self.LIBVIRT_CONNECTION.getAllDomainStats(libvirt.VIR_DOMAIN_STATS_STATE)
+        }
+
     def _is_connection_alive(self):
         return self._is_kvm_supported() and self._is_libvirt_connection_alive()
 
@@ -6,67 +6,48 @@ from middlewared.service import private, Service
 from .connection import LibvirtConnectionMixin
 
 
+VM_STATE_MAPPING = {
+    0: 'NOSTATE',
+    1: 'RUNNING',
+    2: 'BLOCKED',
+    3: 'SUSPENDED',  # Actual libvirt event here is PAUSED
+    4: 'SHUTDOWN',
+    5: 'SHUTOFF',
+    6: 'CRASHED',
+    7: 'PMSUSPENDED',
+}
+
+
 class VMService(Service, LibvirtConnectionMixin):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # libvirt domain name => VM id
+        self.libvirt_domains = {}
+        # libvirt domain name => (domain, event, detail) of the latest event that has not been processed yet
+        self.libvirt_events = {}
+        self.libvirt_events_task = None
+
+    @private
+    def libvirt_domain_register(self, vm):
+        self.libvirt_domains[f'{vm["id"]}_{vm["name"]}'] = vm['id']
+
+    @private
+    def libvirt_domain_unregister(self, vm):
+        self.libvirt_domains.pop(f'{vm["id"]}_{vm["name"]}', None)
+
     @private
     def setup_libvirt_events(self):
         self._check_setup_connection()
 
-        def callback(conn, dom, event, detail, opaque):
-            """
-            0: 'DEFINED',
-            1: 'UNDEFINED',
-            2: 'STARTED',
-            3: 'SUSPENDED',
-            4: 'RESUMED',
-            5: 'STOPPED',
-            6: 'SHUTDOWN',
-            7: 'PMSUSPENDED'
-            Above is event mapping for internal reference
-            """
-            vm_id = dom.name().split('_')[0]
-            vm = None
-            if vm_id.isdigit():
-                if vms := self.middleware.call_sync('vm.query', [['id', '=', int(vm_id)]], {'force_sql_filters': True}):
-                    if dom.name() == f'{vms[0]["id"]}_{vms[0]["name"]}':
-                        vm = vms[0]
-
-            if vm is None:
-                emit_type = 'REMOVED'
-            elif event == 0:
-                emit_type = 'ADDED'
-            else:
-                emit_type = 'CHANGED'
-
-            vm_state_mapping = {
-                0: 'NOSTATE',
-                1: 'RUNNING',
-                2: 'BLOCKED',
-                3: 'SUSPENDED',  # Actual libvirt event here is PAUSED
-                4: 'SHUTDOWN',
-                5: 'SHUTOFF',
-                6: 'CRASHED',
-                7: 'PMSUSPENDED',
-            }
-            try:
-                if event == 1:
-                    if emit_type == 'REMOVED':
-                        state = 'NOSTATE'
-                    else:
-                        # We undefine/define domain numerous times based on if vm has any new changes
-                        # registered, this is going to reflect that
-                        state = 'UPDATING CONFIGURATION'
-                else:
-                    state = vm_state_mapping.get(dom.state()[0], 'UNKNOWN')
-            except libvirt.libvirtError:
-                state = 'UNKNOWN'
+        self.libvirt_domains = {
+            f'{vm["id"]}_{vm["name"]}': vm['id'] for vm in self.middleware.call_sync('datastore.query', 'vm.vm')
+        }
 
-            # We do not send an event on removed because that would already be done by vm.delete
-            if vm is not None:
-                vm['status']['state'] = state
-                self.middleware.send_event(
-                    'vm.query', emit_type, id=int(vm_id), fields=vm, state=vm_state_mapping.get(event, 'UNKNOWN')
-                )
+        def callback(conn, dom, event, detail, opaque):
+            # This runs in libvirt event loop thread which must not be blocked, events are processed in the
+            # middleware event loop
+            self.middleware.loop.call_soon_threadsafe(self._libvirt_event, dom.name(), dom, event, detail)
 
         def event_loop_execution():
             while self.LIBVIRT_CONNECTION and self.LIBVIRT_CONNECTION._o and self.LIBVIRT_CONNECTION.isAlive():
@@ -77,3 +58,70 @@ class VMService(Service, LibvirtConnectionMixin):
         event_thread.start()
         self.LIBVIRT_CONNECTION.domainEventRegister(callback, None)
         self.LIBVIRT_CONNECTION.setKeepAlive(5, 3)
+
+    def _libvirt_event(self, name, dom, event, detail):
+        # Only the latest event for each domain matters, the ones that are still pending are superseded by it
+        self.libvirt_events[name] = (dom, event, detail)
+        if self.libvirt_events_task is None:
+            self.libvirt_events_task = self.middleware.create_task(self._process_libvirt_events())
+
+    async def _process_libvirt_events(self):
+        try:
+            while self.libvirt_events:
+                events, self.libvirt_events = self.libvirt_events, {}
+                try:
+                    await self._process_libvirt_events_batch(events)
+                except Exception:
+                    self.logger.error('Unhandled exception while processing libvirt events', exc_info=True)
+        finally:
+            self.libvirt_events_task = None
+
+    async def _process_libvirt_events_batch(self, events):
+        """
+        0: 'DEFINED',
+        1: 'UNDEFINED',
+        2: 'STARTED',
+        3: 'SUSPENDED',
+        4: 'RESUMED',
+        5: 'STOPPED',
+        6: 'SHUTDOWN',
+        7: 'PMSUSPENDED'
+        Above is event mapping for internal reference
+        """
+        # Events for domains that do not belong to any VM are not sent. Neither are events for removed VMs
+        # because that would already be done by vm.delete
+        events = {
+            vm_id: (dom, event)
+            for name, (dom, event, detail) in events.items()
+            if (vm_id := self.libvirt_domains.get(name)) is not None
+        }
+        if not events:
+            return
+
+        vms = await self.middleware.call('vm.query', [['id', 'in', list(events)]], {'force_sql_filters': True})
+        states = await self.middleware.run_in_thread(self._libvirt_events_states, {
+            vm['id']: events[vm['id']] for vm in vms
+        })
+        for vm in vms:
+            event = events[vm['id']][1]
+            vm['status']['state'] = states[vm['id']]
+            self.middleware.send_event(
+                'vm.query', 'ADDED' if event == 0 else 'CHANGED', id=vm['id'], fields=vm,
+                state=VM_STATE_MAPPING.get(event, 'UNKNOWN'),
+            )
+
+    def _libvirt_events_states(self, events):
+        states = {}
+        for vm_id, (dom, event) in events.items():
+            if event == 1:
+                # We undefine/define domain numerous times based on if vm has any new changes
+                # registered, this is going to reflect that
+                states[vm_id] = 'UPDATING CONFIGURATION'
+                continue
+
+            try:
+                states[vm_id] = VM_STATE_MAPPING.get(dom.state()[0], 'UNKNOWN')
+            except libvirt.libvirtError:
+                states[vm_id] = 'UNKNOWN'
+
+        return states
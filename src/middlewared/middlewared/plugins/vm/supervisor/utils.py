@@ -1,5 +1,7 @@
+import contextlib
 import enum
 import libvirt
+import os
 
 from middlewared.plugins.vm.utils import create_element  # noqa
 
@@ -13,3 +15,24 @@ class DomainState(enum.Enum):
     SHUTOFF = libvirt.VIR_DOMAIN_SHUTOFF
     CRASHED = libvirt.VIR_DOMAIN_CRASHED
     PMSUSPENDED = libvirt.VIR_DOMAIN_PMSUSPENDED
+
+
+def domain_status(libvirt_domain_name, state, active):
+    domain_state = DomainState(state)
+    if active:
+        status = 'SUSPENDED' if domain_state == DomainState.PAUSED else 'RUNNING'
+    else:
+        status = 'STOPPED'
+
+    data = {
+        'state': status,
+        'pid': None,
+        'domain_state': domain_state.name,
+    }
+    if domain_state in (DomainState.PAUSED, DomainState.RUNNING):
+        with contextlib.suppress(FileNotFoundError):
+            # Do not make a stat call to check if file exists or not
+            with open(os.path.join('/var/run/libvirt', 'qemu', f'{libvirt_domain_name}.pid'), 'r') as f:
+                data['pid'] = int(f.read())
+
+    return data
@@ -1,14 +1,49 @@
+import libvirt
 import psutil
 
 from middlewared.schema import accepts, Bool, Dict, Int, returns, Str
 from middlewared.service import CallError, Service
 from middlewared.validators import MACAddr
 
+from .connection import LibvirtConnectionMixin
 from .devices import NIC
 from .utils import ACTIVE_STATES
 
 
-class VMService(Service):
+class VMService(Service, LibvirtConnectionMixin):
+
+    def _guests_memory(self, memory_usage):
+        """
+        Returns `(guest, active, memory usage in bytes)` for all the guests. Guests and their domains are retrieved
+        at once instead of querying the status of each guest separately. Memory usage is only retrieved for active
+        guests if `memory_usage` is set and is `None` otherwise.
+        """
+        guests = self.middleware.call_sync('datastore.query', 'vm.vm')
+        domains = {}
+        if guests:
+            self._check_setup_connection()
+            try:
+                domains = {
+                    domain.name(): domain
+                    for domain, stats in self.LIBVIRT_CONNECTION.getAllDomainStats(libvirt.VIR_DOMAIN_STATS_STATE)
+                    if domain.ID() != -1
+                }
+            except libvirt.libvirtError:
+                self.logger.debug('Failed to retrieve libvirt domains states', exc_info=True)
+
+        result = []
+        for guest in guests:
+            domain = domains.get(f'{guest["id"]}_{guest["name"]}')
+            usage = None
+            if memory_usage and domain is not None:
+                try:
+                    usage = domain.memoryStats()['actual'] * 1024
+                except Exception:
+                    self.logger.error('Unable to retrieve %r vm memory usage', guest['name'], exc_info=True)
+
+            result.append((guest, domain is not None, usage))
+
+        return result
 
     @accepts()
     @returns(Dict(
@@ -27,10 +62,8 @@ class VMService(Service):
                 RPRD - Running and provisioned
         """
         memory_allocation = {'RNP': 0, 'PRD': 0, 'RPRD': 0}
-        guests = await self.middleware.call('datastore.query', 'vm.vm')
-        for guest in guests:
-            status = await self.middleware.call('vm.status', guest['id'])
-            if status['state'] in ACTIVE_STATES:
+        for guest, active, usage in await self.middleware.run_in_thread(self._guests_memory, False):
+            if active:
                 memory_allocation['RPRD' if guest['autostart'] else 'RNP'] += guest['memory'] * 1024 * 1024
             elif guest['autostart']:
                 memory_allocation['PRD'] += guest['memory'] * 1024 * 1024
@@ -76,17 +109,14 @@ class VMService(Service):
             # If overcommit is not wanted its verified how much physical memory
             # the vm process is currently using and add the maximum memory its
             # supposed to have.
-            for vm in await self.middleware.call('vm.query', [['status.state', 'in', ACTIVE_STATES]]):
-                try:
-                    current_vm_mem = await self.middleware.call('vm.get_memory_usage_internal', vm)
-                except Exception:
-                    self.logger.error('Unable to retrieve %r vm memory usage', vm['name'], exc_info=True)
+            for vm, active, current_vm_mem in await self.middleware.run_in_thread(self._guests_memory, True):
+                if current_vm_mem is None:
                     continue
-                else:
-                    vm_max_mem = vm['memory'] * 1024 * 1024
-                    # We handle edge case with vm_max_mem < current_vm_mem
-                    if vm_max_mem > current_vm_mem:
-                        vms_memory_used += vm_max_mem - current_vm_mem
+
+                vm_max_mem = vm['memory'] * 1024 * 1024
+                # We handle edge case with vm_max_mem < current_vm_mem
+                if vm_max_mem > current_vm_mem:
+                    vms_memory_used += vm_max_mem - current_vm_mem
 
         return max(0, total_free - vms_memory_used - swap_used)
 
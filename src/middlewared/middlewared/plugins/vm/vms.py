@@ -1,6 +1,7 @@
 import asyncio
 import errno
 import functools
+import libvirt
 import os
 import re
 import shlex
@@ -14,6 +15,7 @@ from middlewared.service import CallError, CRUDService, item_method, private
 from middlewared.validators import Range, UUID
 from middlewared.plugins.vm.numeric_set import parse_numeric_set, NumericSet
 
+from .supervisor.utils import domain_status
 from .utils import ACTIVE_STATES
 from .vm_supervisor import VMSupervisorMixin
 
@@ -96,11 +98,23 @@ class VMService(CRUDService, VMSupervisorMixin):
     @private
     def extend_context(self, rows, extra):
         status = {}
+        devices = {row['id']: [] for row in rows}
+        domains = None
         if rows:
             self._check_setup_connection()
+            try:
+                domains = self._domains_states()
+            except libvirt.libvirtError:
+                self.logger.debug('Failed to retrieve libvirt domains states', exc_info=True)
+
+            for device in self.middleware.call_sync(
+                'vm.device.query', [('vm', 'in', list(devices))], {'force_sql_filters': True},
+            ):
+                devices[device['vm']].append(device)
+
         for row in rows:
-            status[row['id']] = self.status_impl(row)
-        return {'status': status}
+            status[row['id']] = self.status_impl(row, domains)
+        return {'status': status, 'devices': devices}
 
     @accepts()
     @returns(Dict(
@@ -114,11 +128,7 @@ class VMService(CRUDService, VMSupervisorMixin):
 
     @private
     async def extend_vm(self, vm, context):
-        vm['devices'] = await self.middleware.call(
-            'vm.device.query',
-            [('vm', '=', vm['id'])],
-            {'force_sql_filters': True},
-        )
+        vm['devices'] = context['devices'][vm['id']]
         vm['status'] = context['status'][vm['id']]
         return vm
 
@@ -197,6 +207,7 @@ class VMService(CRUDService, VMSupervisorMixin):
         verrors.check()
 
         vm_id = await self.middleware.call('datastore.insert', 'vm.vm', data)
+        await self.middleware.call('vm.libvirt_domain_register', {'id': vm_id, 'name': data['name']})
         await self.middleware.run_in_thread(self._add, vm_id)
         await self.middleware.call('etc.generate', 'libvirt_guests')
 
@@ -362,6 +373,8 @@ class VMService(CRUDService, VMSupervisorMixin):
 
         vm_data = await self.get_instance(id)
         if new['name'] != old['name']:
+            await self.middleware.call('vm.libvirt_domain_unregister', old)
+            await self.middleware.call('vm.libvirt_domain_register', vm_data)
             await self.middleware.run_in_thread(self._rename_domain, old, vm_data)
 
         if old['shutdown_timeout'] != new['shutdown_timeout']:
@@ -429,6 +442,7 @@ class VMService(CRUDService, VMSupervisorMixin):
             for device in vm['devices']:
                 await self.middleware.call('vm.device.delete', device['id'], {'force': data['force']})
             result = await self.middleware.call('datastore.delete', 'vm.vm', id)
+            await self.middleware.call('vm.libvirt_domain_unregister', vm)
             if not await self.middleware.call('vm.query'):
                 await self.middleware.call('vm.deinitialize_vms')
                 self._clear()
@@ -457,7 +471,12 @@ class VMService(CRUDService, VMSupervisorMixin):
         return self.status_impl(vm)
 
     @private
-    def status_impl(self, vm):
+    def status_impl(self, vm, domains=None):
+        # `domains` are states of all the libvirt domains retrieved at once by `vm.query`
+        supervisor = self.vms.get(vm['name'])
+        if supervisor is not None and domains is not None and supervisor.libvirt_domain_name in domains:
+            return domain_status(supervisor.libvirt_domain_name, *domains[supervisor.libvirt_domain_name])
+
         if self._has_domain(vm['name']):
             try:
                 # Whatever happens, query shouldn't fail
@@ -4,6 +4,10 @@ import time
 
 from middlewared.utils.threading import set_thread_name, start_daemon_thread
 
+# Events arriving within this window (in seconds) after the first one are delivered to
+# `zfs.pool.events` hooks as a single batch
+EVENTS_BATCH_WINDOW = 0.25
+
 
 def zfs_events(child_conn):
     with libzfs.ZFS() as zfs:
@@ -11,6 +15,42 @@ def zfs_events(child_conn):
             child_conn.send(event)
 
 
+def zfs_event_key(event):
+    """
+    Events with the same key are duplicates of each other within a batch and only the most recent one is kept.
+    Besides (pool, class) this includes the event subject (dataset for history events, vdev for device events)
+    so that distinct datasets or vdevs are not collapsed together.
+    """
+    return (
+        event.get('pool'), event.get('class'), event.get('history_dsname'), event.get('history_internal_name'),
+        event.get('vdev_path'),
+    )
+
+
+def coalesce_zfs_events(events):
+    batch = {}
+    for event in events:
+        key = zfs_event_key(event)
+        # Re-insert so that the batch preserves the order of the most recent occurrence of every event
+        batch.pop(key, None)
+        batch[key] = event
+
+    return list(batch.values())
+
+
+def receive_zfs_events(conn, window=EVENTS_BATCH_WINDOW):
+    """
+    Block until an event arrives and then keep reading events for `window` seconds.
+    Returns coalesced list of received events.
+    """
+    events = [conn.recv()]
+    deadline = time.monotonic() + window
+    while (remaining := deadline - time.monotonic()) > 0 and conn.poll(remaining):
+        events.append(conn.recv())
+
+    return coalesce_zfs_events(events)
+
+
 def setup_zfs_events_process(middleware):
     set_thread_name('retrieve_zfs_events_thread')
     while True:
@@ -27,7 +67,7 @@ def setup_zfs_events_process(middleware):
         try:
             events_process.start()
             while True:
-                middleware.call_hook_sync('zfs.pool.events', data=parent_conn.recv())
+                middleware.call_hook_sync('zfs.pool.events', data=receive_zfs_events(parent_conn))
         except Exception as e:
             if middleware.call_sync('system.state') != 'SHUTTING_DOWN':
                 middleware.logger.error('Failed to retrieve ZFS events: %s', str(e))
@@ -27,6 +27,13 @@ class ZFSPoolService(CRUDService):
                     pools = [zfs.get(filters[0][2]).asdict(**state_kwargs)]
                 except libzfs.ZFSException:
                     pools = []
+            elif filters and len(filters) == 1 and list(filters[0][:2]) in (['id', 'in'], ['name', 'in']):
+                pools = []
+                for name in filters[0][2]:
+                    try:
+                        pools.append(zfs.get(name).asdict(**state_kwargs))
+                    except libzfs.ZFSException:
+                        pass
             else:
                 pools = [i.asdict(**state_kwargs) for i in zfs.pools]
         return filter_list(pools, filters, options)
@@ -110,15 +110,36 @@ async def scrub_finished(middleware, pool_name):
 deadman_throttle = defaultdict(list)
 
 
-async def retrieve_pool_from_db(middleware, pool_name):
-    pool = await middleware.call('pool.query', [['name', '=', pool_name]])
-    if not pool:
-        # If we have no record of the pool, let's skip sending any event please
-        return
-    return pool[0]
+async def zfs_events(middleware, data):
+    """
+    `data` is a list of coalesced events received within one batch window. Pool and dataset
+    refreshes are accumulated over the whole batch so that each affected pool is queried once.
+    """
+    changed_pools = set()
+    changed_datasets = {}
+    context = {'disks': None, 'pools_statuses_popped': False, 'swaps_configured': False}
+    for event in data:
+        await zfs_event(middleware, event, changed_pools, changed_datasets, context)
+
+    if changed_pools:
+        for pool in await middleware.call('pool.query', [['name', 'in', list(changed_pools)]]):
+            middleware.send_event('pool.query', 'CHANGED', id=pool['id'], fields=pool)
+
+    if changed_datasets:
+        for ds_data in await middleware.call('pool.dataset.query', [['id', 'in', list(changed_datasets)]]):
+            # Datasets that are missing here were either system datasets which were filtered out by
+            # pool.dataset service or got deleted in a race condition which is still fine as destroy
+            # event will catch that
+            if (event_type := changed_datasets.get(ds_data['id'])) is None:
+                continue
+
+            middleware.send_event(
+                'pool.dataset.query', 'ADDED' if event_type == 'create' else 'CHANGED', id=ds_data['id'],
+                fields=ds_data,
+            )
 
 
-async def zfs_events(middleware, data):
+async def zfs_event(middleware, data, changed_pools, changed_datasets, context):
     event_id = data['class']
     if event_id in ('sysevent.fs.zfs.resilver_start', 'sysevent.fs.zfs.scrub_start'):
         await resilver_scrub_start(middleware, data.get('pool'))
@@ -144,12 +165,12 @@ async def zfs_events(middleware, data):
         deadman_throttle[pool].append(now)
         deadman_throttle[pool] = deadman_throttle[pool][-max_items:]
     elif event_id == 'resource.fs.zfs.statechange':
-        await middleware.call('cache.pop', CACHE_POOLS_STATUSES)
-        pool = await retrieve_pool_from_db(middleware, data.get('pool'))
-        if not pool:
-            return
+        if not context['pools_statuses_popped']:
+            await middleware.call('cache.pop', CACHE_POOLS_STATUSES)
+            context['pools_statuses_popped'] = True
 
-        middleware.send_event('pool.query', 'CHANGED', id=pool['id'], fields=pool)
+        if data.get('pool'):
+            changed_pools.add(data['pool'])
 
     elif event_id in (
         'sysevent.fs.zfs.config_sync',
@@ -158,32 +179,36 @@ async def zfs_events(middleware, data):
     ):
         pool_name = data.get('pool')
         pool_guid = data.get('guid')
-        if await middleware.call('system.ready'):
+        if not context['swaps_configured'] and await middleware.call('system.ready'):
             # Swap must be configured only on disks being used by some pool,
             # for this reason we must react to certain types of ZFS events to keep
             # it in sync every time there is a change. Also, we only want to configure swap
             # if system is ready as otherwise when the pools have not been imported,
             # middleware will remove swap disks as all pools might not have imported
             middleware.create_task(middleware.call('disk.swaps_configure'))
+            context['swaps_configured'] = True
 
         alerts = ('PoolUSBDisks', 'PoolUpgraded')
         if pool_name:
-            disks = await middleware.call('device.get_disks')
-            args = {'pool_name': pool_name, 'disks': disks}
+            if context['disks'] is None:
+                context['disks'] = await middleware.call('device.get_disks')
+            args = {'pool_name': pool_name, 'disks': context['disks']}
             if event_id.endswith('pool_import'):
                 for i in alerts:
                     await middleware.call('alert.oneshot_create', i, args)
             elif event_id.endswith('pool_destroy'):
+                changed_pools.discard(pool_name)
                 for i in alerts:
                     await middleware.call('alert.oneshot_delete', i, pool_name)
             elif event_id.endswith('config_sync'):
-                if pool_guid and (pool := await retrieve_pool_from_db(middleware, pool_name)):
+                if pool_guid:
                     # This event is issued whenever a vdev change is done to a pool
                     # Checking pool_guid ensures that we do not do this on creation/deletion
                     # of pool as we expect the relevant event to be handled from the service
                     # endpoints because there are other operations related to create/delete
-                    # which when done, we consider the create/delete operation as complete
-                    middleware.send_event('pool.query', 'CHANGED', id=pool['id'], fields=pool)
+                    # which when done, we consider the create/delete operation as complete.
+                    # If we have no record of the pool, pool.query will skip it.
+                    changed_pools.add(pool_name)
 
                 for i in alerts:
                     await middleware.call('alert.oneshot_delete', i, pool_name)
@@ -199,18 +224,11 @@ async def zfs_events(middleware, data):
             return
 
         if event_type in ('create', 'set'):
-            ds_data = await middleware.call('pool.dataset.query', [['id', '=', ds_id]])
-            if not ds_data:
-                # We should not send an event because of 2 reasons:
-                # 1) Dataset in question was system dataset which was filtered out by pool.dataset service
-                # 2) Dataset got deleted in a race condition which is still fine as destroy event will catch that
-                return
-
-            ds_data = ds_data[0]
-            middleware.send_event(
-                'pool.dataset.query', 'ADDED' if event_type == 'create' else 'CHANGED', id=ds_id, fields=ds_data
-            )
+            if changed_datasets.get(ds_id) != 'create':
+                # `create` followed by `set` within the same batch is still reported as `ADDED`
+                changed_datasets[ds_id] = event_type
         elif event_type == 'destroy':
+            changed_datasets.pop(ds_id, None)
             if ds_id.split('/')[-1].startswith('%'):
                 # Ignore deletion of hidden clones such as `%recv` dataset created by replication
                 return
@@ -28,6 +28,11 @@ class Middleware(SchemasMixin, dict):
 
         # Resolve core schemas like `query-filters`
         super()._resolve_methods([DatastoreService(self)], [])
+        # Schemas are only registered when they are resolved for the first time, so if another instance has already
+        # been created in this process, they must be registered explicitly
+        for attr in DatastoreService.query.accepts:
+            if getattr(attr, 'register', False) and attr.name not in self._schemas:
+                self._schemas.add(attr)
 
     def _resolve_methods(self, services, events):
         try:
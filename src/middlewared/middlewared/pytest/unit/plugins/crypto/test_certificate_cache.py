@@ -0,0 +1,84 @@
+import datetime
+from unittest.mock import Mock, patch
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from middlewared.plugins.crypto_ import load_utils
+from middlewared.plugins.crypto_.load_utils import load_certificate
+
+CERTIFICATES = 500
+
+
+def generate_certificates(count, not_valid_after=None):
+    key = ec.generate_private_key(ec.SECP256R1())
+    now = datetime.datetime.utcnow()
+    certificates = []
+    for i in range(count):
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, f'cert{i}')])
+        certificates.append(
+            x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()).serial_number(
+                i + 1
+            ).not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(
+                not_valid_after or now + datetime.timedelta(days=365)
+            ).add_extension(
+                x509.SubjectAlternativeName([x509.DNSName(f'cert{i}.example.com')]), critical=False,
+            ).sign(key, hashes.SHA256()).public_bytes(serialization.Encoding.PEM).decode()
+        )
+    return certificates
+
+
+def test__load_certificate_is_cached():
+    certificates = generate_certificates(CERTIFICATES)
+    with patch.object(load_utils, 'certificate_cache', {}):
+        with patch.object(load_utils, 'parse_certificate_impl', wraps=load_utils.parse_certificate_impl) as parse:
+            cold = [load_certificate(certificate) for certificate in certificates]
+            warm = [load_certificate(certificate) for certificate in certificates]
+
+    assert parse.call_count == CERTIFICATES
+    assert cold == warm
+    assert [c['common'] for c in warm] == [f'cert{i}' for i in range(CERTIFICATES)]
+    assert warm[0]['san'] == ['DNS:cert0.example.com']
+    assert warm[0]['lifetime'] == 366
+    assert warm[0]['expired'] is False
+    assert 'issuer_dn' not in warm[0]
+    assert load_certificate(certificates[0], True)['issuer_dn'] == '/CN=cert0'
+
+
+def test__load_certificate_cached_results_are_not_shared():
+    certificate = generate_certificates(1)[0]
+    with patch.object(load_utils, 'certificate_cache', {}):
+        load_certificate(certificate)['san'].append('DNS:modified')
+        assert load_certificate(certificate)['san'] == ['DNS:cert0.example.com']
+
+
+def test__load_certificate_expiry_is_not_cached():
+    certificate = generate_certificates(1)[0]
+    later = datetime.datetime.utcnow() + datetime.timedelta(days=366)
+    with patch.object(load_utils, 'certificate_cache', {}):
+        assert load_certificate(certificate)['expired'] is False
+
+        with patch.object(load_utils, 'datetime', Mock(
+            datetime=Mock(utcnow=Mock(return_value=later)), timezone=datetime.timezone,
+        )):
+            assert load_certificate(certificate)['expired'] is True
+
+        assert load_certificate(certificate)['expired'] is False
+
+
+def test__load_certificate_cache_size():
+    certificates = generate_certificates(5)
+    with patch.object(load_utils, 'certificate_cache', {}):
+        with patch.object(load_utils, 'CERTIFICATE_CACHE_SIZE', 3):
+            for certificate in certificates:
+                load_certificate(certificate)
+
+            assert len(load_utils.certificate_cache) == 3
+
+
+def test__load_certificate_invalid():
+    with patch.object(load_utils, 'certificate_cache', {}):
+        assert load_certificate('invalid') == {}
+        assert load_certificate('invalid') == {}
@@ -0,0 +1,121 @@
+import datetime
+from unittest.mock import Mock
+
+from middlewared.plugins.disk_.sync import DiskService
+from middlewared.pytest.unit.middleware import Middleware
+
+DISKS = 500
+
+
+def sys_disk(i):
+    return {
+        'name': f'sd{i}',
+        'serial': f'SERIAL{i}',
+        'serial_lunid': f'SERIAL{i}_LUNID{i}',
+        'lunid': f'LUNID{i}',
+        'rotationrate': 7200,
+        'type': 'HDD',
+        'size': 4000787030016,
+        'subsystem': 'scsi',
+        'number': 2048 + i,
+        'model': 'HGST',
+        'bus': 'SAS',
+        'dif': False,
+        'parts': [],
+    }
+
+
+def db_disk(i, **kwargs):
+    return {
+        'disk_identifier': f'{{serial_lunid}}SERIAL{i}_LUNID{i}',
+        'disk_name': f'sd{i}',
+        'disk_serial': f'SERIAL{i}',
+        'disk_lunid': f'LUNID{i}',
+        'disk_rotationrate': 7200,
+        'disk_type': 'HDD',
+        'disk_size': '4000787030016',
+        'disk_subsystem': 'scsi',
+        'disk_number': 2048 + i,
+        'disk_model': 'HGST',
+        'disk_bus': 'SAS',
+        'disk_expiretime': None,
+        'disk_enclosure_slot': None,
+        'disk_kmip_uid': None,
+        **kwargs,
+    }
+
+
+def enclosure(number, disks):
+    return {
+        'number': number,
+        'elements': [
+            {'name': 'Cooling', 'elements': [{'slot': 1, 'data': {}}]},
+            {
+                'name': 'Array Device Slot',
+                'elements': [
+                    {'slot': slot, 'data': {'Device': disk}}
+                    for slot, disk in enumerate(disks, start=1)
+                ],
+            },
+        ],
+    }
+
+
+def test__sync_all_single_transaction():
+    sys_disks = {f'sd{i}': sys_disk(i) for i in range(DISKS)}
+    db_disks = (
+        # Unchanged disks
+        [db_disk(i) for i in range(0, 200)] +
+        # Disks that were moved to the enclosure
+        [db_disk(i) for i in range(200, 250)] +
+        # Disks that were renamed
+        [db_disk(i, disk_name=f'sdx{i}') for i in range(250, 300)] +
+        # Disks that were removed from the system
+        [db_disk(i + DISKS) for i in range(0, 20)] +
+        # Disks that were removed from the system long time ago
+        [db_disk(i + DISKS, disk_expiretime=datetime.datetime(2000, 1, 1)) for i in range(20, 30)]
+        # Disks 300-499 are new
+    )
+
+    m = Middleware()
+    m['failover.licensed'] = Mock(return_value=False)
+    m['device.get_disks'] = Mock(return_value=sys_disks)
+    m['datastore.query'] = Mock(return_value=db_disks)
+    m['disk.get_valid_zfs_partition_type_uuids'] = Mock(return_value=[])
+    m['enclosure.query'] = Mock(return_value=[
+        enclosure(0, [f'sd{i}' for i in range(200, 224)]),
+        enclosure(1, [f'sd{i}' for i in range(224, 250)]),
+    ])
+    m['datastore.bulk_write'] = Mock()
+    m['datastore.send_bulk_update_events'] = Mock()
+    m['datastore.send_delete_events'] = Mock()
+    m['alert.oneshot_delete'] = Mock()
+    m['disk.restart_services_after_sync'] = Mock()
+
+    assert DiskService(m).sync_all(Mock(), {'zfs_guid': False}) == 'OK'
+
+    m['datastore.query'].assert_called_once()
+    m['enclosure.query'].assert_called_once()
+    m['datastore.bulk_write'].assert_called_once()
+    assert not any(name in m for name in ('datastore.insert', 'datastore.update', 'datastore.delete'))
+    assert not any(name in m for name in ('enclosure.sync_disk', 'disk.query'))
+
+    name, operations, options = m['datastore.bulk_write'].call_args.args
+    assert name == 'storage.disk'
+    assert options == {'ha_sync': False}
+
+    updates = dict(operations['update'])
+    assert set(updates) == {db_disk(i)['disk_identifier'] for i in list(range(200, 300)) + list(range(500, 520))}
+    assert updates[db_disk(200)['disk_identifier']]['disk_enclosure_slot'] == 1
+    assert updates[db_disk(249)['disk_identifier']]['disk_enclosure_slot'] == 1026
+    assert updates[db_disk(250)['disk_identifier']]['disk_name'] == 'sd250'
+    assert updates[db_disk(510)['disk_identifier']]['disk_expiretime'] is not None
+
+    assert [disk['disk_name'] for disk in operations['insert']] == [f'sd{i}' for i in range(300, DISKS)]
+    assert set(operations['delete']) == {db_disk(i)['disk_identifier'] for i in range(520, 530)}
+
+    m['datastore.send_bulk_update_events'].assert_called_once()
+    name, ids = m['datastore.send_bulk_update_events'].call_args.args
+    assert set(ids) == set(updates) | {disk['disk_identifier'] for disk in operations['insert']}
+    assert m['datastore.send_delete_events'].call_count == 10
+    m.send_event.assert_not_called()
@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+import os
+import shutil
+import subprocess
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from middlewared.plugins.disk_ import wipe
+from middlewared.plugins.disk_.wipe import DiskService, QUICK_SIZE, wipe_device
+
+MB = 1024 * 1024
+SIZE = 100 * MB
+PATTERN = b'\xa5' * MB
+
+
+def create_image(path):
+    with open(path, 'wb') as f:
+        f.truncate(SIZE)
+        # Sparse file with data at the beginning, in the middle and at the end
+        for offset in (0, 16 * MB, SIZE // 2, SIZE - 40 * MB, SIZE - MB):
+            f.seek(offset)
+            f.write(PATTERN)
+
+
+def read(path, offset, length):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+@contextlib.contextmanager
+def loop_device(path):
+    if os.geteuid() != 0 or shutil.which('losetup') is None:
+        pytest.skip('Requires root and losetup')
+
+    try:
+        dev = subprocess.run(['losetup', '-f', '--show', path], capture_output=True, check=True, text=True)
+    except subprocess.CalledProcessError:
+        pytest.skip('Unable to set up loop device')
+
+    dev = dev.stdout.strip()
+    try:
+        yield dev
+    finally:
+        subprocess.run(['losetup', '-d', dev])
+
+
+def test__wipe_quick_regular_file(tmp_path):
+    # Regular files do not support `BLKZEROOUT` so this exercises the write fallback
+    path = tmp_path / 'disk.img'
+    create_image(path)
+
+    assert wipe_device(path, 'QUICK') == 2 * QUICK_SIZE
+
+    assert read(path, 0, QUICK_SIZE) == bytes(QUICK_SIZE)
+    assert read(path, SIZE - QUICK_SIZE, QUICK_SIZE) == bytes(QUICK_SIZE)
+    assert read(path, SIZE // 2, MB) == PATTERN
+    assert read(path, SIZE - 40 * MB, MB) == PATTERN
+
+
+@pytest.mark.parametrize('mode', ['QUICK', 'FULL', 'FULL_RANDOM'])
+def test__wipe_loop_device(tmp_path, mode):
+    path = tmp_path / 'disk.img'
+    create_image(path)
+    with loop_device(path) as dev:
+        progress = Mock()
+        assert wipe_device(dev, mode, progress) == (2 * QUICK_SIZE if mode == 'QUICK' else SIZE)
+
+    if mode == 'QUICK':
+        assert read(path, 0, QUICK_SIZE) == bytes(QUICK_SIZE)
+        assert read(path, SIZE - QUICK_SIZE, QUICK_SIZE) == bytes(QUICK_SIZE)
+        assert read(path, SIZE // 2, MB) == PATTERN
+        progress.add.assert_not_called()
+    elif mode == 'FULL':
+        assert read(path, 0, SIZE) == bytes(SIZE)
+        assert sum(call.args[0] for call in progress.add.call_args_list) == SIZE
+    else:
+        data = read(path, 0, SIZE)
+        assert data[:MB] * (SIZE // MB) == data
+        assert data[:MB] not in (bytes(MB), PATTERN)
+        assert sum(call.args[0] for call in progress.add.call_args_list) == SIZE
+
+
+@pytest.mark.asyncio
+async def test__wipe_multiple_loop_devices(tmp_path):
+    paths = [tmp_path / f'disk{i}.img' for i in range(3)]
+    with contextlib.ExitStack() as stack:
+        disks = []
+        for path in paths:
+            create_image(path)
+            disks.append(stack.enter_context(loop_device(path)).removeprefix('/dev/'))
+
+        m = Mock()
+        m.run_in_thread = AsyncMock(side_effect=lambda f, *args: f(*args))
+        job = Mock()
+        with patch.object(wipe, 'PROGRESS_INTERVAL', 0):
+            await DiskService(m).wipe_impl(job, disks, 'FULL')
+
+    for path in paths:
+        assert read(path, 0, SIZE) == bytes(SIZE)
+
+    percents = [call.args[0] for call in job.set_progress.call_args_list]
+    assert percents == sorted(percents)
+    assert percents[-1] == 100
+
+
+def test__progress_is_throttled():
+    job = Mock()
+    progress = wipe.WipeProgress(job, 1000 * MB)
+    for i in range(1000):
+        progress.add(MB)
+
+    assert job.set_progress.call_count <= 1
+    assert progress.done == 1000 * MB
+
+
+@pytest.mark.asyncio
+async def test__wipe_jobs_are_serialized_per_disk():
+    wiping = set()
+    overlaps = []
+
+    async def wipe_impl(job, disks, mode):
+        if wiping & set(disks):
+            overlaps.append(disks)
+        wiping.update(disks)
+        await asyncio.sleep(0.01)
+        wiping.difference_update(disks)
+
+    m = Mock()
+    m.call = AsyncMock()
+    service = DiskService(m)
+    # Skip arguments validation
+    wipe_disks = DiskService.wipe_disks.wraps
+    wipe_disk = DiskService.wipe.wraps
+    with patch.object(service, 'wipe_impl', wipe_impl):
+        await asyncio.gather(
+            wipe_disks(service, Mock(), ['sda', 'sdb'], 'QUICK', False, {}),
+            wipe_disk(service, Mock(), 'sdb', 'QUICK', False, {}),
+            wipe_disks(service, Mock(), ['sdc', 'sdb'], 'QUICK', False, {}),
+            wipe_disk(service, Mock(), 'sdc', 'QUICK', False, {}),
+        )
+
+    assert overlaps == []
@@ -0,0 +1,154 @@
+import os
+import subprocess
+import textwrap
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.enclosure_.ses_enclosure import EnclosureService
+
+CF = textwrap.dedent("""\
+      iX  4024Sp  c205
+      Primary enclosure logical identifier (hex): 5b0bd6d1a30b5f3f
+    Supported diagnostic pages:
+      Supported Diagnostic Pages [sdp] [0x0]
+      Configuration (SES) [cf] [0x1]
+""")
+ES = textwrap.dedent("""\
+      iX  4024Sp  c205
+      Primary enclosure logical identifier (hex): 5b0bd6d1a30b5f3f
+    Enclosure Status diagnostic page:
+      INVOP=0, INFO=0, NON-CRIT=0, CRIT=0, UNRECOV=0
+""")
+
+
+@pytest.fixture
+def sg_ses(tmp_path, monkeypatch):
+    """
+    Fake `sg_ses` that prints fixture output, logs its invocations and fails for enclosures listed in `fail-*` files.
+    """
+    (tmp_path / "cf").write_text(CF)
+    (tmp_path / "es").write_text(ES)
+    (tmp_path / "delay").write_text("0")
+    script = tmp_path / "sg_ses"
+    script.write_text(textwrap.dedent(f"""\
+        #!/bin/sh
+        dir={tmp_path}
+        name=$(basename "$(eval echo \\${{$#}})")
+        echo "$@" >> $dir/log
+        sleep $(cat $dir/delay)
+        case "$*" in
+            *--page=cf*) page=cf ;;
+            *) page=es ;;
+        esac
+        if grep -qx "$name" $dir/fail-$page 2>/dev/null; then
+            echo "failed" >&2
+            exit 1
+        fi
+        cat $dir/$page
+    """))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    return tmp_path
+
+
+def invocations(sg_ses):
+    try:
+        lines = (sg_ses / "log").read_text().splitlines()
+    except FileNotFoundError:
+        return []
+
+    (sg_ses / "log").unlink()
+    return sorted(lines)
+
+
+def enclosure_service(names):
+    es = EnclosureService(Mock())
+    es.list_ses_enclosures = Mock(return_value=[f"/dev/bsg/{name}" for name in names])
+    return es
+
+
+def test__configuration_page_is_cached(sg_ses):
+    es = enclosure_service(["0:0:0:0", "1:0:0:0", "2:0:0:0"])
+
+    result = es.get_ses_enclosures()
+    assert result == {
+        0: ("bsg/0:0:0:0", (CF, ES)),
+        1: ("bsg/1:0:0:0", (CF, ES)),
+        2: ("bsg/2:0:0:0", (CF, ES)),
+    }
+    assert invocations(sg_ses) == sorted(
+        [f"--page=cf /dev/bsg/{i}:0:0:0" for i in range(3)] +
+        [f"-i --page=es /dev/bsg/{i}:0:0:0" for i in range(3)]
+    )
+
+    assert es.get_ses_enclosures() == result
+    assert invocations(sg_ses) == [f"-i --page=es /dev/bsg/{i}:0:0:0" for i in range(3)]
+
+    es.ses_configuration_cache_clear()
+    assert es.get_ses_enclosures() == result
+    assert len(invocations(sg_ses)) == 6
+
+
+def test__new_enclosure(sg_ses):
+    es = enclosure_service(["0:0:0:0"])
+    es.get_ses_enclosures()
+    invocations(sg_ses)
+
+    es.list_ses_enclosures.return_value.append("/dev/bsg/1:0:0:0")
+    assert es.get_ses_enclosures() == {
+        0: ("bsg/0:0:0:0", (CF, ES)),
+        1: ("bsg/1:0:0:0", (CF, ES)),
+    }
+    assert invocations(sg_ses) == [
+        "--page=cf /dev/bsg/1:0:0:0",
+        "-i --page=es /dev/bsg/0:0:0:0",
+        "-i --page=es /dev/bsg/1:0:0:0",
+    ]
+
+
+def test__errors(sg_ses):
+    (sg_ses / "fail-cf").write_text("0:0:0:0\n")
+    (sg_ses / "fail-es").write_text("1:0:0:0\n")
+    es = enclosure_service(["0:0:0:0", "1:0:0:0", "2:0:0:0"])
+
+    assert es.get_ses_enclosures() == {2: ("bsg/2:0:0:0", (CF, ES))}
+    invocations(sg_ses)
+
+    # Failed configuration page is not cached
+    (sg_ses / "fail-cf").unlink()
+    (sg_ses / "fail-es").unlink()
+    assert len(es.get_ses_enclosures()) == 3
+    assert invocations(sg_ses) == [
+        "--page=cf /dev/bsg/0:0:0:0",
+        "-i --page=es /dev/bsg/0:0:0:0",
+        "-i --page=es /dev/bsg/1:0:0:0",
+        "-i --page=es /dev/bsg/2:0:0:0",
+    ]
+
+
+def test__pages_are_fetched_concurrently(sg_ses):
+    (sg_ses / "delay").write_text("0.5")
+    es = enclosure_service([f"{i}:0:0:0" for i in range(4)])
+
+    start = time.monotonic()
+    assert len(es.get_ses_enclosures()) == 4
+    # 8 serial invocations would take at least 4 seconds
+    assert time.monotonic() - start < 2
+
+
+def test__configuration_page_read_during_enclosure_event_is_not_cached(sg_ses):
+    es = enclosure_service(["0:0:0:0"])
+
+    def popen(args, **kwargs):
+        p = subprocess.Popen(args, **kwargs)
+        if "--page=cf" in args:
+            # Enclosure event arrives while the configuration page is being read
+            es.ses_configuration_cache_clear()
+        return p
+
+    with patch("middlewared.plugins.enclosure_.ses_enclosure.Popen", popen):
+        assert es.get_ses_enclosures() == {0: ("bsg/0:0:0:0", (CF, ES))}
+
+    assert es.ses_configuration_cache == {}
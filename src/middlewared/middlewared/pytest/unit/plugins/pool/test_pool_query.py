@@ -0,0 +1,133 @@
+import collections
+from unittest.mock import patch
+
+from middlewared.plugins.pool_.pool import PoolService
+from middlewared.plugins.pool_.topology import PoolService as PoolTopologyService
+
+POOLS = 4
+VDEVS = 10
+DISKS_PER_VDEV = 10
+
+
+class FakeZFS:
+    """
+    Produces `zfs.pool.query` entries that look like what libzfs `ZFSPool.asdict()` returns.
+    """
+
+    def __init__(self):
+        self.pools = [f'pool{i}' for i in range(POOLS)]
+
+    def disk(self, pool, vdev, disk):
+        guid = f'{pool}-{vdev}-{disk}'
+        return {
+            'type': 'disk',
+            'path': f'/dev/disk/by-partuuid/{guid}',
+            'guid': guid,
+            # One faulted disk per vdev
+            'status': 'FAULTED' if disk == 0 else 'ONLINE',
+            'stats': {},
+            'children': [],
+        }
+
+    def asdict(self, pool):
+        return {
+            'name': pool,
+            'guid': pool,
+            'status': 'DEGRADED',
+            'healthy': False,
+            'warning': False,
+            'status_detail': None,
+            'scan': None,
+            'properties': {
+                prop: {'parsed': 0, 'rawvalue': '0', 'value': '0', 'source': 'NONE'}
+                for prop in ('size', 'allocated', 'free', 'freeing', 'fragmentation', 'autotrim')
+            },
+            'groups': {
+                'data': [
+                    {
+                        'type': 'raidz2',
+                        'path': None,
+                        'guid': f'{pool}-{vdev}',
+                        'status': 'DEGRADED',
+                        'stats': {},
+                        'children': [self.disk(pool, vdev, disk) for disk in range(DISKS_PER_VDEV)],
+                    }
+                    for vdev in range(VDEVS)
+                ],
+                'log': [],
+                'cache': [],
+                'spare': [],
+                'special': [],
+                'dedup': [],
+            },
+        }
+
+    def query(self, filters=None, options=None):
+        names = self.pools
+        if filters:
+            (key, op, value), = filters
+            names = [value] if op == '=' else value
+
+        return [self.asdict(name) for name in names if name in self.pools]
+
+
+class Middleware:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.zfs = FakeZFS()
+        self.topology_service = PoolTopologyService(self)
+        self.methods = {
+            'zfs.pool.query': self.zfs.query,
+            'disk.query': lambda *args: [
+                {'zfs_guid': f'{pool}-{vdev}-0', 'expiretime': None, 'name': f'sd{pool}{vdev}'}
+                for pool in self.zfs.pools for vdev in range(VDEVS)
+            ],
+            'pool.transform_topology': self.topology_service.transform_topology,
+        }
+
+    def event_register(self, *args, **kwargs):
+        pass
+
+    def call_sync(self, method, *args):
+        self.calls[method] += 1
+        return self.methods[method](*args)
+
+
+def test_pool_query_middleware_calls():
+    m = Middleware()
+    pool_service = PoolService(m)
+    rows = [{'id': i, 'name': name} for i, name in enumerate(m.zfs.pools)]
+
+    with patch('middlewared.plugins.pool_.topology.label_to_dev', lambda label: label.rsplit('/', 1)[-1]):
+        with patch('middlewared.plugins.pool_.topology.label_to_disk', lambda label: label.rsplit('/', 1)[-1]):
+            context = pool_service.pool_extend_context(rows, {})
+            pools = [pool_service.pool_extend(row, context) for row in rows]
+
+    assert m.calls['zfs.pool.query'] == 1
+    assert m.calls['disk.query'] == 1
+    assert m.calls['pool.transform_topology'] == POOLS
+
+    for pool in pools:
+        assert pool['status'] == 'DEGRADED'
+        assert len(pool['topology']['data']) == VDEVS
+        for vdev in pool['topology']['data']:
+            assert vdev['type'] == 'RAIDZ2'
+            for disk in vdev['children']:
+                assert disk['disk'] == disk['guid']
+                if disk['status'] == 'ONLINE':
+                    assert disk['unavail_disk'] is None
+                else:
+                    assert disk['unavail_disk']['zfs_guid'] == disk['guid']
+
+
+def test_pool_query_offline_pool():
+    m = Middleware()
+    pool_service = PoolService(m)
+
+    context = pool_service.pool_extend_context([{'id': 1, 'name': 'exported'}], {})
+    pool = pool_service.pool_extend({'id': 1, 'name': 'exported'}, context)
+
+    assert pool['status'] == 'OFFLINE'
+    assert pool['topology'] is None
+    assert m.calls['zfs.pool.query'] == 1
+    assert m.calls['disk.query'] == 0
@@ -0,0 +1,107 @@
+import hashlib
+import http.server
+import os
+import tarfile
+import threading
+import tracemalloc
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from middlewared.plugins.system import debug
+from middlewared.plugins.system.debug import SystemService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+SIZE = 256 * 1024 * 1024
+CHUNK = b'\x01' * 1024 * 1024
+
+
+class DebugRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(SIZE))
+        self.end_headers()
+        for i in range(SIZE // len(CHUNK)):
+            self.wfile.write(CHUNK)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def standby():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), DebugRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def read_tar(fd, result):
+    # Consumes the output pipe like the HTTP download of the job output would
+    with open(fd, 'rb') as f:
+        with tarfile.open(fileobj=f, mode='r|') as tar:
+            for member in tar:
+                digest = hashlib.sha256()
+                with tar.extractfile(member) as m:
+                    while data := m.read(1024 * 1024):
+                        digest.update(data)
+                result[member.name] = (member.size, digest.hexdigest())
+
+
+def test_ha_debug_is_streamed(tmp_path, standby):
+    local_debug = tmp_path / 'ixdiagnose.tgz'
+    with open(local_debug, 'wb') as f:
+        f.truncate(SIZE)
+
+    def call_remote(method, args, options=None):
+        if method == 'system.debug_generate':
+            return '/var/db/system/ixdiagnose/ixdiagnose.tgz'
+        elif method == 'core.download':
+            return [1, '/_download/1?auth_token=token']
+
+    m = Middleware()
+    m['system.debug_generate'] = Mock(return_value=Mock(error=None, result=str(local_debug)))
+    m['failover.licensed'] = Mock(return_value=True)
+    m['failover.call_remote'] = Mock(side_effect=call_remote)
+    m['failover.remote_ip'] = Mock(return_value='127.0.0.1')
+    m['failover.node'] = Mock(return_value='A')
+    m['systemdataset.config'] = Mock(return_value={'path': str(tmp_path)})
+    m['network.configuration.config'] = Mock(return_value={'hostname': 'nas-a', 'hostname_b': 'nas-b'})
+    m.call_sync = lambda name, *args, **kwargs: m[name](*args)
+    svc = create_service(m, SystemService)
+
+    get = requests.get
+
+    def standby_get(url, **kwargs):
+        return get(url.replace(':6000/', f':{standby}/'), **kwargs)
+
+    r, w = os.pipe()
+    result = {}
+    reader = threading.Thread(target=read_tar, args=(r, result))
+    reader.start()
+
+    job = Mock()
+    job.pipes.output.w = open(w, 'wb')
+    tracemalloc.start()
+    try:
+        with patch.object(debug.requests, 'get', standby_get):
+            svc.debug(job)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        reader.join()
+
+    # Neither of the debugs is kept in memory
+    assert peak < 32 * 1024 * 1024
+    assert result == {
+        'nas-a.txz': (SIZE, hashlib.sha256(b'\x00' * SIZE).hexdigest()),
+        'nas-b.txz': (SIZE, hashlib.sha256(CHUNK * (SIZE // len(CHUNK))).hexdigest()),
+    }
+    # Standby debug was spooled to the system dataset and removed
+    assert os.listdir(tmp_path) == ['ixdiagnose.tgz']
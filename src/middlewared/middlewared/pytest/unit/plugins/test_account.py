@@ -0,0 +1,99 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.account import UserService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+USERS = 10000
+USERS_WITH_KEYS = 100
+
+
+@pytest.fixture(scope="module")
+def homes(tmp_path_factory):
+    base = tmp_path_factory.mktemp("home")
+    for i in range(USERS_WITH_KEYS):
+        ssh = base / f"user{i}" / ".ssh"
+        ssh.mkdir(parents=True)
+        (ssh / "authorized_keys").write_text(f"ssh-ed25519 AAAA user{i}\n")
+
+    return base
+
+
+@pytest.fixture(scope="module")
+def rows(homes):
+    return [
+        {
+            "id": i,
+            "uid": 3000 + i,
+            "username": f"user{i}",
+            # Half of the users do not have a home directory
+            "home": str(homes / f"user{i}") if i % 2 == 0 else "/nonexistent",
+            "email": "",
+            "builtin": False,
+        }
+        for i in range(USERS)
+    ]
+
+
+def user_service(rows):
+    m = Middleware()
+
+    async def datastore_query(name, filters=None, options=None):
+        options = options or {}
+        if name != "account.bsdusers":
+            return []
+
+        # Serializes rows the way `datastore.query` does for services with `datastore_extend_context`
+        ctx = await m.call(options["extend_context"], rows, options.get("extra", {}))
+        result = [await m.call(options["extend"], dict(row), ctx) for row in rows]
+        if options.get("select"):
+            result = [{k: v for k, v in row.items() if k in options["select"]} for row in result]
+        return result
+
+    m["datastore.query"] = datastore_query
+    m.run_in_thread = Mock(side_effect=m.run_in_thread)
+    service = create_service(m, UserService)
+    m["user.user_extend_context"] = service.user_extend_context
+    m["user.user_extend"] = service.user_extend
+    return service
+
+
+@pytest.mark.asyncio
+async def test__query_reads_authorized_keys_in_one_batch(homes, rows):
+    service = user_service(rows)
+
+    with patch.object(UserService, "_read_authorized_keys", autospec=True,
+                      side_effect=UserService._read_authorized_keys) as read_authorized_keys:
+        users = await service.query()
+
+    assert len(users) == USERS
+    assert users[0]["sshpubkey"] == "ssh-ed25519 AAAA user0\n"
+    assert users[1]["sshpubkey"] is None
+    assert users[2 * USERS_WITH_KEYS]["sshpubkey"] is None
+    # Every distinct home directory is read once
+    assert read_authorized_keys.call_count == USERS // 2 + 1
+    # Filtering and authorized keys reading
+    assert service.middleware.run_in_thread.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test__query_select_without_sshpubkey_does_not_read_authorized_keys(rows):
+    service = user_service(rows)
+
+    with patch.object(UserService, "_read_authorized_keys") as read_authorized_keys:
+        users = await service.query([], {"select": ["username", "uid"]})
+
+    assert len(users) == USERS
+    assert users[0] == {"username": "user0", "uid": 3000}
+    read_authorized_keys.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test__query_select_with_sshpubkey(rows):
+    service = user_service(rows)
+
+    users = await service.query([["username", "=", "user0"]], {"select": ["username", "sshpubkey"]})
+
+    assert users == [{"username": "user0", "sshpubkey": "ssh-ed25519 AAAA user0\n"}]
@@ -1,12 +1,14 @@
 # flake8: noqa
-import io
-import textwrap
-from unittest.mock import Mock
+import asyncio
+import json
+import subprocess
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
 from middlewared.plugins.cloud_sync import (
-    get_dataset_recursive, FsLockManager, lsjson_error_excerpt, RcloneVerboseLogCutter
+    get_dataset_recursive, FsLockManager, lsjson_error_excerpt, rclone_check_progress, rclone_parse_log_line,
+    rclone_stats_progress,
 )
 
 
@@ -301,53 +303,70 @@ def test__lsjson_error_excerpt(error, excerpt):
     assert lsjson_error_excerpt(error) == excerpt
 
 
-def INFO(v=None):
-    if v is None:
-        prefix = "<6>"
-    else:
-        prefix = f"2020/01/22 22:32:{v:02d} "
-    return textwrap.dedent(f"""\
-        {prefix}INFO  : 
-        Transferred:   	  752.465G / 27.610 TBytes, 3%, 7.945 MBytes/s, ETA 5w6d1h16m55s
-        Errors:               478 (retrying may help)
-        Checks:                89 / 89, 100%
-        Transferred:           75 / 3546, 2%
-        Elapsed time:  26h56m23.1s
-        Transferring:
-         *         Cam (2018)/Cam (2018) WEBDL-1080p.mkv:  0% /3.470G, 0/s, -
-         * Call Me by Your Name (…2017) Bluray-1080p.mkv:  0% /9.839G, 0/s, -
-         * Can't Take It Back (20…(2017) WEBDL-1080p.mkv:  0% /3.035G, 0/s, -
-         * Candleshoe (1977)/Cand… (1977) WEBDL-720p.mkv:  0% /2.865G, 0/s, -
-    
-    """)
-
-
-@pytest.mark.parametrize("input,output", [
-    (f"WELCOME TO RCLONE\n{INFO(1)}{INFO(2)}BYE!\n", f"WELCOME TO RCLONE\n{INFO(1)}BYE!\n"),
-    (f"WELCOME TO RCLONE\n{INFO(1)}{INFO(2)}{INFO(3)}{INFO(4)}{INFO(5)}{INFO(6)}BYE!\n",
-     f"WELCOME TO RCLONE\n{INFO(1)}{INFO(6)}BYE!\n"),
-    (f"WELCOME TO RCLONE\n{INFO(1)}{INFO(2)[:300]}\nKilled (9)",
-     f"WELCOME TO RCLONE\n{INFO(1)}{INFO(2)[:300]}\nKilled (9)"),
-    (f"2020/01/27 13:16:15 INFO  : S3 bucket ixsystems: Waiting for transfers to finish\n"
-     f"{INFO(1)}{INFO(2)}{INFO(3)}{INFO(4)}{INFO(5)}{INFO(6)}BYE!\n",
-     f"2020/01/27 13:16:15 INFO  : S3 bucket ixsystems: Waiting for transfers to finish\n{INFO(1)}{INFO(6)}BYE!\n"),
-    (f"WELCOME TO RCLONE\n{INFO()}{INFO()}BYE!\n", f"WELCOME TO RCLONE\n{INFO()}BYE!\n"),
+RCLONE_OUTPUT = [
+    {"level": "info", "msg": "Copied (new)", "object": "photos/1.jpg", "objectType": "*local.Object",
+     "source": "operations/copy.go:266", "time": "2023-10-05T12:34:55.512436+00:00"},
+    {"level": "notice", "msg": "\nTransferred:   \t  512 MiB / 1 GiB, 50%, 10 MiB/s, ETA 51s\nChecks:        \t"
+     "         5 / 10, 50%\nTransferred:   \t            1 / 4, 25%\nElapsed time:        51.0s\n",
+     "source": "accounting/stats.go:528", "time": "2023-10-05T12:34:56.000123+00:00",
+     "stats": {"bytes": 536870912, "checks": 5, "deletedDirs": 0, "deletes": 0, "elapsedTime": 51.0, "errors": 0,
+               "eta": 51, "fatalError": False, "renames": 0, "retryError": False, "speed": 10485760.0,
+               "totalBytes": 1073741824, "totalChecks": 10, "totalTransfers": 4, "transferTime": 50.9,
+               "transfers": 1}},
+    {"level": "error", "msg": "Failed to copy: failed to open source object: path/restricted_content/manual.pdf",
+     "object": "manual.pdf", "objectType": "*dropbox.Object", "source": "operations/copy.go:210",
+     "time": "2023-10-05T12:34:57.000000+00:00"},
+    {"level": "notice", "msg": "\nTransferred:   \t  1 GiB / 1 GiB, 100%\n", "source": "accounting/stats.go:528",
+     "time": "2023-10-05T12:34:58.000000+00:00",
+     "stats": {"bytes": 1073741824, "checks": 10, "elapsedTime": 53.0, "errors": 1, "eta": None, "speed": 0,
+               "totalBytes": 1073741824, "totalChecks": 10, "totalTransfers": 4, "transfers": 4}},
+]
+
+
+@pytest.mark.parametrize("line,message,stats", [
+    (json.dumps(RCLONE_OUTPUT[0]), "2023/10/05 12:34:55 INFO  : photos/1.jpg: Copied (new)\n", None),
+    (json.dumps(RCLONE_OUTPUT[1]), "2023/10/05 12:34:56 NOTICE: \nTransferred:   \t  512 MiB / 1 GiB, 50%, 10 MiB/s, "
+                                   "ETA 51s\nChecks:        \t         5 / 10, 50%\nTransferred:   \t            1 / "
+                                   "4, 25%\nElapsed time:        51.0s\n", RCLONE_OUTPUT[1]["stats"]),
+    ("panic: runtime error\n", "panic: runtime error\n", None),
 ])
-def test__RcloneVerboseLogCutter(input, output):
-    cutter = RcloneVerboseLogCutter(5)
-    f = io.StringIO(input)
-    out = ""
-    while True:
-        line = f.readline()
-        if not line:
-            break
-
-        result = cutter.notify(line)
-        if result:
-             out += result
-
-    result = cutter.flush()
-    if result:
-        out += result
-
-    assert out == output
+def test__rclone_parse_log_line(line, message, stats):
+    assert rclone_parse_log_line(line) == (message, stats)
+
+
+def test__rclone_stats_progress():
+    percent, description, extra = rclone_stats_progress(RCLONE_OUTPUT[1]["stats"])
+
+    assert percent == 25
+    assert description == "512 MiB / 1 GiB, 10 MiB/s, ETA 51 seconds, transfers: 1 / 4, checks: 5 / 10"
+    assert extra["bytes"] == 536870912
+    assert extra["total_transfers"] == 4
+    assert extra["eta"] == 51
+
+
+def test__rclone_stats_progress_nothing_to_transfer():
+    assert rclone_stats_progress({"bytes": 0, "totalBytes": 0, "checks": 0, "totalChecks": 0})[:2] == (None, "")
+
+
+@pytest.mark.asyncio
+async def test__rclone_check_progress(tmp_path):
+    output = tmp_path / "output"
+    output.write_text("".join(json.dumps(line) + "\n" for line in RCLONE_OUTPUT))
+    rclone = tmp_path / "rclone"
+    rclone.write_text(f"#!/bin/sh\ncat {output}\n")
+    rclone.chmod(0o755)
+
+    job = Mock(internal_data={}, logs_fd_write=AsyncMock())
+    proc = await asyncio.create_subprocess_exec(str(rclone), stdout=subprocess.PIPE)
+    await rclone_check_progress(job, proc)
+    await proc.wait()
+
+    assert [c.args[0] for c in job.set_progress.mock_calls] == [25, 100]
+    assert job.set_progress.mock_calls[-1].args[1] == "1 GiB / 1 GiB, transfers: 4 / 4, checks: 10 / 10"
+    # Only the first progress report is written to the logs
+    assert b"".join(c.args[0] for c in job.logs_fd_write.mock_calls).decode().count("Transferred:") == 2
+    assert "2023/10/05 12:34:57 ERROR : manual.pdf: Failed to copy" in b"".join(
+        c.args[0] for c in job.logs_fd_write.mock_calls
+    ).decode()
+    assert job.internal_data["dropbox__restricted_content"] is True
+    assert job.internal_data["messages"][0].startswith("Dropbox sync failed")
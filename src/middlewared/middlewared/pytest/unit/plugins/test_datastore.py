@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 import datetime
-from unittest.mock import ANY, patch
+import os
+import shutil
+import sqlite3
+import time
+from unittest.mock import ANY, Mock, patch
 
 import pytest
 import sqlalchemy as sa
@@ -17,6 +22,7 @@ import middlewared.plugins.datastore.util  # noqa
 
 from middlewared.pytest.unit.helpers import load_compound_service
 from middlewared.pytest.unit.middleware import Middleware
+from middlewared.service_exception import CallError
 
 DatastoreService = load_compound_service("datastore")
 
@@ -24,11 +30,13 @@ Model = declarative_base()
 
 
 @asynccontextmanager
-async def datastore_test():
+async def datastore_test(database=":memory:"):
     m = Middleware()
-    with patch("middlewared.plugins.datastore.connection.FREENAS_DATABASE", ":memory:"):
+    with patch("middlewared.plugins.datastore.connection.FREENAS_DATABASE", database):
         with patch("middlewared.plugins.datastore.schema.Model", Model):
             with patch("middlewared.plugins.datastore.util.Model", Model):
+                m["core.config_cache_invalidate"] = Mock()
+
                 ds = DatastoreService(m)
                 ds.setup()
 
@@ -41,6 +49,7 @@ async def datastore_test():
 
                 m["datastore.execute"] = ds.execute
                 m["datastore.execute_write"] = ds.execute_write
+                m["datastore.execute_write_many"] = ds.execute_write_many
                 m["datastore.fetchall"] = ds.fetchall
 
                 m["datastore.query"] = ds.query
@@ -790,3 +799,136 @@ async def test__null_order_by(order_by, result):
         await ds.insert("test.null", {"value": 1})
 
         assert [row["id"] for row in await ds.query("test.null", [], {"order_by": order_by})] == result
+
+
+@pytest.mark.asyncio
+async def test__statement_cache_does_not_mix_filter_values():
+    async with datastore_test() as ds:
+        await ds.insert("test.null", {"value": 3})
+        await ds.insert("test.null", {"value": None})
+        await ds.insert("test.null", {"value": 1})
+
+        assert [row["id"] for row in await ds.query("test.null", [["value", "=", 3]])] == [1]
+        assert [row["id"] for row in await ds.query("test.null", [["value", "=", 1]])] == [3]
+        assert [row["id"] for row in await ds.query("test.null", [["value", "=", None]])] == [2]
+        assert [row["id"] for row in await ds.query("test.null", [["value", "in", [1, None]]])] == [2, 3]
+        assert [row["id"] for row in await ds.query("test.null", [["value", "in", [3]]])] == [1]
+
+
+@pytest.mark.asyncio
+async def test__read_while_write_transaction_is_open(tmp_path):
+    async with datastore_test(str(tmp_path / "freenas-v1.db")) as ds:
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (10, 1010)")
+
+        # Exclusive lock would block all readers if the database was not in WAL mode
+        writer = next(part.connection for part in ds.parts if hasattr(part, "connection")).connection
+        writer.execute("BEGIN EXCLUSIVE")
+        try:
+            writer.execute("INSERT INTO `account_bsdgroups` VALUES (20, 2020)")
+
+            with ThreadPoolExecutor(1) as reader:
+                rows = reader.submit(ds.fetchall, "SELECT id FROM account_bsdgroups").result(timeout=1)
+
+            assert [row[0] for row in rows] == [10]
+        finally:
+            writer.commit()
+
+        assert [row["id"] for row in await ds.query("account.bsdgroups")] == [10, 20]
+
+
+@pytest.mark.asyncio
+async def test__checkpoint(tmp_path):
+    database = str(tmp_path / "freenas-v1.db")
+    async with datastore_test(database) as ds:
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (10, 1010)")
+
+        writer = next(part.connection for part in ds.parts if hasattr(part, "connection")).connection
+        writer.execute("PRAGMA busy_timeout = 100")
+
+        reader = sqlite3.connect(database)
+        try:
+            reader.execute("BEGIN")
+            reader.execute("SELECT * FROM account_bsdgroups").fetchall()
+
+            # Writes do not wait for the readers to checkpoint the database
+            start = time.monotonic()
+            ds.execute("INSERT INTO `account_bsdgroups` VALUES (20, 2020)")
+            assert time.monotonic() - start < 0.1
+
+            with pytest.raises(CallError):
+                ds.checkpoint()
+        finally:
+            reader.close()
+
+        ds.checkpoint()
+        assert os.path.getsize(f"{database}-wal") == 0
+
+        shutil.copy(database, tmp_path / "copy.db")
+        with sqlite3.connect(tmp_path / "copy.db") as copy:
+            assert copy.execute("SELECT id FROM account_bsdgroups").fetchall() == [(10,), (20,)]
+
+
+@pytest.mark.asyncio
+async def test__replace(tmp_path):
+    replicated = tmp_path / "freenas-v1.db.replicated"
+    async with datastore_test(str(tmp_path / "replicated.db")):
+        pass
+    with sqlite3.connect(tmp_path / "replicated.db") as db:
+        db.execute("INSERT INTO account_bsdgroups VALUES (30, 3030)")
+    os.rename(tmp_path / "replicated.db", replicated)
+
+    database = str(tmp_path / "freenas-v1.db")
+    async with datastore_test(database) as ds:
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (10, 1010)")
+        # Open connections in the read pool threads
+        read_thread_pool = middlewared.plugins.datastore.connection.read_thread_pool
+        for future in [read_thread_pool.submit(ds.fetchall, "SELECT id FROM account_bsdgroups") for i in range(8)]:
+            assert [row[0] for row in future.result()] == [10]
+
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (20, 2020)")
+        assert os.path.getsize(f"{database}-wal") > 0
+
+        ds.replace(str(replicated))
+
+        assert not replicated.exists()
+        assert [row["id"] for row in await ds.query("account.bsdgroups")] == [30]
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (40, 4040)")
+        assert [row["id"] for row in await ds.query("account.bsdgroups")] == [30, 40]
+
+    with sqlite3.connect(database) as db:
+        assert db.execute("PRAGMA integrity_check").fetchall() == [("ok",)]
+        assert db.execute("SELECT id FROM account_bsdgroups").fetchall() == [(30,), (40,)]
+
+
+@pytest.mark.asyncio
+async def test__bulk_write():
+    async with datastore_test() as ds:
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (10, 1010)")
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (20, 2020)")
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (30, 3030)")
+
+        await ds.bulk_write("account.bsdgroups", {
+            "insert": [{"id": 10, "gid": 1011}, {"id": 40, "gid": 4040}],
+            "update": [[20, {"gid": 2021}]],
+            "delete": [10, 30],
+        }, {"prefix": "bsdgrp_"})
+
+        assert await ds.query("account.bsdgroups", [], {"prefix": "bsdgrp_"}) == [
+            {"id": 10, "gid": 1011},
+            {"id": 20, "gid": 2021},
+            {"id": 40, "gid": 4040},
+        ]
+
+
+@pytest.mark.asyncio
+async def test__bulk_write_rollback():
+    async with datastore_test() as ds:
+        ds.execute("INSERT INTO `account_bsdgroups` VALUES (10, 1010)")
+
+        with pytest.raises(RuntimeError):
+            await ds.bulk_write("account.bsdgroups", {
+                "insert": [{"bsdgrp_gid": 2020}],
+                "update": [[10, {"bsdgrp_gid": 1011}], [20, {"bsdgrp_gid": 2021}]],
+            }, {})
+
+        assert await ds.query("account.bsdgroups") == [{"id": 10, "bsdgrp_gid": 1010}]
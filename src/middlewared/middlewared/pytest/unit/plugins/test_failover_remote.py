@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import json
+import threading
+from unittest.mock import Mock
+
+from aiohttp import web
+import pytest
+
+from middlewared.plugins.failover_.remote import RemoteClient
+from middlewared.service_exception import CallError
+
+
+class RemoteMiddleware:
+    """
+    Stand-in for the other node's middleware: accepts uploads, runs `filesystem.put` job for them and serves the
+    websocket API that `RemoteClient` uses to wait for that job.
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.uploads = {}
+        self.calls = []
+        self.jobs = {}
+        self.waiters = {}
+        self.next_job_id = 1
+        self.connections = []
+        self.subscribers = []
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self.port = None
+
+    def __enter__(self):
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def disconnect(self):
+        async def close():
+            for ws in self.connections:
+                await ws.close()
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_route("GET", "/websocket", self.ws_handler)
+        app.router.add_route("POST", "/_upload/", self.upload)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+    def create_job(self, method):
+        job = {
+            "id": self.next_job_id, "method": method, "state": "RUNNING", "result": None, "error": None,
+            "exception": None, "exc_info": None, "progress": {"percent": 0, "description": "", "extra": None},
+        }
+        self.next_job_id += 1
+        self.jobs[job["id"]] = job
+        self.waiters[job["id"]] = asyncio.Event()
+        return job
+
+    async def update_job(self, job, **fields):
+        job.update(fields)
+        if job["state"] != "RUNNING":
+            self.waiters[job["id"]].set()
+
+        for ws in self.subscribers:
+            await ws.send_str(json.dumps({
+                "msg": "changed", "collection": "core.get_jobs", "id": job["id"], "fields": dict(job),
+            }))
+
+    async def upload(self, request):
+        data = None
+        async for part in await request.multipart():
+            if part.name == "data":
+                data = json.loads(await part.text())
+            elif part.name == "file":
+                self.uploads[data["params"][0]] = await part.read()
+
+        job = self.create_job(data["method"])
+        self.loop.create_task(self.run_put(job))
+        return web.json_response({"job_id": job["id"]})
+
+    async def run_put(self, job):
+        await asyncio.sleep(0.1)
+        await self.update_job(job, progress={"percent": 50, "description": "Writing file", "extra": None})
+        await asyncio.sleep(0.1)
+        if self.fail:
+            await self.update_job(job, state="FAILED", error="[ENOSPC] No space left on device", exc_info={
+                "type": "CallError", "repr": "CallError()", "extra": None,
+            })
+        else:
+            await self.update_job(job, state="SUCCESS", result=True,
+                                  progress={"percent": 100, "description": "", "extra": None})
+
+    async def job_wait(self, job, id):
+        # Like `Job.wrap`
+        subjob = self.jobs[id]
+        await self.update_job(job, progress=subjob["progress"])
+        while True:
+            waiter = asyncio.ensure_future(self.waiters[id].wait())
+            await asyncio.wait([waiter], timeout=0.05)
+            await self.update_job(job, progress=subjob["progress"])
+            if waiter.done():
+                break
+
+        await self.update_job(job, **{k: subjob[k] for k in ("state", "result", "error", "exc_info")})
+
+    async def ws_handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections.append(ws)
+        async for msg in ws:
+            message = json.loads(msg.data)
+            if message["msg"] == "connect":
+                await ws.send_str(json.dumps({"msg": "connected", "session": "session"}))
+            elif message["msg"] == "sub":
+                self.subscribers.append(ws)
+                await ws.send_str(json.dumps({"msg": "ready", "subs": [message["id"]]}))
+            elif message["msg"] == "method":
+                self.calls.append(message["method"])
+                if message["method"] == "core.job_wait":
+                    job = self.create_job("core.job_wait")
+                    self.loop.create_task(self.job_wait(job, *message["params"]))
+                    result = job["id"]
+                else:
+                    result = "TrueNAS-SCALE-23.10"
+                await ws.send_str(json.dumps({"msg": "result", "id": message["id"], "result": result}))
+
+        self.connections.remove(ws)
+        self.subscribers = [subscriber for subscriber in self.subscribers if subscriber is not ws]
+        return ws
+
+
+@contextlib.contextmanager
+def remote_client(remote):
+    client = RemoteClient()
+    client.middleware = Mock()
+    client.remote_ip = "127.0.0.1"
+    client.remote_port = remote.port
+    thread = threading.Thread(target=client.connect_and_wait, daemon=True)
+    thread.start()
+    assert client.connected.wait(10)
+    try:
+        yield client
+    finally:
+        # Other node going away is the only way the connection is closed
+        remote.disconnect()
+        thread.join(10)
+
+
+def test__send_file(tmp_path):
+    (tmp_path / "file").write_bytes(b"data")
+
+    progress = []
+    with RemoteMiddleware() as remote:
+        with remote_client(remote) as client:
+            client.send_file("token", str(tmp_path / "file"), "/var/tmp/file", progress.append)
+
+    assert remote.uploads == {"/var/tmp/file": b"data"}
+    # Job completion is pushed to us instead of being polled for
+    assert "core.get_jobs" not in remote.calls
+    assert remote.calls.count("core.job_wait") == 1
+    assert {"percent": 50, "description": "Writing file", "extra": None} in progress
+
+
+def test__send_file_failed(tmp_path):
+    (tmp_path / "file").write_bytes(b"data")
+
+    with RemoteMiddleware(fail=True) as remote:
+        with remote_client(remote) as client:
+            with pytest.raises(CallError) as ve:
+                client.send_file("token", str(tmp_path / "file"), "/var/tmp/file")
+
+    assert ve.value.errmsg == (
+        f"Failed to send {tmp_path / 'file'} to Standby Controller: [ENOSPC] No space left on device."
+    )
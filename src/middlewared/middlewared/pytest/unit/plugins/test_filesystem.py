@@ -0,0 +1,102 @@
+import os
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from middlewared.plugins.filesystem import FilesystemService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for i in range(100):
+        (tmp_path / f'file{i:03}').touch()
+    for i in range(10):
+        (tmp_path / f'dir{i:03}').mkdir()
+    (tmp_path / 'link').symlink_to(tmp_path / 'dir000')
+    return tmp_path
+
+
+def listdir(path, filters=None, options=None):
+    return create_service(Middleware(), FilesystemService).listdir(str(path), filters or [], options or {})
+
+
+def test__listdir_all_entries(directory):
+    entries = listdir(directory)
+    assert {entry['name'] for entry in entries} == set(os.listdir(directory))
+    assert all({'acl', 'is_mountpoint'} <= set(entry) for entry in entries)
+    assert next(entry for entry in entries if entry['name'] == 'link')['realpath'] == str(directory / 'dir000')
+
+
+@pytest.mark.parametrize('filters,expected', [
+    ([['type', '=', 'DIRECTORY']], {f'dir{i:03}' for i in range(10)}),
+    ([['type', '=', 'SYMLINK']], {'link'}),
+    ([['name', '^', 'file09']], {f'file09{i}' for i in range(10)}),
+    ([['type', '=', 'FILE'], ['acl', '=', True]], set()),
+    ([['OR', [['acl', '=', True], ['name', '=', 'file001']]]], {'file001'}),
+    ([['OR', [['acl', '=', True], ['name', '=', 'file001'], ['name', '=', 'dir001']]]], {'file001', 'dir001'}),
+])
+def test__listdir_filters(directory, filters, expected):
+    assert {entry['name'] for entry in listdir(directory, filters)} == expected
+
+
+def test__listdir_order_by_and_count(directory):
+    assert [e['name'] for e in listdir(directory, [], {'order_by': ['-name'], 'limit': 2})] == ['link', 'file099']
+    assert listdir(directory, [['type', '=', 'FILE']], {'count': True}) == 100
+    assert listdir(directory, [['name', '=', 'dir005']], {'get': True, 'select': ['name']}) == {'name': 'dir005'}
+
+
+def test__listdir_offset_limit_matches_full_listing(directory):
+    full = [entry['name'] for entry in listdir(directory)]
+    assert [entry['name'] for entry in listdir(directory, [], {'offset': 7, 'limit': 13})] == full[7:20]
+
+
+def test__listdir_cursor(directory):
+    full = [entry['name'] for entry in listdir(directory)]
+    assert full == sorted(os.listdir(directory))
+
+    names = []
+    cursor = None
+    while True:
+        page = listdir(directory, [], {'limit': 25, 'extra': {'cursor': cursor} if cursor else {}})
+        if not page:
+            break
+
+        names.extend(entry['name'] for entry in page)
+        cursor = page[-1]['name']
+
+    assert names == full
+
+
+def test__listdir_cursor_removed(directory):
+    (directory / 'file050').unlink()
+
+    page = listdir(directory, [], {'limit': 3, 'extra': {'cursor': 'file050'}})
+    assert [entry['name'] for entry in page] == ['file051', 'file052', 'file053']
+
+
+def test__listdir_sparse_matches(directory):
+    with patch('middlewared.plugins.filesystem.LISTDIR_BATCH_SIZE', 4):
+        page = listdir(directory, [['name', '$', '7']], {'offset': 2, 'limit': 5})
+
+    assert [entry['name'] for entry in page] == ['file017', 'file027', 'file037', 'file047', 'file057']
+
+
+def test__listdir_extends_returned_entries_only(tmp_path):
+    count = 200000
+    for i in range(count):
+        os.close(os.open(tmp_path / f'f{i}', os.O_CREAT | os.O_WRONLY))
+
+    service = create_service(Middleware(), FilesystemService)
+    with patch.object(FilesystemService, 'acl_is_trivial', autospec=True, return_value=True) as acl_is_trivial:
+        tracemalloc.start()
+        entries = service.listdir(str(tmp_path), [], {'limit': 100})
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    assert len(entries) == 100
+    assert acl_is_trivial.call_count == 100
+    # Whole listing would take well above 100 MiB
+    assert peak < 10 * 1024 * 1024
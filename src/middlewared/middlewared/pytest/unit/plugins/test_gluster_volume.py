@@ -0,0 +1,88 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.gluster_linux import volume
+from middlewared.plugins.gluster_linux.volume import GlusterVolumeService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+from middlewared.webhooks.cluster_events import ClusterEventsApplication
+
+VOLUMES = [{'name': 'ctdb_shared_vol', 'status': 'Started', 'bricks': []}]
+
+
+@pytest.fixture
+def gluster_volume():
+    m = Middleware()
+    m['service.started'] = Mock(return_value=True)
+    m['gluster.method.run'] = Mock(side_effect=lambda method, kwargs: [dict(v) for v in VOLUMES])
+    m['gluster.fuse.mount'] = Mock()
+    svc = create_service(m, GlusterVolumeService)
+    m['gluster.volume.query_cache_clear'] = svc.query_cache_clear
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_query_is_cached(gluster_volume):
+    for i in range(3):
+        assert await gluster_volume.query([], {}) == [dict(VOLUMES[0], id='ctdb_shared_vol')]
+
+    gluster_volume.middleware['gluster.method.run'].assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_query_returns_copies(gluster_volume):
+    (await gluster_volume.query([], {}))[0]['bricks'].append('brick')
+
+    assert (await gluster_volume.query([], {}))[0]['bricks'] == []
+
+
+@pytest.mark.asyncio
+async def test_query_glusterd_stopped(gluster_volume):
+    await gluster_volume.query([], {})
+    gluster_volume.middleware['service.started'].return_value = False
+
+    assert await gluster_volume.query([], {}) == []
+
+
+@pytest.mark.asyncio
+async def test_query_cache_cleared(gluster_volume):
+    await gluster_volume.query([], {})
+    await gluster_volume.query_cache_clear()
+    await gluster_volume.query([], {})
+
+    assert gluster_volume.middleware['gluster.method.run'].call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_query_cache_cleared_by_cluster_event(gluster_volume):
+    await gluster_volume.query([], {})
+    await ClusterEventsApplication(gluster_volume.middleware).process_event({
+        'event': 'VOLUME_START', 'name': 'ctdb_shared_vol',
+    })
+    await gluster_volume.query([], {})
+
+    assert gluster_volume.middleware['gluster.method.run'].call_count == 2
+    gluster_volume.middleware['gluster.fuse.mount'].assert_called_once_with({'name': 'ctdb_shared_vol'})
+
+
+@pytest.mark.asyncio
+async def test_query_cache_expires(gluster_volume):
+    with patch.object(volume, 'QUERY_CACHE_TTL', 0):
+        await gluster_volume.query([], {})
+        await gluster_volume.query([], {})
+
+    assert gluster_volume.middleware['gluster.method.run'].call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_query_not_cached_when_changed_concurrently(gluster_volume):
+    async def run(method, kwargs):
+        # Volume is changed while its status is being retrieved
+        await gluster_volume.query_cache_clear()
+        return [dict(v) for v in VOLUMES]
+
+    gluster_volume.middleware['gluster.method.run'] = Mock(side_effect=run)
+    await gluster_volume.query([], {})
+
+    assert gluster_volume.query_cache is None
@@ -0,0 +1,91 @@
+import os
+import textwrap
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.ipmi_ import sensors
+from middlewared.plugins.ipmi_.sensors import IpmiSensorsService, SensorsPoller
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+OUTPUT = textwrap.dedent("""\
+    1,CPU Temp,Temperature,Nominal,45.00,degrees C,N/A,N/A,N/A,N/A,90.00,95.00,'OK'
+    2,PS1 Status,Power Supply,Nominal,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,'Presence detected'
+""")
+
+
+@pytest.fixture
+def ipmi_sensors(tmp_path, monkeypatch):
+    (tmp_path / "output").write_text(OUTPUT)
+    script = tmp_path / "ipmi-sensors"
+    script.write_text(textwrap.dedent(f"""\
+        #!/bin/sh
+        echo "$@" >> {tmp_path}/log
+        sleep 0.5
+        cat {tmp_path}/output
+    """))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    with patch.object(sensors, "SDR_CACHE_DIRECTORY", str(tmp_path / "sdr-cache")):
+        yield tmp_path
+
+
+def invocations(ipmi_sensors):
+    return (ipmi_sensors / "log").read_text().splitlines()
+
+
+def sensors_service():
+    m = Middleware()
+    m["ipmi.is_loaded"] = Mock(return_value=True)
+    m["failover.hardware"] = Mock(return_value="BHYVE")
+    return create_service(m, IpmiSensorsService)
+
+
+def test__sdr_cache(ipmi_sensors):
+    assert SensorsPoller().get(0) == OUTPUT.split("\n")
+
+    assert f"--sdr-cache-directory={ipmi_sensors}/sdr-cache" in invocations(ipmi_sensors)[0].split()
+    assert (ipmi_sensors / "sdr-cache").is_dir()
+
+
+def test__concurrent_queries_are_coalesced(ipmi_sensors):
+    service = sensors_service()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.query())) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(invocations(ipmi_sensors)) == 1
+    assert len(results) == 8
+    assert all(result == results[0] for result in results)
+    assert [sensor["name"] for sensor in results[0]] == ["CPU Temp", "PS1 Status"]
+
+
+def test__max_age(ipmi_sensors):
+    service = sensors_service()
+
+    service.query()
+    service.query()
+    assert len(invocations(ipmi_sensors)) == 1
+
+    time.sleep(0.1)
+    service.query([], {"extra": {"max_age": 0.05}})
+    assert len(invocations(ipmi_sensors)) == 2
+
+
+def test__failed_poll_is_not_cached():
+    poll = Mock(side_effect=[RuntimeError(), ["sample"]])
+    poller = SensorsPoller(poll)
+
+    with pytest.raises(RuntimeError):
+        poller.get(10)
+
+    assert poller.get(10) == ["sample"]
+    assert poller.get(10) == ["sample"]
+    assert poll.call_count == 2
@@ -0,0 +1,136 @@
+import contextlib
+import os
+import shutil
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.iscsi_ import global_linux
+from middlewared.plugins.iscsi_.global_linux import ISCSIGlobalService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+BASENAME = "iqn.2005-10.org.freenas.ctl"
+TARGETS = 10
+SESSIONS_PER_TARGET = 100
+
+
+def write(path, value):
+    with open(path, "w") as f:
+        f.write(f"{value}\n")
+
+
+def create_session(target_dir, initiator, addr):
+    session_dir = os.path.join(target_dir, "sessions", initiator)
+    os.makedirs(os.path.join(session_dir, addr))
+    os.makedirs(os.path.join(session_dir, "luns"))
+    write(os.path.join(session_dir, addr, "ip"), addr)
+    write(os.path.join(session_dir, addr, "cid"), 0)
+    write(os.path.join(session_dir, "HeaderDigest"), "None")
+    write(os.path.join(session_dir, "DataDigest"), "CRC32C")
+    write(os.path.join(session_dir, "MaxBurstLength"), 1048576)
+    write(os.path.join(session_dir, "MaxRecvDataSegmentLength"), 262144)
+    write(os.path.join(session_dir, "MaxXmitDataSegmentLength"), 1048576)
+    write(os.path.join(session_dir, "FirstBurstLength"), 65536)
+    write(os.path.join(session_dir, "ImmediateData"), "Yes")
+    write(os.path.join(session_dir, "initiator_name"), initiator.rsplit("#", 1)[0])
+
+
+@pytest.fixture(scope="module")
+def scst(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("scst")
+    for t in range(TARGETS):
+        target_dir = tmp_path / f"{BASENAME}:target{t}"
+        for s in range(SESSIONS_PER_TARGET):
+            create_session(target_dir, f"iqn.1991-05.com.microsoft:host{s}#10.0.{t}.{s}", f"10.0.{t}.{s}")
+
+    create_session(tmp_path / "iqn.2000-01.com.example:other", "iqn.1991-05.com.microsoft:host0#10.1.0.0", "10.1.0.0")
+    (tmp_path / "enabled").write_text("1\n")
+
+    with patch.object(global_linux, "SCST_ISCSI_TARGETS", str(tmp_path)):
+        yield tmp_path
+
+
+@contextlib.contextmanager
+def new_session(scst):
+    target_dir = scst / f"{BASENAME}:target0"
+    create_session(target_dir, "iqn.1991-05.com.microsoft:new#10.2.0.0", "10.2.0.0")
+    try:
+        yield
+    finally:
+        shutil.rmtree(target_dir / "sessions" / "iqn.1991-05.com.microsoft:new#10.2.0.0")
+
+
+def sessions_service():
+    m = Middleware()
+    m["iscsi.global.config"] = Mock(return_value={"basename": BASENAME})
+    return create_service(m, ISCSIGlobalService)
+
+
+def test__sessions(scst):
+    sessions = sessions_service().sessions()
+
+    assert len(sessions) == TARGETS * SESSIONS_PER_TARGET
+    assert sorted(sessions, key=lambda s: (s["target"], s["initiator_addr"]))[0] == {
+        "initiator": "iqn.1991-05.com.microsoft:host0",
+        "initiator_addr": "10.0.0.0",
+        "initiator_alias": None,
+        "target": f"{BASENAME}:target0",
+        "target_alias": "target0",
+        "header_digest": None,
+        "data_digest": "CRC32C",
+        "max_data_segment_length": 1048576,
+        "max_receive_data_segment_length": 262144,
+        "max_xmit_data_segment_length": 1048576,
+        "max_burst_length": 1048576,
+        "first_burst_length": 65536,
+        "immediate_data": True,
+        "iser": False,
+        "offload": False,
+    }
+
+
+def test__sessions_filters(scst):
+    assert sessions_service().sessions([["target", "=", f"{BASENAME}:target3"]], {"count": True}) == (
+        SESSIONS_PER_TARGET
+    )
+
+
+def test__sessions_without_connection_are_skipped(scst):
+    session_dir = scst / f"{BASENAME}:target0" / "sessions" / "iqn.1991-05.com.microsoft:closing#10.0.0.255"
+    os.makedirs(session_dir)
+    try:
+        assert len(sessions_service().sessions()) == TARGETS * SESSIONS_PER_TARGET
+    finally:
+        os.rmdir(session_dir)
+
+
+def test__sessions_are_cached(scst):
+    service = sessions_service()
+    assert len(service.sessions()) == TARGETS * SESSIONS_PER_TARGET
+
+    with new_session(scst):
+        assert len(service.sessions()) == TARGETS * SESSIONS_PER_TARGET
+        assert len(service.sessions([], {"extra": {"max_age": 0}})) == TARGETS * SESSIONS_PER_TARGET + 1
+
+
+def test__sessions_cache_clear(scst):
+    service = sessions_service()
+    assert len(service.sessions()) == TARGETS * SESSIONS_PER_TARGET
+
+    with new_session(scst):
+        service.sessions_cache_clear()
+
+        assert len(service.sessions()) == TARGETS * SESSIONS_PER_TARGET + 1
+
+
+def test__sessions_cache_is_not_modified_by_callers(scst):
+    service = sessions_service()
+    service.sessions()[0]["initiator"] = "modified"
+
+    assert all(session["initiator"] != "modified" for session in service.sessions())
+
+
+def test__scst_not_running(tmp_path):
+    with patch.object(global_linux, "SCST_ISCSI_TARGETS", str(tmp_path / "nonexistent")):
+        assert sessions_service().sessions() == []
@@ -0,0 +1,144 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from middlewared.plugins import usage
+from middlewared.plugins.usage import UsageService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+ISCSI_TARGETS = 100
+
+
+def dataset(name, type_='FILESYSTEM'):
+    return {
+        'id': name,
+        'type': type_,
+        'snapshot_count': 1,
+        'properties': {
+            k: {'parsed': 1024}
+            for k in (
+                'available', 'used', 'usedbydataset', 'usedbysnapshots', 'usedbychildren', 'usedbyrefreservation',
+            )
+        },
+    }
+
+
+@pytest.fixture
+def usage_service():
+    m = Middleware()
+    m.create_task = asyncio.ensure_future
+    m.update({
+        'interface.query': Mock(return_value=[]),
+        'datastore.query': Mock(return_value=[{'service': 'rsync', 'enable': True}]),
+        'zfs.dataset.query': Mock(return_value=[dataset('tank'), dataset('tank/ds'), dataset('tank/zvol', 'VOLUME')]),
+        'zfs.dataset.path_to_dataset': Mock(return_value='tank/ds'),
+        'cloudsync.query': Mock(return_value=[
+            {
+                'enabled': True, 'direction': 'PUSH', 'locked': False, 'path': '/mnt/tank/ds',
+                'credentials': {'provider': 'S3'},
+            },
+            {
+                'enabled': False, 'direction': 'PUSH', 'locked': False, 'path': '/mnt/tank/ds',
+                'credentials': {'provider': 'B2'},
+            },
+        ]),
+        'rsynctask.query': Mock(return_value=[]),
+        'replication.query': Mock(return_value=[]),
+        'failover.licensed': Mock(return_value=False),
+        'rsyncmod.query': Mock(return_value=0),
+        'ldap.config': Mock(return_value={'kerberos_realm': None, 'has_samba_schema': False}),
+        'directoryservices.get_state': Mock(return_value={}),
+        'system.cpu_info': Mock(return_value={'core_count': 4, 'cpu_model': 'CPU'}),
+        'system.mem_info': Mock(return_value={'physmem_size': 1024}),
+        'disk.query': Mock(return_value=[{'model': 'DISK'}]),
+        'kubernetes.config': Mock(return_value={'cluster_cidr': '', 'service_cidr': ''}),
+        'catalog.query': Mock(return_value=[]),
+        'catalog.official_catalog_label': Mock(return_value='TRUENAS'),
+        'chart.release.query': Mock(return_value=[]),
+        'kubernetes.list_backups': Mock(return_value=[]),
+        'kubernetes.get_system_update_backup_prefix': Mock(return_value='system-update-'),
+        'container.image.query': Mock(return_value=[]),
+        'system.product_type': Mock(return_value='SCALE'),
+        'system.version': Mock(return_value='TrueNAS-SCALE-23.10'),
+        'system.host_id': Mock(return_value='host_id'),
+        'user.query': Mock(return_value=1),
+        'pool.query': Mock(return_value=[{
+            'name': 'tank', 'status': 'ONLINE', 'size': 2048, 'encrypt': 0,
+            'topology': {'data': [{'path': '/dev/sda'}], 'cache': [], 'log': []},
+        }]),
+        'sharing.nfs.query': Mock(return_value=[]),
+        'sharing.smb.query': Mock(return_value=[]),
+        'sharing.webdav.query': Mock(return_value=[]),
+        'iscsi.targetextent.query': Mock(return_value=[
+            {'target': i, 'extent': i} for i in range(1, ISCSI_TARGETS + 1)
+        ]),
+        'iscsi.target.query': Mock(return_value=[
+            {'id': i, 'mode': 'ISCSI', 'groups': []} for i in range(1, ISCSI_TARGETS + 1)
+        ]),
+        'iscsi.extent.query': Mock(return_value=[
+            {
+                'id': i, 'type': 'DISK', 'filesize': 0, 'blocksize': 512, 'pblocksize': False,
+                'avail_threshold': None, 'insecure_tpc': True, 'xen': False, 'rpm': 'SSD', 'ro': False,
+                'vendor': 'TrueNAS',
+            }
+            for i in range(1, ISCSI_TARGETS + 1)
+        ]),
+        'vm.query': Mock(return_value=[]),
+    })
+    svc = create_service(m, UsageService)
+    for name in dir(svc):
+        if name.startswith('gather_'):
+            m[f'usage.{name}'] = getattr(svc, name)
+
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_gather_queries_once(usage_service):
+    stats = await usage_service.gather()
+
+    for name, method in usage_service.middleware.items():
+        if isinstance(method, Mock) and name not in ('zfs.dataset.path_to_dataset', 'failover.licensed'):
+            assert method.call_count <= 1, name
+
+    usage_service.middleware['cloudsync.query'].assert_called_once_with()
+    assert stats['cloud_services'] == ['S3']
+    assert stats['data_backup_stats']['cloudsync'] == 1024
+    assert len(stats['shares']) == ISCSI_TARGETS
+    assert stats['shares'][0]['iscsi_type'] == 'DISK'
+    assert stats['pools'][0]['disks'] == 1
+    assert stats['total_capacity'] == 2048
+
+
+@pytest.mark.asyncio
+async def test_gather_concurrency(usage_service):
+    running = 0
+    max_running = 0
+
+    def gatherer(name):
+        async def gather(context):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {name: True}
+        return gather
+
+    names = [name for name in usage_service.middleware if name.startswith('usage.gather_')]
+    for name in names:
+        usage_service.middleware[name] = gatherer(name)
+
+    stats = await usage_service.gather()
+
+    assert max_running == usage.GATHER_CONCURRENCY
+    assert stats == {name: True for name in names}
+
+
+@pytest.mark.asyncio
+async def test_gather_restricted(usage_service):
+    stats = await usage_service.gather(['gather_total_capacity', 'gather_system_version'])
+
+    assert stats == {'total_capacity': 2048, 'platform': 'TrueNAS-SCALE', 'version': 'TrueNAS-SCALE-23.10'}
@@ -0,0 +1,76 @@
+import multiprocessing
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from middlewared.plugins.zfs_.events import coalesce_zfs_events, receive_zfs_events
+from middlewared.plugins.zfs_.zfs_events import zfs_events
+from middlewared.pytest.unit.middleware import Middleware
+
+POOLS = ['tank', 'data', 'backup']
+
+
+def event_storm(count=10000):
+    for i in range(count):
+        pool = POOLS[i % len(POOLS)]
+        if i % 5 == 0:
+            yield {'class': 'sysevent.fs.zfs.config_sync', 'pool': pool, 'guid': i}
+        elif i % 5 == 1:
+            yield {
+                'class': 'sysevent.fs.zfs.history_event', 'pool': pool, 'history_dsname': f'{pool}/ds{i % 20}',
+                'history_internal_name': 'set',
+            }
+        else:
+            yield {'class': 'resource.fs.zfs.statechange', 'pool': pool, 'vdev_path': f'/dev/sd{i % 24}'}
+
+
+def test__coalesce_zfs_events_keeps_most_recent_order():
+    events = coalesce_zfs_events([
+        {'class': 'sysevent.fs.zfs.history_event', 'pool': 'tank', 'history_dsname': 'tank/a',
+         'history_internal_name': 'create'},
+        {'class': 'sysevent.fs.zfs.history_event', 'pool': 'tank', 'history_dsname': 'tank/a',
+         'history_internal_name': 'destroy'},
+        {'class': 'sysevent.fs.zfs.history_event', 'pool': 'tank', 'history_dsname': 'tank/a',
+         'history_internal_name': 'create'},
+        {'class': 'sysevent.fs.zfs.history_event', 'pool': 'tank', 'history_dsname': 'tank/b',
+         'history_internal_name': 'create'},
+    ])
+
+    assert [(e['history_dsname'], e['history_internal_name']) for e in events] == [
+        ('tank/a', 'destroy'), ('tank/a', 'create'), ('tank/b', 'create'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test__zfs_events_storm_bounded_pool_queries():
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    sender = threading.Thread(target=lambda: [child_conn.send(event) for event in event_storm()], daemon=True)
+    sender.start()
+
+    batches = []
+    while parent_conn.poll(1):
+        batches.append(receive_zfs_events(parent_conn))
+    sender.join()
+
+    m = Middleware()
+    m['cache.pop'] = Mock()
+    m['system.ready'] = Mock(return_value=False)
+    m['device.get_disks'] = Mock(return_value={})
+    m['alert.oneshot_create'] = Mock()
+    m['alert.oneshot_delete'] = Mock()
+    m['pool.dataset.is_internal_dataset'] = Mock(return_value=False)
+    m['pool.query'] = Mock(side_effect=lambda filters: [
+        {'id': i, 'name': name} for i, name in enumerate(POOLS) if name in filters[0][2]
+    ])
+    m['pool.dataset.query'] = Mock(side_effect=lambda filters: [{'id': ds} for ds in filters[0][2]])
+    for batch in batches:
+        await zfs_events(m, batch)
+
+    # 10k events end up in a handful of batch windows and every window refreshes all pools at once
+    assert len(batches) < 10
+    assert m['pool.query'].call_count == len(batches)
+    assert m['pool.dataset.query'].call_count == len(batches)
+    assert m['device.get_disks'].call_count == len(batches)
+    assert m['cache.pop'].call_count == len(batches)
+    assert {call.kwargs['id'] for call in m.send_event.call_args_list if call.args[0] == 'pool.query'} == {0, 1, 2}
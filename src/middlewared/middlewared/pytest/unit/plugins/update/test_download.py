@@ -0,0 +1,173 @@
+import contextlib
+import hashlib
+import http.server
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from middlewared.plugins.update_ import download
+from middlewared.plugins.update_.download import UpdateService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+from middlewared.service_exception import CallError
+
+SIZE = 20 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+class UpdateServer(http.server.ThreadingHTTPServer):
+    def __init__(self, data):
+        super().__init__(("127.0.0.1", 0), UpdateRequestHandler)
+        self.data = data
+        # Offsets at which the connection is reset (once)
+        self.resets = []
+        self.ranges = []
+
+
+class UpdateRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        start = int(self.headers["Range"].removeprefix("bytes=").removesuffix("-"))
+        self.server.ranges.append(start)
+
+        data = self.server.data
+        self.send_response(206)
+        self.send_header("Content-Length", str(len(data) - start))
+        self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.end_headers()
+
+        end = len(data)
+        if self.server.resets and self.server.resets[0] > start:
+            end = self.server.resets.pop(0)
+
+        self.wfile.write(data[start:end])
+        if end != len(data):
+            self.wfile.flush()
+            # Give the client time to read the data, it is discarded when the connection is reset
+            time.sleep(0.5)
+            # Reset the connection instead of closing it gracefully
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.connection.close()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def data():
+    return os.urandom(SIZE)
+
+
+@pytest.fixture
+def server(data):
+    server = UpdateServer(data)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def update_service(data, server):
+    m = Middleware()
+    m["update.check_train"] = Mock(return_value={
+        "status": "AVAILABLE",
+        "filename": "update.sqsh",
+        "filesize": len(data),
+        "checksum": hashlib.sha256(data).hexdigest(),
+    })
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(patch.object(download, "CHUNK_SIZE", CHUNK_SIZE))
+        stack.enter_context(patch.object(download, "scale_update_server", Mock(
+            return_value=f"http://127.0.0.1:{server.server_address[1]}"
+        )))
+        stack.enter_context(patch.object(download, "time", Mock(monotonic=time.monotonic)))
+        yield create_service(m, UpdateService)
+
+
+def test_download_resumes_after_connection_resets(tmp_path, data, server, update_service):
+    server.resets = [5 * CHUNK_SIZE, 12 * CHUNK_SIZE + 100]
+
+    with patch.object(download, "hash_file") as hash_file:
+        assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    assert (tmp_path / "update.sqsh").read_bytes() == data
+    # Downloaded data is hashed as it is written
+    hash_file.assert_not_called()
+    assert server.ranges[0] == 0
+    assert len(server.ranges) == 3
+    assert 0 < server.ranges[1] <= 5 * CHUNK_SIZE
+    assert server.ranges[1] < server.ranges[2] <= 12 * CHUNK_SIZE + 100
+    assert json.loads((tmp_path / "update.sqsh.state").read_text())["verified"] is True
+
+
+def test_download_progress_is_throttled(tmp_path, data, server, update_service):
+    job = Mock()
+    with patch.object(download, "PROGRESS_INTERVAL", 3600):
+        assert update_service.download_impl_scale(job, "train", tmp_path, 50)
+
+    # Manifest retrieval and the first chunk
+    assert job.set_progress.call_count == 2
+
+
+def test_verified_download_is_not_read_again(tmp_path, data, server, update_service):
+    assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    with patch.object(download, "hash_file") as hash_file:
+        assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    hash_file.assert_not_called()
+    assert len(server.ranges) == 1
+
+
+def test_existing_update_is_verified(tmp_path, data, server, update_service):
+    (tmp_path / "update.sqsh").write_bytes(data)
+
+    assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    assert server.ranges == []
+    assert json.loads((tmp_path / "update.sqsh.state").read_text())["verified"] is True
+
+
+def test_partial_download_is_resumed(tmp_path, data, server, update_service):
+    server.resets = [7 * CHUNK_SIZE]
+    with patch.object(download, "RECOVERABLE_ERRORS", ()):
+        with pytest.raises(Exception):
+            update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    size = (tmp_path / "update.sqsh").stat().st_size
+    assert 0 < size <= 7 * CHUNK_SIZE
+
+    assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    assert (tmp_path / "update.sqsh").read_bytes() == data
+    assert server.ranges == [0, size]
+
+
+def test_partial_download_of_another_update_is_discarded(tmp_path, data, server, update_service):
+    (tmp_path / "update.sqsh").write_bytes(data[:CHUNK_SIZE])
+    (tmp_path / "update.sqsh.state").write_text(json.dumps({"checksum": "another", "verified": False}))
+
+    assert update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    assert (tmp_path / "update.sqsh").read_bytes() == data
+    assert server.ranges == [0]
+
+
+def test_corrupted_download(tmp_path, data, server, update_service):
+    server.data = data[:-1] + bytes([data[-1] ^ 1])
+
+    with pytest.raises(CallError) as ve:
+        update_service.download_impl_scale(Mock(), "train", tmp_path, 50)
+
+    assert "checksum mismatch" in ve.value.errmsg
+    assert not (tmp_path / "update.sqsh").exists()
+    assert not (tmp_path / "update.sqsh.state").exists()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+
+import libvirt
+import pytest
+
+from middlewared.plugins.vm.connection import LibvirtConnectionMixin
+from middlewared.plugins.vm.events import VMService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+VMS = 10
+EVENTS = 1000
+
+
+def domain(name, state):
+    dom = Mock()
+    dom.name.return_value = name
+    dom.state.return_value = [state, 1]
+    return dom
+
+
+@pytest.fixture
+def vm_service():
+    rows = [{'id': i, 'name': f'vm{i}', 'status': {}} for i in range(1, VMS + 1)]
+
+    async def query(filters, options):
+        await query.blocked.wait()
+        return [dict(row, status={}) for row in rows if row['id'] in filters[0][2]]
+
+    query.blocked = asyncio.Event()
+
+    m = Middleware()
+    m['datastore.query'] = Mock(return_value=rows)
+    m['vm.query'] = AsyncMock(side_effect=query)
+
+    svc = create_service(m, VMService)
+    connection = Mock()
+    connection.isAlive.return_value = False
+    with patch.object(LibvirtConnectionMixin, 'LIBVIRT_CONNECTION', connection):
+        with patch.object(LibvirtConnectionMixin, '_check_setup_connection'):
+            svc.setup_libvirt_events()
+            yield svc, connection.domainEventRegister.call_args[0][0], query.blocked
+
+
+def use_running_loop(svc):
+    svc.middleware.loop = asyncio.get_running_loop()
+    svc.middleware.create_task = svc.middleware.loop.create_task
+
+
+async def wait_processed(svc):
+    while svc.libvirt_events_task is not None:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_libvirt_events_are_coalesced(vm_service):
+    svc, callback, query_blocked = vm_service
+    use_running_loop(svc)
+
+    def fire():
+        for i in range(EVENTS):
+            vm_id = i % VMS + 1
+            # Domains end up running (STARTED) except the last one that ends up stopped (STOPPED)
+            stopped = vm_id == VMS and i >= EVENTS - VMS
+            callback(None, domain(f'{vm_id}_vm{vm_id}', 5 if stopped else 1), 5 if stopped else 2, 0, None)
+
+    # libvirt event loop thread is not blocked by event processing
+    thread = threading.Thread(target=fire)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+    await asyncio.sleep(0.1)
+    query_blocked.set()
+    await wait_processed(svc)
+
+    # Pending events were merged into a single batch for each domain
+    assert svc.middleware['vm.query'].call_count <= 2
+    events = {}
+    for call in svc.middleware.send_event.call_args_list:
+        events[call.kwargs['id']] = (call.args[1], call.kwargs['fields']['status']['state'], call.kwargs['state'])
+    assert len(svc.middleware.send_event.call_args_list) < EVENTS
+    assert events == {
+        vm_id: ('CHANGED', 'SHUTOFF', 'SHUTOFF') if vm_id == VMS else ('CHANGED', 'RUNNING', 'BLOCKED')
+        for vm_id in range(1, VMS + 1)
+    }
+
+
+@pytest.mark.asyncio
+async def test_libvirt_events_unknown_domains(vm_service):
+    svc, callback, query_blocked = vm_service
+    use_running_loop(svc)
+    query_blocked.set()
+
+    svc.libvirt_domain_unregister({'id': 1, 'name': 'vm1'})
+    svc.libvirt_domain_register({'id': VMS + 1, 'name': 'new'})
+    dom = domain(f'{VMS + 1}_new', 1)
+    dom.state.side_effect = libvirt.libvirtError('Domain not found')
+
+    svc.middleware.loop.call_soon(callback, None, domain('1_vm1', 1), 2, 0, None)
+    svc.middleware.loop.call_soon(callback, None, domain('unrelated', 1), 2, 0, None)
+    svc.middleware.loop.call_soon(callback, None, domain('2_vm2', 5), 1, 0, None)
+    svc.middleware.loop.call_soon(callback, None, dom, 0, 0, None)
+    await asyncio.sleep(0.1)
+    await wait_processed(svc)
+
+    svc.middleware['vm.query'].assert_called_once_with([['id', 'in', [2, VMS + 1]]], {'force_sql_filters': True})
+    # VM does not exist in database yet (it's being created)
+    assert [
+        (call.args[1], call.kwargs['id'], call.kwargs['fields']['status']['state'], call.kwargs['state'])
+        for call in svc.middleware.send_event.call_args_list
+    ] == [('CHANGED', 2, 'UPDATING CONFIGURATION', 'RUNNING')]
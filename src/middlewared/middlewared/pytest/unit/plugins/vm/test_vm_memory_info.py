@@ -0,0 +1,73 @@
+from unittest.mock import Mock, patch
+
+import libvirt
+import pytest
+
+from middlewared.plugins.vm.connection import LibvirtConnectionMixin
+from middlewared.plugins.vm.vm_memory_info import VMService
+from middlewared.pytest.unit.helpers import create_service
+from middlewared.pytest.unit.middleware import Middleware
+
+VMS = 200
+MB = 1024 * 1024
+
+
+@pytest.fixture(scope='module')
+def libvirt_connection():
+    connection = libvirt.open('test:///default')
+    for i in range(1, VMS + 1):
+        # Guests are consuming half of the memory they are provisioned with
+        domain = connection.defineXML(
+            f'<domain type="test"><name>{i}_vm{i}</name><memory>262144</memory><os><type>hvm</type></os></domain>'
+        )
+        if i % 4 == 0:
+            domain.create()
+        elif i % 4 == 1:
+            domain.create()
+            domain.suspend()
+
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def vm_service(libvirt_connection):
+    connection = Mock(wraps=libvirt_connection)
+    rows = [{'id': i, 'name': f'vm{i}', 'memory': 512, 'autostart': i % 2 == 0} for i in range(1, VMS + 1)]
+    # Guest that does not have a domain
+    rows.append({'id': VMS + 1, 'name': 'undefined', 'memory': 512, 'autostart': True})
+    m = Middleware()
+    m['datastore.query'] = Mock(return_value=rows)
+    m['sysctl.get_arcstats_size'] = Mock(return_value=0)
+    m['sysctl.get_arc_min'] = Mock(return_value=0)
+    svc = create_service(m, VMService)
+    with patch.object(LibvirtConnectionMixin, 'LIBVIRT_CONNECTION', connection):
+        with patch.object(LibvirtConnectionMixin, 'KVM_SUPPORTED', True):
+            yield svc, connection
+
+
+@pytest.mark.asyncio
+async def test_get_vmemory_in_use(vm_service):
+    svc, connection = vm_service
+
+    assert await svc.get_vmemory_in_use() == {
+        'RNP': VMS // 4 * 512 * MB,
+        'PRD': (VMS // 4 + 1) * 512 * MB,
+        'RPRD': VMS // 4 * 512 * MB,
+    }
+
+    svc.middleware['datastore.query'].assert_called_once()
+    connection.getAllDomainStats.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_available_memory(vm_service):
+    svc, connection = vm_service
+
+    with patch('middlewared.plugins.vm.vm_memory_info.psutil') as psutil:
+        psutil.virtual_memory.return_value.available = 1000 * 1024 * MB
+        psutil.swap_memory.return_value.used = 0
+        assert await svc.get_available_memory(False) == int(1000 * 1024 * MB * 0.9) - VMS // 2 * 256 * MB
+
+    svc.middleware['datastore.query'].assert_called_once()
+    connection.getAllDomainStats.assert_called_once()
@@ -0,0 +1,92 @@
+from unittest.mock import Mock, patch
+
+import libvirt
+import pytest
+
+from middlewared.plugins.vm.connection import LibvirtConnectionMixin
+from middlewared.plugins.vm.vm_supervisor import VMSupervisorMixin
+from middlewared.pytest.unit.helpers import load_compound_service
+from middlewared.pytest.unit.middleware import Middleware
+
+VMService = load_compound_service('vm')
+VMS = 200
+
+
+class CountingConnection:
+    """
+    Proxies libvirt connection counting the calls made to it.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.calls = []
+
+    def __getattr__(self, item):
+        attr = getattr(self.connection, item)
+        if callable(attr):
+            def wrapper(*args, **kwargs):
+                self.calls.append(item)
+                return attr(*args, **kwargs)
+            return wrapper
+        return attr
+
+
+@pytest.fixture(scope='module')
+def libvirt_connection():
+    # Stateful test driver that resets to a single `test` domain every time it is opened
+    connection = libvirt.open('test:///default')
+    for i in range(1, VMS + 1):
+        domain = connection.defineXML(
+            f'<domain type="test"><name>{i}_vm{i}</name><memory>1024</memory><os><type>hvm</type></os></domain>'
+        )
+        if i % 4 == 0:
+            domain.create()
+        elif i % 4 == 1:
+            domain.create()
+            domain.suspend()
+
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def vm_service(libvirt_connection):
+    connection = CountingConnection(libvirt_connection)
+    rows = [{'id': i, 'name': f'vm{i}'} for i in range(1, VMS + 1)]
+    supervisors = {row['name']: Mock(libvirt_domain_name=f'{row["id"]}_{row["name"]}') for row in rows}
+    m = Middleware()
+    m['vm.device.query'] = Mock(return_value=[
+        {'id': i, 'vm': vm_id, 'dtype': 'NIC'} for i, vm_id in enumerate(range(1, VMS + 1), 1)
+    ])
+    with patch.object(LibvirtConnectionMixin, 'LIBVIRT_CONNECTION', connection):
+        with patch.object(LibvirtConnectionMixin, 'KVM_SUPPORTED', True):
+            with patch.object(VMSupervisorMixin, 'vms', supervisors):
+                yield VMService(m), rows, connection
+
+
+@pytest.mark.asyncio
+async def test_vm_query_extend_context(vm_service):
+    svc, rows, connection = vm_service
+
+    context = svc.extend_context(rows, {})
+
+    # Connection liveness checks and a single call to retrieve all the domains states
+    assert set(connection.calls) == {'isAlive', 'getLibVersion', 'getAllDomainStats'}
+    assert connection.calls.count('getAllDomainStats') == 1
+    svc.middleware['vm.device.query'].assert_called_once()
+    assert context['status'][1] == {'state': 'SUSPENDED', 'pid': None, 'domain_state': 'PAUSED'}
+    assert context['status'][2] == {'state': 'STOPPED', 'pid': None, 'domain_state': 'SHUTOFF'}
+    assert context['status'][4] == {'state': 'RUNNING', 'pid': None, 'domain_state': 'RUNNING'}
+    assert context['devices'][3] == [{'id': 3, 'vm': 3, 'dtype': 'NIC'}]
+
+    vm = await svc.extend_vm(dict(rows[3]), context)
+    assert vm['status']['state'] == 'RUNNING'
+    assert vm['devices'] == [{'id': 4, 'vm': 4, 'dtype': 'NIC'}]
+
+
+def test_vm_query_vm_without_supervisor(vm_service):
+    svc, rows, connection = vm_service
+
+    context = svc.extend_context(rows + [{'id': VMS + 1, 'name': 'undefined'}], {})
+
+    assert context['status'][VMS + 1]['state'] == 'ERROR'
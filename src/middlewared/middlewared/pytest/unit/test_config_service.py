@@ -0,0 +1,118 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from middlewared.service import ConfigService
+from middlewared.service.core_service import CoreService
+from middlewared.pytest.unit.middleware import Middleware
+
+
+class CachedConfigService(ConfigService):
+
+    class Config:
+        namespace = 'test.cached'
+        datastore = 'test.cached'
+        config_cache = True
+        config_cache_datastores = ['test.dependency']
+
+    async def do_update(self, data):
+        return data
+
+
+class UncachedConfigService(ConfigService):
+
+    class Config:
+        namespace = 'test.uncached'
+        datastore = 'test.uncached'
+
+
+def create_services():
+    m = Middleware()
+    m['datastore.config'] = AsyncMock(side_effect=lambda *args: {'id': 1, 'list': [1, 2]})
+    services = {
+        'core': CoreService(m),
+        'test.cached': CachedConfigService(m),
+        'test.uncached': UncachedConfigService(m),
+    }
+    m.get_services = lambda: services
+    m['core.config_cache_invalidate'] = services['core'].config_cache_invalidate
+    m['core.config_cache_stats'] = services['core'].config_cache_stats
+    return m, services
+
+
+@pytest.mark.asyncio
+async def test__config_is_cached():
+    m, services = create_services()
+
+    assert await services['test.cached'].config() == {'id': 1, 'list': [1, 2]}
+    assert await services['test.cached'].config() == {'id': 1, 'list': [1, 2]}
+    assert m['datastore.config'].await_count == 1
+
+    assert (await m.call('core.config_cache_stats'))['test.cached'] == {'hits': 1, 'misses': 1, 'cached': True}
+
+
+@pytest.mark.asyncio
+async def test__config_is_not_cached_by_default():
+    m, services = create_services()
+
+    await services['test.uncached'].config()
+    await services['test.uncached'].config()
+    assert m['datastore.config'].await_count == 2
+
+    assert 'test.uncached' not in await m.call('core.config_cache_stats')
+
+
+@pytest.mark.asyncio
+async def test__cached_config_can_not_be_modified_by_caller():
+    m, services = create_services()
+
+    (await services['test.cached'].config())['list'].append(3)
+
+    assert await services['test.cached'].config() == {'id': 1, 'list': [1, 2]}
+
+
+@pytest.mark.parametrize('datastore,invalidated', [
+    ('test.cached', True),
+    ('test_cached', True),
+    ('test.dependency', True),
+    ('test_dependency', True),
+    (None, True),
+    ('test.unrelated', False),
+])
+@pytest.mark.asyncio
+async def test__datastore_write_invalidates_cache(datastore, invalidated):
+    m, services = create_services()
+
+    await services['test.cached'].config()
+    await m.call('core.config_cache_invalidate', datastore)
+    await services['test.cached'].config()
+
+    assert m['datastore.config'].await_count == (2 if invalidated else 1)
+
+
+@pytest.mark.asyncio
+async def test__update_invalidates_cache():
+    m, services = create_services()
+    m._call = AsyncMock(return_value={})
+
+    await services['test.cached'].config()
+    await services['test.cached'].update({})
+    await services['test.cached'].config()
+
+    assert m['datastore.config'].await_count == 2
+
+
+@pytest.mark.asyncio
+async def test__config_retrieved_during_invalidation_is_not_cached():
+    m, services = create_services()
+
+    async def config(*args):
+        await m.call('core.config_cache_invalidate', 'test.cached')
+        return {'id': 1}
+
+    m['datastore.config'] = AsyncMock(side_effect=config)
+
+    await services['test.cached'].config()
+    await services['test.cached'].config()
+
+    assert m['datastore.config'].await_count == 2
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import threading
+import urllib.parse
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from middlewared.main import FileApplication
+from middlewared.pipe import Pipe, Pipes
+from middlewared.restful import copy_multipart_to_pipe, copy_pipe_to_response
+
+DATA = os.urandom(10 * 1024 * 1024 + 123)
+
+
+def middleware():
+    m = Mock()
+    m.run_in_thread = AsyncMock(side_effect=lambda f, *args: f(*args))
+    return m
+
+
+@pytest.mark.asyncio
+async def test__copy_pipe_to_response():
+    pipe = Pipe(middleware())
+
+    def write():
+        with pipe.w:
+            for i in range(0, len(DATA), 100000):
+                pipe.w.write(DATA[i:i + 100000])
+
+    async def handler(request):
+        threading.Thread(target=write, daemon=True).start()
+        resp = web.StreamResponse(headers={'Transfer-Encoding': 'chunked'})
+        await resp.prepare(request)
+        await copy_pipe_to_response(asyncio.get_running_loop(), pipe, resp)
+        return resp
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    async with TestClient(TestServer(app)) as client:
+        resp = await client.get('/')
+        assert await resp.read() == DATA
+
+
+@pytest.mark.asyncio
+async def test__copy_multipart_to_pipe():
+    pipe = Pipe(middleware())
+    chunks = iter([DATA[i:i + 65536] for i in range(0, len(DATA), 65536)] + [b''])
+    filepart = Mock(read_chunk=AsyncMock(side_effect=lambda size: next(chunks)))
+
+    result = []
+    reader = threading.Thread(target=lambda: result.append(pipe.r.read()), daemon=True)
+    reader.start()
+    await copy_multipart_to_pipe(asyncio.get_running_loop(), filepart, pipe)
+    await asyncio.get_running_loop().run_in_executor(None, reader.join)
+
+    assert pipe.w.closed
+    assert result == [DATA]
+
+
+@asynccontextmanager
+async def buffered_download():
+    m = middleware()
+    m.loop = asyncio.get_running_loop()
+    m.call = AsyncMock(return_value={'attributes': {'job': 1, 'filename': 'debug.tgz'}})
+
+    pipe = Pipe(m, buffered=True)
+    pipe.w.write(DATA)
+    job = Mock(pipes=Pipes(output=pipe))
+    m.jobs = {1: job}
+
+    fileapp = FileApplication(m, m.loop)
+    fileapp.register_job(1, True)
+
+    app = web.Application()
+    app.router.add_route('*', '/_download{path_info:.*}', fileapp.download)
+    async with TestClient(TestServer(app)) as client:
+        yield client, fileapp, pipe
+
+    await pipe.close()
+
+
+@pytest.mark.asyncio
+async def test__buffered_download_resume():
+    async with buffered_download() as (client, fileapp, pipe):
+        url = f'/_download/1?{urllib.parse.urlencode({"auth_token": "token"})}'
+
+        resp = await client.get(url, headers={'Range': 'bytes=0-999'})
+        assert resp.status == 206
+        assert await resp.read() == DATA[:1000]
+        # Partially downloaded file is kept so the download can be resumed
+        assert 1 in fileapp.jobs
+
+        resp = await client.get(url, headers={'Range': 'bytes=1000-'})
+        assert resp.status == 206
+        assert resp.headers['Content-Disposition'] == 'attachment; filename="debug.tgz"'
+        assert await resp.read() == DATA[1000:]
+        assert 1 not in fileapp.jobs
+        assert pipe.w.closed
+
+        resp = await client.get(url)
+        assert resp.status == 410
+
+
+@pytest.mark.asyncio
+async def test__buffered_download_whole():
+    async with buffered_download() as (client, fileapp, pipe):
+        resp = await client.get('/_download/1?auth_token=token')
+        assert resp.status == 200
+        assert await resp.read() == DATA
+        assert 1 not in fileapp.jobs
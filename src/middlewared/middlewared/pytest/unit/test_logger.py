@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from middlewared import logger as middlewared_logger
+from middlewared.logger import setup_log_queue, stop_log_queue
+
+RECORDS = 1000
+MESSAGE = "x" * 200
+
+
+class SlowPipe:
+    """
+    Stand-in for a slow log device: a pipe that is drained at ~200 KB/s.
+    """
+
+    def __init__(self):
+        r, w = os.pipe()
+        self.r = os.fdopen(r, "rb", buffering=0)
+        self.w = os.fdopen(w, "w")
+        self.data = bytearray()
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def _drain(self):
+        while data := self.r.read(4096):
+            self.data.extend(data)
+            time.sleep(0.02)
+
+    def close(self):
+        self.w.close()
+        self.thread.join()
+        self.r.close()
+
+
+@pytest.fixture
+def slow_logger():
+    pipe = SlowPipe()
+    handler = logging.StreamHandler(pipe.w)
+    handler.setLevel(logging.DEBUG)
+    # Not registered with the logging manager so that pytest does not attach its own handlers to it
+    log = logging.Logger("test_logger", logging.DEBUG)
+    log.addHandler(handler)
+    try:
+        yield log, pipe
+    finally:
+        stop_log_queue()
+        pipe.close()
+
+
+async def max_loop_latency(log):
+    latencies = []
+
+    async def tick():
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(0.01)
+            latencies.append(time.monotonic() - start - 0.01)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0.05)
+    for i in range(RECORDS):
+        log.debug("%d %s", i, MESSAGE)
+
+    await asyncio.sleep(0.05)
+    ticker.cancel()
+    return max(latencies)
+
+
+@pytest.mark.asyncio
+async def test__loop_latency_with_slow_log_device(slow_logger):
+    log, pipe = slow_logger
+    setup_log_queue([log])
+
+    assert await max_loop_latency(log) < 0.1
+
+
+def test__queued_records_are_written(slow_logger):
+    log, pipe = slow_logger
+    setup_log_queue([log])
+
+    for i in range(RECORDS):
+        log.debug("%d %s", i, MESSAGE)
+
+    stop_log_queue()
+    pipe.close()
+
+    assert pipe.data.decode().splitlines() == [f"{i} {MESSAGE}" for i in range(RECORDS)]
+
+
+def test__filtered_records_are_not_queued(slow_logger):
+    log, pipe = slow_logger
+    log.handlers[0].setLevel(logging.INFO)
+    listener = setup_log_queue([log])
+
+    log.debug("debug")
+    log.info("info")
+
+    assert listener.queue.qsize() <= 1
+    stop_log_queue()
+    pipe.close()
+    assert pipe.data.decode().splitlines() == ["info"]
+
+
+def test__overflow():
+    written = []
+    blocked = threading.Event()
+
+    class BlockingHandler(logging.Handler):
+        def emit(self, record):
+            blocked.wait()
+            written.append(self.format(record))
+
+    log = logging.Logger("test_logger_overflow")
+    log.addHandler(BlockingHandler())
+    setup_log_queue([log], queue_size=10)
+
+    for i in range(50):
+        log.warning("record %d", i)
+
+    blocked.set()
+    stop_log_queue()
+
+    records = [line for line in written if line.startswith("record")]
+    assert 10 <= len(records) <= 11
+    assert [line for line in written if not line.startswith("record")] == [
+        f"{50 - len(records)} log records were dropped because the log queue was full",
+    ]
+    assert middlewared_logger.log_queue_listener is None
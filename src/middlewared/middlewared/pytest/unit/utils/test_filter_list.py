@@ -1,4 +1,6 @@
-from middlewared.utils import filter_list
+import pytest
+
+from middlewared.utils import filter_getattrs, filter_list
 
 
 DATA = [
@@ -282,3 +284,14 @@ def test__filter_list_option_casefold_rnin():
 
 def test__filter_list_option_casefold_complex_data():
     assert len(filter_list(COMPLEX_DATA, [['Authentication.clientAccount', 'C=', 'JOINER']])) == 1
+
+
+@pytest.mark.parametrize('filters,attrs', [
+    ([], set()),
+    ([['foo', '=', 'foo1'], ['number', '>', 1]], {'foo', 'number'}),
+    ([['OR', [['foo', '=', 'foo1'], ['number', '=', 2]]]], {'foo', 'number'}),
+    ([['OR', [['foo', '=', 'foo1'], ['number', '=', 2], ['list', 'rin', 3]]]], {'foo', 'list', 'number'}),
+    ([['list', 'rin', 1], ['OR', [['foo', '=', 'foo1']]]], {'foo', 'list'}),
+])
+def test__filter_getattrs(filters, attrs):
+    assert filter_getattrs(filters) == attrs
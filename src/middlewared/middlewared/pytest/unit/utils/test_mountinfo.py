@@ -1,3 +1,11 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
 from middlewared.utils.osc.linux.mount import __parse_mntent
 
 
@@ -131,3 +139,59 @@ def test__readonly_in_mntinfo():
     __parse_mntent(line, data)
     assert 75 in data
     assert 'RO' in data[75]['mount_opts']
+
+
+def test__mntinfo_without_optional_fields():
+    line = r'64 44 0:39 / /tmp/mt1 rw,relatime - tmpfs tmpfs rw'
+    data = {}
+    __parse_mntent(line, data)
+    assert data[39]['fs_type'] == 'tmpfs'
+    assert data[39]['mount_source'] == 'tmpfs'
+    assert data[39]['super_opts'] == ['RW']
+
+
+MOUNT_TABLE_INVALIDATION_SCRIPT = textwrap.dedent("""
+    import os
+    import subprocess
+    import tempfile
+
+    from middlewared.utils.osc.linux.mount import getmntent, getmntinfo
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        before = getmntinfo()
+        mountpoints = [os.path.join(tmpdir, f'mnt{i}') for i in range(3)]
+        for i, mountpoint in enumerate(mountpoints):
+            os.mkdir(mountpoint)
+            subprocess.run(['mount', '-t', 'tmpfs', f'test_tmpfs{i}', mountpoint], check=True)
+
+            mntent = getmntent(mountpoint=mountpoint)
+            assert mntent['mount_source'] == f'test_tmpfs{i}', mntent
+            assert getmntent(mount_id=mntent['mount_id'])['mountpoint'] == mountpoint
+            devid = os.stat(mountpoint).st_dev
+            assert getmntinfo(devid)[devid]['mountpoint'] == mountpoint
+            assert getmntent(dev_id=devid)['mount_id'] == mntent['mount_id']
+
+        subprocess.run(['mount', '-o', 'remount,ro', mountpoints[0]], check=True)
+        assert 'RO' in getmntent(mountpoint=mountpoints[0])['mount_opts']
+
+        # Modifying a returned entry must not affect the cached table
+        getmntent(mountpoint=mountpoints[1])['mount_opts'].append('RO')
+        assert 'RO' not in getmntent(mountpoint=mountpoints[1])['mount_opts']
+
+        for mountpoint in mountpoints:
+            subprocess.run(['umount', mountpoint], check=True)
+            assert getmntent(mountpoint=mountpoint) is None
+
+        assert getmntinfo().keys() == before.keys()
+""")
+
+
+@pytest.mark.skipif(os.geteuid() != 0 or shutil.which('unshare') is None, reason='Requires root and unshare')
+def test__mount_table_invalidation():
+    if subprocess.run(['unshare', '--mount', 'true']).returncode != 0:
+        pytest.skip('Unable to create mount namespace')
+
+    subprocess.run(
+        ['unshare', '--mount', '--propagation', 'private', sys.executable, '-c', MOUNT_TABLE_INVALIDATION_SCRIPT],
+        check=True,
+    )
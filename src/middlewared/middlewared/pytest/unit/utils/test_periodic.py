@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from middlewared.utils.periodic import PeriodicTaskScheduler
+
+
+def scheduler(**kwargs):
+    loop = asyncio.get_running_loop()
+    middleware = Mock(loop=loop, create_task=loop.create_task)
+    return PeriodicTaskScheduler(middleware, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test__jitter():
+    s = scheduler(jitter=0.1, max_jitter=30)
+    for i in range(50):
+        s.add(f"task.hourly_{i}", 3600, False, Mock())
+        s.add(f"task.on_start_{i}", 3600, True, Mock())
+
+    stats = {task["name"]: task for task in s.stats()}
+    hourly = [stats[f"task.hourly_{i}"]["next_run_in"] for i in range(50)]
+    on_start = [stats[f"task.on_start_{i}"]["next_run_in"] for i in range(50)]
+
+    assert all(3570 <= delay <= 3630 for delay in hourly)
+    assert all(0 <= delay <= 30 for delay in on_start)
+    # Tasks with the same interval do not fire at the same moment
+    assert len({round(delay, 3) for delay in hourly}) > 40
+    assert len({round(delay, 3) for delay in on_start}) > 40
+
+    for task in s.tasks.values():
+        task.handle.cancel()
+
+
+@pytest.mark.asyncio
+async def test__overrun():
+    running = 0
+    max_running = 0
+
+    async def slow():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.25)
+        running -= 1
+
+    s = scheduler(jitter=0)
+    s.add("task.slow", 0.1, True, slow)
+    await asyncio.sleep(1.1)
+    s.tasks["task.slow"].handle.cancel()
+
+    stats = s.stats()[0]
+    assert max_running == 1
+    assert stats["runs"] >= 3
+    assert stats["overruns"] >= 5
+    assert stats["max_duration"] >= 0.25
+    assert stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test__errors_are_recorded():
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        raise ValueError(f"failure {calls}")
+
+    s = scheduler(jitter=0)
+    s.add("task.failing", 0.1, True, failing)
+    await asyncio.sleep(0.25)
+    s.tasks["task.failing"].handle.cancel()
+    await asyncio.sleep(0)
+
+    stats = s.stats()[0]
+    # Task keeps running after a failure
+    assert stats["runs"] == stats["errors"] == calls >= 2
+    assert stats["last_error"] == f"ValueError('failure {calls}')"
+
+
+@pytest.mark.asyncio
+async def test__adding_task_twice():
+    run = Mock(side_effect=lambda: asyncio.sleep(0))
+
+    s = scheduler(jitter=0)
+    s.add("task.run", 0.1, True, run)
+    s.add("task.run", 0.1, True, run)
+    await asyncio.sleep(0.05)
+    s.tasks["task.run"].handle.cancel()
+
+    assert len(s.stats()) == 1
+    assert run.call_count == 1
@@ -4,6 +4,7 @@ import binascii
 from collections import defaultdict
 import copy
 import errno
+import os
 import traceback
 import types
 import urllib.parse
@@ -19,6 +20,10 @@ from .service_exception import adapt_exception, CallError, MatchNotFound, Valida
 from .utils.nginx import get_remote_addr_port
 from .utils.origin import TCPIPOrigin
 
+# Chunks larger than this are allocated outside of the heap and page faulting them costs more than the extra
+# iterations of the copy loop
+PIPE_COPY_CHUNK_SIZE = 262144
+
 
 async def authenticate(middleware, request, method, resource):
     auth = request.headers.get('Authorization')
@@ -763,7 +768,7 @@ class Resource(object):
         try:
             result = await self.middleware.call(methodname, *method_args, **method_kwargs)
             if upload_pipe:
-                await self.middleware.run_in_thread(copy_multipart_to_pipe, self.middleware.loop, filepart, upload_pipe)
+                await copy_multipart_to_pipe(self.middleware.loop, filepart, upload_pipe)
             if method['downloadable'] and download_pipe is None:
                 result = await result.wait()
         except CallError as e:
@@ -811,16 +816,7 @@ class Resource(object):
             })
             await resp.prepare(req)
 
-            loop = asyncio.get_event_loop()
-
-            def do_copy():
-                while True:
-                    read = download_pipe.r.read(1048576)
-                    if read == b'':
-                        break
-                    asyncio.run_coroutine_threadsafe(resp.write(read), loop=loop).result()
-
-            await self.middleware.run_in_thread(do_copy)
+            await copy_pipe_to_response(self.middleware.loop, download_pipe, resp)
 
             await resp.drain()
             return resp
@@ -836,18 +832,54 @@ class Resource(object):
         return resp
 
 
-def copy_multipart_to_pipe(loop, filepart, pipe):
+async def wait_fd(loop, fd, writable=False):
+    """
+    Wait until non-blocking `fd` becomes readable (or `writable`).
+    """
+    add, remove = (loop.add_writer, loop.remove_writer) if writable else (loop.add_reader, loop.remove_reader)
+    fut = loop.create_future()
+    add(fd, lambda: fut.done() or fut.set_result(None))
+    try:
+        await fut
+    finally:
+        remove(fd)
+
+
+async def copy_multipart_to_pipe(loop, filepart, pipe):
+    fd = pipe.w.fileno()
+    os.set_blocking(fd, False)
     try:
         try:
             while True:
-                read = asyncio.run_coroutine_threadsafe(
-                    filepart.read_chunk(filepart.chunk_size),
-                    loop=loop,
-                ).result()
+                read = await filepart.read_chunk(PIPE_COPY_CHUNK_SIZE)
                 if read == b'':
                     break
-                pipe.w.write(read)
+
+                view = memoryview(read)
+                while view:
+                    try:
+                        view = view[os.write(fd, view):]
+                    except BlockingIOError:
+                        await wait_fd(loop, fd, writable=True)
         finally:
             pipe.w.close()
     except BrokenPipeError:
         pass
+
+
+async def copy_pipe_to_response(loop, pipe, resp):
+    fd = pipe.r.fileno()
+    os.set_blocking(fd, False)
+    while True:
+        try:
+            # Reads as much data as is available (up to the chunk size) so the chunks grow with the rate
+            # at which the job writes its output.
+            read = os.read(fd, PIPE_COPY_CHUNK_SIZE)
+        except BlockingIOError:
+            await wait_fd(loop, fd)
+            continue
+
+        if read == b'':
+            break
+
+        await resp.write(read)
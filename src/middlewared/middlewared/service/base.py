@@ -13,6 +13,8 @@ def service_config(klass, config):
         'datastore_primary_key_type': 'integer',
         'event_register': True,
         'event_send': True,
+        'config_cache': False,
+        'config_cache_datastores': [],
         'service': None,
         'service_verb': 'reload',
         'service_verb_sync': True,
@@ -52,6 +54,8 @@ class ServiceBase(type):
       - datastore: name of the datastore mainly used in the service
       - datastore_extend: datastore `extend` option used in common `query` method
       - datastore_prefix: datastore `prefix` option used in helper methods
+      - config_cache: whether `ConfigService.config` result should be cached until the service datastore is written to
+      - config_cache_datastores: additional datastores the cached `ConfigService.config` result depends on
       - service: system service `name` option used by `SystemServiceService`
       - service_verb: verb to be used on update (default to `reload`)
       - namespace: namespace identifier of the service
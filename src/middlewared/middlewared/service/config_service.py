@@ -12,6 +12,11 @@ from .service_mixin import ServiceChangeMixin
 get_or_insert_lock = asyncio.Lock()
 
 
+def config_cache_datastore(name):
+    # Datastores can be referred to both as `services.ssh` and `services_ssh`
+    return name.replace('.', '_').lower()
+
+
 class ConfigServiceMetabase(ServiceBase):
 
     def __new__(cls, name, bases, attrs):
@@ -71,21 +76,66 @@ class ConfigService(ServiceChangeMixin, Service, metaclass=ConfigServiceMetabase
 
     ENTRY = NotImplementedError
 
+    _config_cache = None
+    _config_cache_generation = 0
+    _config_cache_hits = 0
+    _config_cache_misses = 0
+
     @accepts()
     async def config(self):
         options = {}
         options['extend'] = self._config.datastore_extend
         options['extend_context'] = self._config.datastore_extend_context
         options['prefix'] = self._config.datastore_prefix
-        return await self._get_or_insert(self._config.datastore, options)
+        return await self._get_or_insert_cached(self._config.datastore, options)
 
     async def update(self, data):
-        rv = await self.middleware._call(
-            f'{self._config.namespace}.update', self, self.do_update, [data]
-        )
+        try:
+            rv = await self.middleware._call(
+                f'{self._config.namespace}.update', self, self.do_update, [data]
+            )
+        finally:
+            self._config_cache_invalidate()
         await self.middleware.call_hook(f'{self._config.namespace}.post_update', rv)
         return rv
 
+    def _config_cache_datastores(self):
+        return [
+            config_cache_datastore(name)
+            for name in [self._config.datastore] + list(self._config.config_cache_datastores)
+        ]
+
+    def _config_cache_invalidate(self):
+        self._config_cache = None
+        self._config_cache_generation += 1
+
+    def _config_cache_stats(self):
+        return {
+            'hits': self._config_cache_hits,
+            'misses': self._config_cache_misses,
+            'cached': self._config_cache is not None,
+        }
+
+    async def _get_or_insert_cached(self, datastore, options):
+        if not self._config.config_cache:
+            return await self._get_or_insert(datastore, options)
+
+        if self._config_cache is not None:
+            self._config_cache_hits += 1
+        else:
+            self._config_cache_misses += 1
+            generation = self._config_cache_generation
+            config = await self._get_or_insert(datastore, options)
+            if generation != self._config_cache_generation:
+                # Configuration was changed while we were retrieving it, we can't be sure that what we have retrieved
+                # is up-to-date.
+                return config
+
+            self._config_cache = config
+
+        # Callers are free to modify the returned value
+        return copy.deepcopy(self._config_cache)
+
     @private
     async def _get_or_insert(self, datastore, options):
         try:
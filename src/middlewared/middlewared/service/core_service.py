@@ -26,7 +26,7 @@ from middlewared.utils.debug import get_frame_details, get_threads_stacks
 from middlewared.validators import IpAddress, Range
 
 from .compound_service import CompoundService
-from .config_service import ConfigService
+from .config_service import config_cache_datastore, ConfigService
 from .crud_service import CRUDService
 from .decorators import filterable, filterable_returns, job, no_auth_required, pass_app, private
 from .service import Service
@@ -727,6 +727,38 @@ class CoreService(Service):
 
         self.middleware.send_event('core.environ', 'CHANGED', fields=update)
 
+    def _cached_config_services(self):
+        for service in self.middleware.get_services().values():
+            for part in (service.parts if isinstance(service, CompoundService) else [service]):
+                if isinstance(part, ConfigService) and part._config.config_cache:
+                    yield part
+
+    @private
+    async def config_cache_invalidate(self, datastore=None):
+        """
+        Invalidate cached `config` results of the services that depend on `datastore` (or of all services if it is
+        not specified).
+        """
+        if datastore is not None:
+            datastore = config_cache_datastore(datastore)
+
+        for service in self._cached_config_services():
+            if datastore is None or datastore in service._config_cache_datastores():
+                service._config_cache_invalidate()
+
+    @private
+    async def config_cache_stats(self):
+        return {service._config.namespace: service._config_cache_stats() for service in self._cached_config_services()}
+
+    @private
+    @filterable
+    def periodic_tasks(self, filters, options):
+        """
+        Returns run statistics of `@periodic` service methods: number of runs, skipped runs because the previous one
+        was still in progress (`overruns`), run durations (in seconds) and the last error.
+        """
+        return filter_list(self.middleware.periodic_tasks.stats(), filters, options)
+
     RE_ARG = re.compile(r'`[a-z0-9_]+`', flags=re.IGNORECASE)
     RE_NEW_ARG_START = re.compile(r'`|[A-Z]|\*')
 
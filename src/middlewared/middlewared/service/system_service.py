@@ -13,7 +13,7 @@ class SystemServiceService(ConfigService):
 
     @accepts()
     async def config(self):
-        return await self._get_or_insert(
+        return await self._get_or_insert_cached(
             self._config.datastore, {
                 'extend': self._config.datastore_extend,
                 'extend_context': self._config.datastore_extend_context,
@@ -357,7 +357,7 @@ def filter_getattrs(filters):
     while f:
         filter_ = f.pop()
         if len(filter_) == 2:
-            f.append(filter_[1])
+            f.extend(filter_[1])
         elif len(filter_) == 3:
             attrs.add(filter_[0])
         else:
@@ -1,15 +1,33 @@
 # -*- coding=utf-8 -*-
+import copy
 import os
 import logging
+import select
+import threading
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["getmntinfo"]
+__all__ = ["getmntent", "getmntinfo"]
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# Parsed mount table. It is re-read only when the kernel reports a change of the mount table
+# by raising POLLPRI on the open mountinfo file.
+__mounttable_lock = threading.Lock()
+__mounttable = {
+    'pid': None,
+    'file': None,
+    'poller': None,
+    'by_dev_id': {},
+    'by_mount_id': {},
+    'by_mountpoint': {},
+}
 
 
 def __parse_mntent(line, out_dict):
     mnt_id, parent_id, maj_min, root, mp, opts, extra = line.split(" ", 6)
-    fstype, mnt_src, super_opts = extra.split(' - ')[1].split()
+    # optional fields preceding the separator may be absent altogether
+    fstype, mnt_src, super_opts = extra.partition('- ')[2].split()
 
     major, minor = maj_min.split(':')
     devid = os.makedev(int(major), int(minor))
@@ -30,27 +48,88 @@ def __parse_mntent(line, out_dict):
     }})
 
 
+def __mounttable_open():
+    if __mounttable['file'] is not None:
+        __mounttable['file'].close()
+
+    # `/proc/self` is resolved on open so the file has to be re-opened in forked processes
+    __mounttable['pid'] = os.getpid()
+    __mounttable['file'] = open(MOUNTINFO_PATH)
+    __mounttable['poller'] = select.poll()
+    __mounttable['poller'].register(__mounttable['file'].fileno(), select.POLLPRI)
+
+
+def __mounttable_load():
+    f = __mounttable['file']
+    f.seek(0)
+    by_dev_id = {}
+    by_mount_id = {}
+    by_mountpoint = {}
+    for line in f.read().splitlines():
+        entry = {}
+        __parse_mntent(line, entry)
+        devid, mntent = entry.popitem()
+        by_dev_id[devid] = mntent
+        by_mount_id[mntent['mount_id']] = mntent
+        by_mountpoint[mntent['mountpoint']] = mntent
+
+    __mounttable.update({'by_dev_id': by_dev_id, 'by_mount_id': by_mount_id, 'by_mountpoint': by_mountpoint})
+
+
+def __mounttable_get():
+    with __mounttable_lock:
+        if __mounttable['pid'] != os.getpid():
+            __mounttable_open()
+            changed = True
+        else:
+            # Polling resets the change notification, so the table must be re-read after this
+            # even if a new mount happens before we get to read it.
+            changed = bool(__mounttable['poller'].poll(0))
+
+        if changed:
+            try:
+                __mounttable_load()
+            except Exception:
+                # Make sure that next call retries instead of serving a stale table
+                __mounttable['pid'] = None
+                raise
+
+        return __mounttable
+
+
 def getmntinfo(dev_id=None):
     """
     Get mount information. returns dictionary indexed by dev_t.
     User can optionally specify dev_t for faster lookup of single
     device.
+
+    Entries of the full mount table are shared with the mount table cache and
+    must not be modified by the caller.
     """
+    table = __mounttable_get()
     if dev_id:
-        maj_min = f'{os.major(dev_id)}:{os.minor(dev_id)}'
-    else:
-        maj_min = None
+        if (mntent := table['by_dev_id'].get(dev_id)) is None:
+            return {}
 
-    out = {}
-    with open('/proc/self/mountinfo') as f:
-        for line in f:
-            if maj_min:
-                if line.find(maj_min) == -1:
-                    continue
+        return {dev_id: copy.deepcopy(mntent)}
 
-                __parse_mntent(line, out)
-                break
+    return table['by_dev_id'].copy()
 
-            __parse_mntent(line, out)
 
-    return out
+def getmntent(*, dev_id=None, mount_id=None, mountpoint=None):
+    """
+    Get mount information for a single mount identified by either dev_t, mount id or mountpoint.
+    Returns `None` if no such mount exists. If more than one filesystem is mounted on the same mountpoint
+    the topmost one is returned.
+    """
+    table = __mounttable_get()
+    if dev_id is not None:
+        mntent = table['by_dev_id'].get(dev_id)
+    elif mount_id is not None:
+        mntent = table['by_mount_id'].get(mount_id)
+    elif mountpoint is not None:
+        mntent = table['by_mountpoint'].get(mountpoint)
+    else:
+        raise ValueError('One of dev_id, mount_id or mountpoint must be specified')
+
+    return copy.deepcopy(mntent)
@@ -0,0 +1,119 @@
+import asyncio
+from dataclasses import dataclass
+import random
+import time
+
+__all__ = ["PeriodicTaskScheduler"]
+
+JITTER = 0.1  # fraction of the interval by which every run is randomly shifted
+MAX_JITTER = 300  # seconds
+
+
+@dataclass
+class PeriodicTask:
+    name: str
+    interval: float
+    run: callable
+    running: bool = False
+    handle: asyncio.TimerHandle = None
+    runs: int = 0
+    overruns: int = 0
+    errors: int = 0
+    last_started_at: float = None
+    last_duration: float = None
+    max_duration: float = None
+    total_duration: float = 0
+    last_error: str = None
+    next_run_at: float = None
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "errors": self.errors,
+            "last_started_at": self.last_started_at,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "avg_duration": self.total_duration / self.runs if self.runs else None,
+            "last_error": self.last_error,
+            "next_run_in": max(self.next_run_at - time.monotonic(), 0) if self.next_run_at is not None else None,
+        }
+
+
+class PeriodicTaskScheduler:
+    """
+    Runs `@periodic` service methods.
+
+    Every run is shifted by a random jitter so that tasks with the same interval do not all fire at once. Runs are
+    scheduled relative to the start of the previous run; if a task is still running when its next run is due, that run
+    is skipped and counted as an overrun.
+    """
+
+    def __init__(self, middleware, jitter=JITTER, max_jitter=MAX_JITTER):
+        self.middleware = middleware
+        self.jitter = jitter
+        self.max_jitter = max_jitter
+        self.tasks = {}
+
+    def add(self, name, interval, run_on_start, run):
+        """
+        Schedule coroutine function `run` to be called every `interval` seconds. Adding a task that is already
+        scheduled does nothing.
+        """
+        if name in self.tasks:
+            return
+
+        self.tasks[name] = task = PeriodicTask(name, interval, run)
+
+        if run_on_start:
+            # Spread the tasks that run on start over the jitter window instead of running them all at once
+            delay = random.uniform(0, self._jitter(interval))
+        else:
+            delay = self._delay(interval)
+
+        self._schedule(task, delay)
+
+    def stats(self):
+        return [task.stats() for task in self.tasks.values()]
+
+    def _jitter(self, interval):
+        return min(interval * self.jitter, self.max_jitter)
+
+    def _delay(self, interval):
+        jitter = self._jitter(interval)
+        return interval + random.uniform(-jitter, jitter)
+
+    def _schedule(self, task, delay):
+        task.next_run_at = time.monotonic() + delay
+        task.handle = self.middleware.loop.call_later(delay, self._fire, task)
+
+    def _fire(self, task):
+        self._schedule(task, self._delay(task.interval))
+
+        if task.running:
+            task.overruns += 1
+            self.middleware.logger.warning("Periodic task %s is still running, skipping this run", task.name)
+            return
+
+        task.running = True
+        self.middleware.create_task(self._run(task))
+
+    async def _run(self, task):
+        self.middleware.logger.trace("Calling periodic task %s", task.name)
+        task.last_started_at = time.time()
+        started_at = time.monotonic()
+        try:
+            await task.run()
+        except Exception as e:
+            task.errors += 1
+            task.last_error = repr(e)
+            self.middleware.logger.warning("Exception while calling periodic task %s", task.name, exc_info=True)
+        finally:
+            task.running = False
+            task.runs += 1
+            task.last_duration = time.monotonic() - started_at
+            task.max_duration = max(task.max_duration or 0, task.last_duration)
+            task.total_duration += task.last_duration
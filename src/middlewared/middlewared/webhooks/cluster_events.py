@@ -16,6 +16,10 @@ class ClusterEventsApplication(object):
         method = None
 
         if event is not None and name is not None:
+            if event.startswith('VOLUME'):
+                # Volume was started or stopped (possibly by another peer)
+                await self.middleware.call('gluster.volume.query_cache_clear')
+
             if event == 'VOLUME_START':
                 method = 'gluster.fuse.mount'
             elif event == 'VOLUME_STOP':